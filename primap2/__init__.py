@@ -6,18 +6,22 @@ __version__ = "0.11.2"
 
 from . import accessors, pm2io
 from ._data_format import (
+    ProcessingDescriptionArray,
     ProcessingStepDescription,
     TimeseriesProcessingDescription,
     open_dataset,
 )
+from ._merge import merge_many
 from ._selection import Not
 from ._units import ureg
 
 __all__ = [
     "accessors",
+    "merge_many",
     "open_dataset",
     "ureg",
     "pm2io",
+    "ProcessingDescriptionArray",
     "ProcessingStepDescription",
     "TimeseriesProcessingDescription",
     "Not",
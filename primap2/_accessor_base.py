@@ -15,3 +15,10 @@ class BaseDataArrayAccessor:
 class BaseDatasetAccessor:
     def __init__(self, ds: xr.Dataset):
         self._ds = ds
+
+
+def is_chunked(obj: xr.Dataset | xr.DataArray) -> bool:
+    """True if any variable of obj is backed by a chunked array, e.g. a dask array."""
+    if isinstance(obj, xr.DataArray):
+        return obj.chunks is not None
+    return any(var.chunks is not None for var in obj.variables.values())
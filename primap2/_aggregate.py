@@ -1,16 +1,18 @@
+import graphlib
 from collections.abc import Hashable, Iterable, Mapping, Sequence
 from copy import deepcopy
-from typing import Any
+from typing import Any, NamedTuple
 
 import numpy as np
+import pandas as pd
 import pint
 import xarray as xr
 from loguru import logger
 
-from ._accessor_base import BaseDataArrayAccessor, BaseDatasetAccessor
+from ._accessor_base import BaseDataArrayAccessor, BaseDatasetAccessor, is_chunked
 from ._data_format import split_var_name
 from ._dim_names import dim_names
-from ._selection import alias_dims
+from ._selection import Not, alias_dims
 from ._types import DatasetOrDataArray, DimOrDimsT
 from ._units import ureg
 
@@ -45,6 +47,354 @@ def select_no_scalar_dimension(
         return sele
 
 
+def sum_keeping_chunks_lazy(
+    obj: DatasetOrDataArray,
+    *,
+    dim: DimOrDimsT | None,
+    skipna: bool | None,
+    keep_attrs: bool,
+    min_count: int | None,
+) -> DatasetOrDataArray:
+    """Sum like xarray's sum, but don't compute chunked data.
+
+    When summing with skipna, xarray uses ``where``, and pint's implementation of
+    ``where`` computes chunked arrays to check for zeros and NaNs. Therefore, chunked
+    data is summed without units and the units are attached again afterwards.
+    """
+    if not is_chunked(obj):
+        return obj.sum(dim=dim, skipna=skipna, keep_attrs=keep_attrs, min_count=min_count)
+    summed = (
+        obj.pint.dequantify()
+        .sum(dim=dim, skipna=skipna, keep_attrs=True, min_count=min_count)
+        .pint.quantify(unit_registry=ureg)
+    )
+    if not keep_attrs:
+        summed.attrs = {}
+        if isinstance(summed, xr.Dataset):
+            for var in summed.data_vars.values():
+                var.attrs = {}
+    return summed
+
+
+AGGREGATION_REPORT_COLUMNS = ["variable", "coordinate", "value", "level", "status", "max deviation"]
+
+
+class AggregationRule(NamedTuple):
+    """A single aggregation rule of add_aggregates_coordinates for one coordinate."""
+
+    target: Hashable
+    sources: list[Hashable]
+    tolerance: float | None
+    filter: dict[Hashable, Any]
+    add_coords: dict[Hashable, Any]
+
+
+def compile_aggregation_rules(
+    rules: dict[str, list[str] | dict[str, Any]],
+    *,
+    da: xr.DataArray,
+    coordinate: Hashable,
+    tolerance: float | None,
+) -> list[AggregationRule]:
+    """Parse the aggregation rules for a coordinate which apply to the given array.
+
+    Rules with a filter on the variable or the entity which excludes the array are
+    skipped.
+    """
+    compiled = []
+    for value_to_aggregate, rule in rules.items():
+        if isinstance(rule, dict):
+            rule = deepcopy(rule)
+            source_values = rule.pop("sources")
+            rule_tolerance = rule.pop("tolerance", tolerance)
+            filter_ = rule.pop("filter", {})
+            if "variable" in filter_.keys():
+                if da.name in filter_["variable"]:
+                    filter_.pop("variable")
+                else:
+                    continue
+            if "entity" in filter_.keys():
+                if da.attrs["entity"] in filter_["entity"]:
+                    filter_.pop("entity")
+                else:
+                    continue
+            for add_coord in rule.keys():
+                if add_coord not in da.coords:
+                    logger.error(
+                        f"Additional coordinate {add_coord!r} specified but not present in data"
+                    )
+                    raise ValueError(
+                        f"Additional coordinate {add_coord!r} specified but not present in data"
+                    )
+            add_coords = rule
+        elif isinstance(rule, list):
+            source_values = rule
+            rule_tolerance = tolerance
+            filter_ = {}
+            add_coords = {}
+        else:
+            logger.error(f"Unrecognized aggregation definition for {value_to_aggregate!r}")
+            raise ValueError(f"Unrecognized aggregation definition for {value_to_aggregate!r}")
+
+        # the sources are always selected along the aggregated coordinate, and scalar
+        # values are wrapped in lists so that pr.loc keeps the dimension
+        translations = da.pr.dim_alias_translations
+        filter_ = {
+            key: [value] if np.ndim(value) == 0 and not isinstance(value, slice | Not) else value
+            for key, value in filter_.items()
+            if translations.get(key, key) != coordinate
+        }
+        compiled.append(
+            AggregationRule(
+                target=value_to_aggregate,
+                sources=list(source_values),
+                tolerance=rule_tolerance,
+                filter=filter_,
+                add_coords=add_coords,
+            )
+        )
+    return compiled
+
+
+def hierarchy_aggregation_rules(
+    hierarchy: dict[str, list[str]], *, coordinate: Hashable, tolerance: float | None
+) -> list[AggregationRule]:
+    """Sort a hierarchy topologically into aggregation rules, children first."""
+    sorter = graphlib.TopologicalSorter(hierarchy)
+    try:
+        order = list(sorter.static_order())
+    except graphlib.CycleError as err:
+        logger.error(f"The hierarchy for {coordinate!r} contains a cycle: {err.args[1]}")
+        raise ValueError(
+            f"The hierarchy for {coordinate!r} contains a cycle: {err.args[1]}"
+        ) from None
+    return [
+        AggregationRule(
+            target=parent,
+            sources=list(hierarchy[parent]),
+            tolerance=tolerance,
+            filter={},
+            add_coords={},
+        )
+        for parent in order
+        if parent in hierarchy
+    ]
+
+
+def aggregation_levels(rules: list[AggregationRule]) -> list[list[AggregationRule]]:
+    """Group aggregation rules into levels which can be computed together.
+
+    Rules are applied in the given order, so a rule which uses the result of an
+    earlier rule as a source has to be computed in a later level. Conversely, a rule
+    overwriting a source of an earlier rule must not be computed before that earlier
+    rule, so it is computed in the same or a later level.
+    """
+    levels: list[list[AggregationRule]] = []
+    rule_levels: list[int] = []
+    for rule in rules:
+        level = 0
+        for earlier, earlier_level in zip(rules, rule_levels, strict=False):
+            if earlier.target in rule.sources:
+                level = max(level, earlier_level + 1)
+            if rule.target in earlier.sources:
+                level = max(level, earlier_level)
+        rule_levels.append(level)
+        if level == len(levels):
+            levels.append([])
+        levels[level].append(rule)
+    return levels
+
+
+def aggregate_level(
+    da: xr.DataArray,
+    *,
+    rules: list[AggregationRule],
+    coordinate: Hashable,
+    skipna: bool | None,
+    min_count: int | None,
+) -> xr.DataArray | None:
+    """Compute the aggregates of independent rules for a coordinate at once.
+
+    The rules are compiled into a sum matrix with one row per rule, which is applied
+    to the data along the coordinate using a single matrix product. Aggregates
+    containing only NaN are left out of the result, if no aggregate could be computed
+    at all, None is returned. The data must not have units.
+    """
+    values_present = da[coordinate].to_numpy().tolist()
+    positions = {value: i for i, value in enumerate(values_present)}
+    matrix = np.zeros((len(rules), len(values_present)))
+    n_sources = np.zeros(len(rules))
+    for i, rule in enumerate(rules):
+        source_values_present = [val for val in rule.sources if val in positions]
+        missing_values = set(rule.sources) - set(source_values_present)
+        if not source_values_present:
+            logger.info(
+                f"No source value present for {rule.target!r} in "
+                f"coordinate {coordinate!r}. Missing: {missing_values}."
+                f" (variable: {da.name})"
+            )
+            continue
+        if missing_values:
+            logger.info(
+                f"Not all source values present for "
+                f"{rule.target!r} in coordinate {coordinate!r}. "
+                f"Missing: {missing_values}. (variable: {da.name})"
+            )
+        matrix[i, [positions[val] for val in source_values_present]] = 1
+        n_sources[i] = len(source_values_present)
+
+    computed = n_sources > 0
+    if not computed.any():
+        return None
+    rules = [rule for rule, comp in zip(rules, computed, strict=True) if comp]
+    target_dim = f"{coordinate} aggregated"
+    matrix_da = xr.DataArray(
+        matrix[computed],
+        dims=(target_dim, coordinate),
+        coords={coordinate: da[coordinate].to_numpy()},
+    )
+    n_sources_da = xr.DataArray(n_sources[computed], dims=(target_dim,))
+
+    # the coordinate's own non-dimension coordinates don't apply to the aggregates
+    da_values = da.drop_vars(
+        [name for name, coord in da.coords.items() if coordinate in coord.dims]
+    )
+    valid = da_values.notnull()
+    summed = xr.dot(matrix_da, da_values.fillna(0), dim=coordinate)
+    count = xr.dot(matrix_da, valid.astype(matrix.dtype), dim=coordinate)
+
+    if skipna is None:
+        skipna = np.issubdtype(da.dtype, np.floating)
+    elif skipna and min_count is None:
+        min_count = 1
+    if not skipna:
+        summed = summed.where(count == n_sources_da)
+    elif min_count is not None:
+        summed = summed.where(count >= min_count)
+
+    # rules with a filter only aggregate the selected data
+    if any(rule.filter for rule in rules):
+        template = xr.ones_like(da_values.isel({coordinate: 0}, drop=True), dtype=bool)
+        masks = [
+            (
+                template.pr.loc[rule.filter].reindex_like(template, fill_value=False)
+                if rule.filter
+                else template
+            )
+            for rule in rules
+        ]
+        summed = summed.where(xr.concat(masks, dim=target_dim))
+
+    summed = summed.rename({target_dim: coordinate}).transpose(*da.dims)
+    summed = summed.assign_coords({coordinate: [rule.target for rule in rules]})
+    summed.name = da.name
+    summed.attrs = da.attrs
+
+    all_nan = summed.isnull().all([dim for dim in summed.dims if dim != coordinate]).to_numpy()
+    for rule, rule_all_nan in zip(rules, all_nan, strict=True):
+        if rule_all_nan:
+            logger.info(
+                f"All input data nan for '{rule.target}' in "
+                f"coordinate {coordinate!r}. (variable: {da.name})"
+            )
+    if all_nan.all():
+        return None
+    rules = [rule for rule, nan in zip(rules, all_nan, strict=True) if not nan]
+    summed = summed.loc[{coordinate: [rule.target for rule in rules]}]
+
+    for add_coord in {add_coord for rule in rules for add_coord in rule.add_coords}:
+        missing = [rule.target for rule in rules if add_coord not in rule.add_coords]
+        if missing:
+            logger.error(
+                f"Additional coordinate {add_coord!r} specified for some aggregates, "
+                f"but not for {missing!r} (variable: {da.name})"
+            )
+            raise ValueError(
+                f"Additional coordinate {add_coord!r} specified for some aggregates, "
+                f"but not for {missing!r} (variable: {da.name})"
+            )
+        summed = summed.assign_coords(
+            {add_coord: (coordinate, [rule.add_coords[add_coord] for rule in rules])}
+        )
+    return summed
+
+
+def apply_aggregation_rules(
+    da: xr.DataArray,
+    *,
+    rules: list[AggregationRule],
+    coordinate: Hashable,
+    skipna: bool | None,
+    min_count: int | None,
+    report: list[dict[str, Any]] | None = None,
+) -> xr.DataArray:
+    """Apply aggregation rules for a coordinate level by level.
+
+    The aggregates of each level are merged into the data, checking for
+    discrepancies with existing data, before the next level is computed. If
+    ``report`` is given, a row describing the result is appended for every rule. The
+    data must not have units.
+    """
+    for i_level, level in enumerate(aggregation_levels(rules)):
+        da_agg = aggregate_level(
+            da,
+            rules=level,
+            coordinate=coordinate,
+            skipna=skipna,
+            min_count=min_count,
+        )
+        aggregated = [] if da_agg is None else da_agg[coordinate].to_numpy().tolist()
+        if report is not None:
+            present = da[coordinate].to_numpy().tolist()
+            existing = [target for target in aggregated if target in present]
+            if existing:
+                da_existing = da.loc[{coordinate: existing}]
+                da_new = da_agg.loc[{coordinate: existing}]
+                deviation = (abs(da_existing - da_new) / abs(da_existing)).max(
+                    [dim for dim in da_new.dims if dim != coordinate]
+                )
+                has_data = da_existing.notnull().any(
+                    [dim for dim in da_new.dims if dim != coordinate]
+                )
+                deviations = dict(zip(existing, deviation.to_numpy(), strict=True))
+                existing = [
+                    target
+                    for target, target_has_data in zip(existing, has_data.to_numpy(), strict=True)
+                    if target_has_data
+                ]
+            for rule in level:
+                if rule.target not in aggregated:
+                    status = "no data"
+                elif rule.target in existing:
+                    status = "existing"
+                else:
+                    status = "computed"
+                report.append(
+                    {
+                        "variable": da.name,
+                        "coordinate": coordinate,
+                        "value": rule.target,
+                        "level": i_level,
+                        "status": status,
+                        "max deviation": (
+                            deviations[rule.target] if status == "existing" else np.nan
+                        ),
+                    }
+                )
+        if da_agg is None:
+            continue
+        # rules with the same tolerance and additional coordinates are merged in
+        # one go
+        groups: dict[tuple[float | None, tuple[str, ...]], list[Hashable]] = {}
+        for rule in level:
+            if rule.target in aggregated:
+                key = (rule.tolerance, tuple(sorted(rule.add_coords)))
+                groups.setdefault(key, []).append(rule.target)
+        for (rule_tolerance, _), targets in groups.items():
+            da = da.pr.merge(da_agg.loc[{coordinate: targets}], tolerance=rule_tolerance)
+    return da
+
+
 class DataArrayAggregationAccessor(BaseDataArrayAccessor):
     def _reduce_dim(
         self, dim: DimOrDimsT | None, reduce_to_dim: DimOrDimsT | None
@@ -194,7 +544,9 @@ class DataArrayAggregationAccessor(BaseDataArrayAccessor):
                 if min_count is None:
                     min_count = 1
 
-        return da.sum(dim=dim, skipna=skipna, keep_attrs=keep_attrs, min_count=min_count)
+        return sum_keeping_chunks_lazy(
+            da, dim=dim, skipna=skipna, keep_attrs=keep_attrs, min_count=min_count
+        )
 
     @alias_dims(["dim"])
     def fill_all_na(self, dim: Iterable[Hashable] | str, value=0) -> xr.DataArray:
@@ -219,6 +571,12 @@ class DataArrayAggregationAccessor(BaseDataArrayAccessor):
         """
         if not dim:
             return self._da
+        elif is_chunked(self._da):
+            # pint's where computes chunked arrays, so fill without units
+            if isinstance(value, pint.Quantity):
+                value = value.to(self._da.pint.units).magnitude
+            da = self._da.pint.dequantify()
+            return da.where(~np.isnan(da).all(dim=dim), value).pint.quantify(unit_registry=ureg)
         else:
             return self._da.where(~np.isnan(self._da).all(dim=dim), value)
 
@@ -244,6 +602,11 @@ class DataArrayAggregationAccessor(BaseDataArrayAccessor):
         If an aggregated time-series is present the aggregate data are merged to
         check if aggregated and existing data agree within the given tolerance.
 
+        The rules for a coordinate are applied in the given order, so aggregates can
+        be used as sources of later rules, e.g. to build a category hierarchy from the
+        bottom up. All rules which don't depend on each other are computed together
+        with a single matrix product along the coordinate.
+
         Parameters
         ----------
         agg_info:
@@ -265,8 +628,7 @@ class DataArrayAggregationAccessor(BaseDataArrayAccessor):
                     ...
                 }
 
-            All values in ``filter`` must be lists to keep the dimensions in the data
-            returned by ``da.pr.loc``
+            Scalar values in ``filter`` are treated like lists with a single value.
             The normal format and the simplified list format can be mixed also
             within a coordinate
         tolerance:
@@ -299,97 +661,115 @@ class DataArrayAggregationAccessor(BaseDataArrayAccessor):
         da_out = self._da.pr.dequantify()
 
         for coordinate in agg_info:
-            aggregation_rules = agg_info[coordinate]
             full_coord_name = da_out.pr.dim_alias_translations.get(coordinate, coordinate)
-            for value_to_aggregate in aggregation_rules.keys():
-                rule = deepcopy(aggregation_rules[value_to_aggregate])
-                if isinstance(rule, dict):
-                    source_values = rule.pop("sources")
-                    if "tolerance" in rule.keys():
-                        rule_tolerance = rule.pop("tolerance")
-                    else:
-                        rule_tolerance = tolerance
-                    if "filter" in rule.keys():
-                        filter_ = rule.pop("filter")
-                        if "variable" in filter_.keys():
-                            if da_out.name in filter_["variable"]:
-                                filter_.pop("variable")
-                            else:
-                                continue
-                        if "entity" in filter_.keys():
-                            if da_out.attrs["entity"] in filter_["entity"]:
-                                filter_.pop("entity")
-                            else:
-                                continue
-                    else:
-                        filter_ = {}
-                elif isinstance(rule, list):
-                    source_values = rule
-                    filter_ = {}
-                    rule_tolerance = tolerance
-                else:
-                    logger.error(
-                        "Unrecognized aggregation definition for " f"{value_to_aggregate!r}"
-                    )
-                    raise ValueError(
-                        "Unrecognized aggregation definition for " f"{value_to_aggregate!r}"
-                    )
+            rules = compile_aggregation_rules(
+                agg_info[coordinate],
+                da=da_out,
+                coordinate=full_coord_name,
+                tolerance=tolerance,
+            )
+            da_out = apply_aggregation_rules(
+                da_out,
+                rules=rules,
+                coordinate=full_coord_name,
+                skipna=skipna,
+                min_count=min_count,
+            )
 
-                # check if all source values present
-                values_present = list(da_out[full_coord_name].values)
-                source_values_present = [val for val in source_values if val in values_present]
-                missing_values = set(source_values) - set(source_values_present)
-                if source_values_present:
-                    if missing_values:
-                        logger.info(
-                            f"Not all source values present for "
-                            f"{value_to_aggregate!r} in coordinate {full_coord_name!r}. "
-                            f"Missing: {missing_values}. (variable: {da_out.name})"
-                        )
-                    filter_.update({coordinate: source_values_present})
-                    data_agg = da_out.pr.loc[filter_].pr.sum(
-                        dim=coordinate, skipna=skipna, min_count=min_count
-                    )
-                    if not data_agg.isnull().all():
-                        data_agg = data_agg.expand_dims([full_coord_name])
-                        data_agg = data_agg.assign_coords(
-                            coords={full_coord_name: (full_coord_name, [value_to_aggregate])}
-                        )
-                        if isinstance(rule, dict):
-                            for add_coord in rule.keys():
-                                if add_coord in da_out.coords:
-                                    add_coord_value = rule[add_coord]
-                                    data_agg = data_agg.assign_coords(
-                                        coords={
-                                            add_coord: (
-                                                full_coord_name,
-                                                [add_coord_value],
-                                            )
-                                        }
-                                    )
-                                else:
-                                    logger.error(
-                                        f"Additional coordinate {add_coord!r} specified "
-                                        "but not present in data"
-                                    )
-                                    raise ValueError(
-                                        f"Additional coordinate {add_coord!r} specified but not "
-                                        f"present in data"
-                                    )
-                        da_out = da_out.pr.merge(data_agg, tolerance=rule_tolerance)
-                    else:
-                        logger.info(
-                            f"All input data nan for '{value_to_aggregate}' in "
-                            f"coordinate {full_coord_name!r}. (variable: {da_out.name})"
-                        )
-                else:
-                    logger.info(
-                        f"No source value present for {value_to_aggregate!r} in "
-                        f"coordinate {full_coord_name!r}. Missing: {missing_values}."
-                        f" (variable: {da_out.name})"
-                    )
+        da_out = da_out.pr.quantify()
+        return da_out
+
+    def add_aggregates_hierarchy(
+        self,
+        hierarchy: dict[str, dict[str, list[str]]],
+        tolerance: float | None = 0.01,
+        skipna: bool | None = True,
+        min_count: int | None = 1,
+        return_report: bool = False,
+    ) -> xr.DataArray | tuple[xr.DataArray, pd.DataFrame]:
+        """
+        Aggregate data along hierarchies of coordinate values from the bottom up
+
+        The hierarchy is given as a mapping from parents to their children, the order
+        does not matter. Parents are aggregated after all their children, so
+        aggregates are re-used to compute their parents instead of summing the leaves
+        again. Independent parents are computed together, so the number of passes
+        over the data is the depth of the hierarchy.
+
+        If a parent is already present the aggregate data are merged to check if
+        aggregated and existing data agree within the given tolerance, and existing
+        data is used for aggregating further up the hierarchy.
+
+        Parameters
+        ----------
+        hierarchy:
+            dict of the following form::
+
+                hierarchy = {
+                    <coord1>: {
+                        <parent>: [children],
+                        ...
+                    },
+                    ...
+                }
+
+            example::
+
+                hierarchy = {
+                    "category (IPCC2006)": {
+                        "0": ["1", "2", "3", "4", "5"],
+                        "1": ["1.A", "1.B", "1.C"],
+                        "1.A": ["1.A.1", "1.A.2", "1.A.3", "1.A.4", "1.A.5"],
+                    }
+                }
+
+        tolerance:
+            non-default tolerance for merging (default = 0.01 (1%))
+        skipna: bool, optional
+            If ``True`` (default), skip missing values (as marked by NaN). By default, only
+            skips missing values for ``float`` dtypes; other dtypes either do not
+            have a sentinel missing value (int) or ``skipna=True`` has not been
+            implemented (``object``, ``datetime64`` or ``timedelta64``).
+        min_count: int (default None, but set to 1 if skipna=True)
+            The minimal number of non-NA values in a sum that is necessary for a non-NA
+            result. This only has an effect if ``skipna=True``. See
+            :py:meth:`xarray.DataArray.pr.add_aggregates_coordinates` for details.
+        return_report: bool, optional
+            If ``True``, additionally return a report of the aggregation.
+
+        Returns
+        -------
+            xr.DataArray
+                Input array, but with the aggregated values of all parents.
+            report: pd.DataFrame
+                Only if ``return_report`` is ``True``. Table with a row for each parent,
+                with the columns "variable", "coordinate", "value", "level" (the
+                height of the parent in the hierarchy starting from 0), "status" and
+                "max deviation". The status is "computed" if the parent was added or
+                had no data before, "existing" if data was present already (in this
+                case, "max deviation" is the maximal relative deviation between
+                existing and aggregated data), and "no data" if no children were
+                present or all their data was NaN.
+        """
+        da_out = self._da.pr.dequantify()
+        report: list[dict[str, Any]] = []
+
+        for coordinate, parents in hierarchy.items():
+            full_coord_name = da_out.pr.dim_alias_translations.get(coordinate, coordinate)
+            da_out = apply_aggregation_rules(
+                da_out,
+                rules=hierarchy_aggregation_rules(
+                    parents, coordinate=full_coord_name, tolerance=tolerance
+                ),
+                coordinate=full_coord_name,
+                skipna=skipna,
+                min_count=min_count,
+                report=report if return_report else None,
+            )
 
         da_out = da_out.pr.quantify()
+        if return_report:
+            return da_out, pd.DataFrame(report, columns=AGGREGATION_REPORT_COLUMNS)
         return da_out
 
 
@@ -622,18 +1002,26 @@ class DatasetAggregationAccessor(BaseDatasetAccessor):
         if dim is not None and "entity" in dim:
             ndim = set(dim) - {"entity"}
 
-            ds = ds.sum(dim=ndim, skipna=skipna, keep_attrs=keep_attrs, min_count=min_count)
+            ds = sum_keeping_chunks_lazy(
+                ds, dim=ndim, skipna=skipna, keep_attrs=keep_attrs, min_count=min_count
+            )
 
             if not ds.pr._all_vars_all_dimensions():
                 raise NotImplementedError(
                     "Summing along the entity dimension is only supported "
                     "when all entities share the dimensions remaining after summing."
                 )
-            return ds.to_array("entity").sum(
-                dim="entity", skipna=skipna, keep_attrs=keep_attrs, min_count=min_count
+            return sum_keeping_chunks_lazy(
+                ds.to_array("entity"),
+                dim="entity",
+                skipna=skipna,
+                keep_attrs=keep_attrs,
+                min_count=min_count,
             )
         else:
-            return ds.sum(dim=dim, skipna=skipna, keep_attrs=keep_attrs, min_count=min_count)
+            return sum_keeping_chunks_lazy(
+                ds, dim=dim, skipna=skipna, keep_attrs=keep_attrs, min_count=min_count
+            )
 
     def gas_basket_contents_sum(
         self,
@@ -812,6 +1200,11 @@ class DatasetAggregationAccessor(BaseDatasetAccessor):
         If an aggregated time-series is present the aggregate data are merged to
         check if aggregated and existing data agree within the given tolerance.
 
+        The rules for a coordinate are applied in the given order, so aggregates can
+        be used as sources of later rules, e.g. to build a category hierarchy from the
+        bottom up. All rules which don't depend on each other are computed together
+        with a single matrix product along the coordinate.
+
         Parameters
         ----------
         agg_info:
@@ -833,8 +1226,7 @@ class DatasetAggregationAccessor(BaseDatasetAccessor):
                     ...
                 }
 
-            All values in ``filter`` must be lists to keep the dimensions in the data
-            returned by ``da.pr.loc``
+            Scalar values in ``filter`` are treated like lists with a single value.
             The normal format and the simplified list format can be mixed also
             within a coordinate
         tolerance:
@@ -861,16 +1253,101 @@ class DatasetAggregationAccessor(BaseDatasetAccessor):
                 specified in the agg_info dict
         """
         ds_out = self._ds.copy(deep=True)
-        for var in ds_out.data_vars:
-            ds_out = ds_out.pr.merge(
-                ds_out[var].pr.add_aggregates_coordinates(
-                    agg_info=agg_info,
-                    tolerance=tolerance,
-                    skipna=skipna,
-                    min_count=min_count,
-                )
+        # the aggregated variables contain the original data, so they can be merged
+        # in one go without checking for discrepancies with the original data
+        aggregated = [
+            ds_out[var].pr.add_aggregates_coordinates(
+                agg_info=agg_info,
+                tolerance=tolerance,
+                skipna=skipna,
+                min_count=min_count,
             )
+            for var in ds_out.data_vars
+        ]
+        if aggregated:
+            attrs = ds_out.attrs
+            ds_out = xr.merge(aggregated, join="outer")
+            ds_out.attrs = attrs
+        return ds_out
+
+    def add_aggregates_hierarchy(
+        self,
+        hierarchy: dict[str, dict[str, list[str]]],
+        tolerance: float | None = 0.01,
+        skipna: bool | None = True,
+        min_count: int | None = 1,
+        return_report: bool = False,
+    ) -> xr.Dataset | tuple[xr.Dataset, pd.DataFrame]:
+        """
+        Aggregate data along hierarchies of coordinate values from the bottom up
+
+        Aggregates all variables using
+        :py:meth:`xarray.DataArray.pr.add_aggregates_hierarchy`, variables which
+        don't have all dimensions of the hierarchy are left unchanged.
+
+        Parameters
+        ----------
+        hierarchy:
+            dict of the following form::
 
+                hierarchy = {
+                    <coord1>: {
+                        <parent>: [children],
+                        ...
+                    },
+                    ...
+                }
+
+        tolerance:
+            non-default tolerance for merging (default = 0.01 (1%))
+        skipna: bool, optional
+            If ``True`` (default), skip missing values (as marked by NaN). By default, only
+            skips missing values for float dtypes; other dtypes either do not
+            have a sentinel missing value (int) or ``skipna=True`` has not been
+            implemented (``object``, ``datetime64`` or ``timedelta64``).
+        min_count: int (default None, but set to 1 if skipna=True)
+            The minimal number of non-NA values in a sum that is necessary for a non-NA
+            result. This only has an effect if ``skipna=True``. See
+            :py:meth:`xarray.Dataset.pr.add_aggregates_coordinates` for details.
+        return_report: bool, optional
+            If ``True``, additionally return a report of the aggregation, see
+            :py:meth:`xarray.DataArray.pr.add_aggregates_hierarchy`.
+
+        Returns
+        -------
+            xr.Dataset
+                Input with the aggregated values of all parents.
+            report: pd.DataFrame
+                Only if ``return_report`` is ``True``.
+        """
+        ds_out = self._ds.copy(deep=True)
+        dims = {ds_out.pr.dim_alias_translations.get(coord, coord) for coord in hierarchy}
+        aggregated = []
+        reports = []
+        for var in ds_out.data_vars:
+            if not dims.issubset(ds_out[var].dims):
+                logger.debug(f"Not aggregating {var}, it doesn't have all dimensions.")
+                aggregated.append(ds_out[var])
+                continue
+            result = ds_out[var].pr.add_aggregates_hierarchy(
+                hierarchy=hierarchy,
+                tolerance=tolerance,
+                skipna=skipna,
+                min_count=min_count,
+                return_report=return_report,
+            )
+            if return_report:
+                result, report = result
+                reports.append(report)
+            aggregated.append(result)
+        if aggregated:
+            attrs = ds_out.attrs
+            ds_out = xr.merge(aggregated, join="outer")
+            ds_out.attrs = attrs
+        if return_report:
+            if reports:
+                return ds_out, pd.concat(reports, ignore_index=True)
+            return ds_out, pd.DataFrame(columns=AGGREGATION_REPORT_COLUMNS)
         return ds_out
 
     def add_aggregates_variables(
@@ -1,5 +1,6 @@
 import contextlib
 import datetime
+import math
 import pathlib
 import typing
 from collections.abc import Hashable, Iterable, Mapping
@@ -13,6 +14,11 @@ import xarray as xr
 from attr import define
 from loguru import logger
 
+# xarray.core.indexing is not part of the public API, but it is what xarray's own
+# backends use for lazy loading and it is recommended in xarray's documentation on
+# writing backends. The supported xarray versions are pinned in setup.cfg.
+from xarray.core import indexing
+
 from primap2._selection import translations_from_dims
 
 from . import _accessor_base, pm2io
@@ -27,6 +33,7 @@ def open_dataset(
     cache: bool | None = None,
     drop_variables: str | Iterable | None = None,
     backend_kwargs: dict | None = None,
+    decode_processing_info: bool | typing.Literal["lazy"] = True,
 ) -> xr.Dataset:
     """Open and decode a dataset from a file or file-like object.
 
@@ -57,6 +64,14 @@ def open_dataset(
         A dictionary of keyword arguments to pass on to the backend. This
         may be useful when backend options would improve performance or
         allow user control of dataset processing.
+    decode_processing_info: bool or "lazy", optional
+        If True (default), the processing information variables are decoded into
+        TimeseriesProcessingDescription objects when opening the dataset. If "lazy",
+        the processing information is only decoded when it is accessed, and only for
+        the selected timeseries, which makes opening large datasets with processing
+        information much faster. If the dataset is opened with dask, decoding is done
+        per chunk when the processing information is computed. If False, the
+        processing information is not decoded and kept as stored in the file.
 
     Returns
     -------
@@ -83,14 +98,143 @@ def open_dataset(
         ds.attrs["sec_cats"] = list(ds.attrs["sec_cats"])
     if "publication_date" in ds.attrs:
         ds.attrs["publication_date"] = datetime.date.fromisoformat(ds.attrs["publication_date"])
-    for entity in ds:
-        if entity.startswith("Processing of "):
-            ds[entity].data = np.vectorize(
-                lambda x: TimeseriesProcessingDescription.deserialize(x)
-            )(ds[entity].data)
+    # coordinates are small, but chunked coordinates would be computed in every
+    # operation combining two arrays
+    ds = ds.assign_coords(
+        {name: coord.compute() for name, coord in ds.coords.items() if coord.chunks is not None}
+    )
+    if decode_processing_info:
+        ds = decode_processing_variables(ds, lazy=decode_processing_info == "lazy")
     return ds
 
 
+def decode_processing_variables(ds: xr.Dataset, *, lazy: bool) -> xr.Dataset:
+    """Decode all processing variables of a dataset read from disk."""
+    for entity in ds:
+        if PROCESSING_DESCRIPTIONS_ATTR in ds[entity].attrs:
+            decode: typing.Callable[[np.ndarray], np.ndarray] = ProcessingInfoCodesDecoder(
+                ds[ds[entity].attrs.pop(PROCESSING_DESCRIPTIONS_ATTR)].variable
+            )
+        elif entity.startswith("Processing of "):
+            # format written by primap2 versions before 0.12
+            decode = np.vectorize(TimeseriesProcessingDescription.deserialize, otypes=[object])
+        else:
+            continue
+        encoded = ds[entity].variable
+        if not lazy:
+            data = decode(encoded.to_numpy())
+        elif encoded.chunks is not None:
+            data = encoded.data.map_blocks(
+                decode, dtype=object, meta=np.empty((0,) * encoded.ndim, dtype=object)
+            )
+        else:
+            data = indexing.LazilyIndexedArray(LazyProcessingInfoArray(encoded, decode))
+        ds[entity] = xr.Variable(encoded.dims, data, encoded.attrs)
+    return ds.drop_vars([var for var in ds if PROCESSING_DESCRIPTIONS_OF_ATTR in ds[var].attrs])
+
+
+# attr of an encoded processing variable with the name of the variable containing
+# the encoded unique processing descriptions
+PROCESSING_DESCRIPTIONS_ATTR = "processing_descriptions"
+# attr of a variable containing encoded processing descriptions with the name of the
+# processing variable
+PROCESSING_DESCRIPTIONS_OF_ATTR = "processing_descriptions_of"
+
+
+def encode_processing_info(da: xr.DataArray) -> tuple[xr.DataArray, xr.DataArray]:
+    """Encode a processing variable for saving to disk.
+
+    All processing descriptions are written into a single binary blob containing only
+    the unique processing descriptions. For each timeseries, the index of its
+    processing description in the unique processing descriptions is stored instead
+    of the processing description itself.
+
+    Returns
+    -------
+        codes, descriptions. codes has the dimensions of the processing variable and
+        contains the index of the processing description of each timeseries, or -1 if
+        the timeseries has no processing description. descriptions contains the
+        unique processing descriptions as bytes.
+    """
+    unique, codes = ProcessingDescriptionArray.from_objects(da.data).unique()
+    descriptions_name = f"descriptions of {da.name}"
+    descriptions = xr.DataArray(
+        np.frombuffer(unique.to_bytes(), dtype=np.uint8),
+        dims=[f"{descriptions_name} bytes"],
+        name=descriptions_name,
+        attrs={PROCESSING_DESCRIPTIONS_OF_ATTR: da.name},
+    )
+    codes_da = da.copy(data=codes)
+    codes_da.attrs[PROCESSING_DESCRIPTIONS_ATTR] = descriptions_name
+    return codes_da, descriptions
+
+
+class ProcessingInfoCodesDecoder:
+    """Decode a processing variable encoded using encode_processing_info.
+
+    The unique processing descriptions are only read and decoded on first use.
+
+    Parameters
+    ----------
+    descriptions
+        The variable containing the binary data of the unique processing
+        descriptions.
+    """
+
+    def __init__(self, descriptions: xr.Variable):
+        self._descriptions = descriptions
+        self._unique: np.ndarray | None = None
+
+    def __call__(self, codes: np.ndarray) -> np.ndarray:
+        """Decode processing descriptions.
+
+        Parameters
+        ----------
+        codes
+            Index of the processing description of each timeseries in the unique
+            processing descriptions, or -1 if the timeseries has no processing
+            description.
+
+        Returns
+        -------
+            Array with the shape of codes containing the processing descriptions.
+        """
+        if self._unique is None:
+            self._unique = ProcessingDescriptionArray.from_bytes(
+                self._descriptions.to_numpy().tobytes()
+            ).views()
+        result = np.empty(codes.shape, dtype=object)
+        present = codes != -1
+        result[present] = self._unique[codes[present]]
+        return result
+
+
+class LazyProcessingInfoArray(xr.backends.BackendArray):
+    """Processing information which is only decoded when it is accessed.
+
+    Parameters
+    ----------
+    encoded
+        The encoded processing information as read from disk.
+    decode
+        Function decoding an array of encoded processing information.
+    """
+
+    def __init__(self, encoded: xr.Variable, decode: typing.Callable[[np.ndarray], np.ndarray]):
+        self.encoded = encoded
+        self.decode = decode
+        self.shape = encoded.shape
+        self.dtype = np.dtype(object)
+
+    def __getitem__(self, key: indexing.ExplicitIndexer) -> np.ndarray:
+        return indexing.explicit_indexing_adapter(
+            key, self.shape, indexing.IndexingSupport.OUTER, self._getitem
+        )
+
+    def _getitem(self, key: tuple) -> np.ndarray:
+        return self.decode(np.asarray(self.encoded[key].to_numpy()))
+
+
 class DatasetDataFormatAccessor(_accessor_base.BaseDatasetAccessor):
     """MixIn class which provides functions for checking the data format and saving
     of Datasets.
@@ -139,34 +283,105 @@ class DatasetDataFormatAccessor(_accessor_base.BaseDatasetAccessor):
         else:
             entity_col = "entity"
 
-        dfs = []
-        entities = []
-        for x in dsd:
-            if isinstance(x, str) and x.startswith("Processing of "):
-                continue
-            entities.append(x)
-            df = (
-                dsd[x]
-                .to_dataset("time")
-                .to_dataframe()
-                .dropna(
-                    how="all",
-                    subset=time_cols,
+        # add attrs for additional coords
+        add_coords = list(set(self._ds.coords) - set(self._ds.dims))
+        additional_coordinates = {}
+        for coord in add_coords:
+            coords_current = set(self._ds.coords[coord].coords) - {coord}
+            if len(coords_current) != 1:
+                logger.error(
+                    f"Additional coordinate {coord!r} has more than one dimension, "
+                    f"which is not supported."
                 )
-                .reset_index()
-            )
-            df[entity_col] = x
-            df["unit"] = dsd[x].attrs.get("units", "no unit")
-            dfs.append(df)
+                raise ValueError(f"Additional coordinate {coord!r} has more than one dimension")
 
-        df = pd.concat(dfs, ignore_index=True)
+            additional_coordinates[coord] = next(iter(coords_current))
 
-        add_coords = list(set(self._ds.coords) - set(self._ds.dims))
-        df, dims = pm2io._data_reading.sort_columns_and_rows(
-            df,
-            dimensions=[dim for dim in dsd.dims if dim != "time"]
-            + [entity_col, "unit"]
-            + add_coords,
+        entities = [x for x in dsd if not (isinstance(x, str) and x.startswith("Processing of "))]
+        dims_sorted = pm2io._data_reading.sort_dimension_columns(
+            [dim for dim in dsd.dims if dim != "time"] + [entity_col, "unit"] + add_coords
+        )
+
+        # ranks of the values of each column, used to sort the rows without comparing
+        # the values of all rows
+        ranks = {dim: sort_ranks(dsd.indexes[dim]) for dim in dsd.dims if dim != "time"}
+        ranks[entity_col] = sort_ranks(entities)
+        units = [dsd[x].attrs.get("units", "no unit") for x in entities]
+        ranks["unit"] = sort_ranks(units)
+        for coord in add_coords:
+            ranks[coord] = sort_ranks(dsd[coord].values)
+        # missing values are sorted last
+        missing_rank = max(len(rank) for rank in ranks.values())
+
+        columns = {col: [] for col in dims_sorted}
+        columns_ranks = {col: [] for col in dims_sorted}
+        blocks = []
+        for i, x in enumerate(entities):
+            da = dsd[x]
+            other_dims = [dim for dim in da.dims if dim != "time"]
+            shape = [da.sizes[dim] for dim in other_dims]
+            # the data is handled time-major, which usually avoids copies
+            values = da.transpose("time", *other_dims).values.reshape((len(time_cols), -1))
+            # drop rows which only contain NaN
+            keep = ~pd.isna(values).all(axis=0)
+            blocks.append(values[:, keep])
+            n_rows = blocks[-1].shape[1]
+
+            # position along each dimension for each kept row
+            if other_dims:
+                all_positions = np.unravel_index(np.arange(values.shape[1]), shape)
+            else:
+                all_positions = ()
+            positions = {dim: pos[keep] for dim, pos in zip(other_dims, all_positions, strict=True)}
+
+            entity_columns = {
+                dim: dsd.indexes[dim].values.take(positions[dim]) for dim in other_dims
+            }
+            entity_ranks = {dim: ranks[dim][positions[dim]] for dim in other_dims}
+            for coord, coord_dim in additional_coordinates.items():
+                if coord_dim in positions:
+                    entity_columns[coord] = dsd[coord].values.take(positions[coord_dim])
+                    entity_ranks[coord] = ranks[coord][positions[coord_dim]]
+            entity_columns[entity_col] = np.full(n_rows, x, dtype=object)
+            entity_ranks[entity_col] = np.full(n_rows, ranks[entity_col][i])
+            entity_columns["unit"] = np.full(n_rows, units[i], dtype=object)
+            entity_ranks["unit"] = np.full(n_rows, ranks["unit"][i])
+
+            for col in dims_sorted:
+                if col in entity_columns:
+                    columns[col].append(entity_columns[col])
+                    columns_ranks[col].append(entity_ranks[col])
+                else:
+                    columns[col].append(np.full(n_rows, np.nan, dtype=object))
+                    columns_ranks[col].append(np.full(n_rows, missing_rank))
+
+        # sort the rows by the dimension columns in order
+        order = lexsort_ranks([np.concatenate(columns_ranks[col]) for col in dims_sorted])
+
+        # combine the data of entities with different dtypes like pandas.concat would
+        block_dtypes = {block.dtype for block in blocks}
+        if len(block_dtypes) == 1:
+            dtype = block_dtypes.pop()
+        elif all(dtype.kind in "iuf" for dtype in block_dtypes):
+            dtype = np.result_type(*block_dtypes)
+        else:
+            dtype = np.dtype(object)
+        values = np.concatenate([block.astype(dtype, copy=False) for block in blocks], axis=1)
+        time_order = np.argsort(time_cols)
+        if (np.diff(time_order) != 1).any():
+            values = values.take(time_order, axis=0)
+
+        df = pd.concat(
+            [
+                pd.DataFrame({col: np.concatenate(columns[col])[order] for col in dims_sorted}),
+                pd.DataFrame(
+                    # taking whole rows of the row-major transposed array is fastest
+                    values.T.take(order, axis=0),
+                    columns=[time_cols[i] for i in time_order],
+                ),
+            ],
+            axis=1,
+            copy=False,
         )
 
         dimensions = {}
@@ -185,19 +400,6 @@ class DatasetDataFormatAccessor(_accessor_base.BaseDatasetAccessor):
             entity: str(dsd[entity].dtype) for entity in entities if dsd[entity].dtype != float
         }
 
-        # add attrs for additional coords
-        additional_coordinates = {}
-        for coord in add_coords:
-            coords_current = set(self._ds.coords[coord].coords) - {coord}
-            if len(coords_current) != 1:
-                logger.error(
-                    f"Additional coordinate {coord!r} has more than one dimension, "
-                    f"which is not supported."
-                )
-                raise ValueError(f"Additional coordinate {coord!r} has more than one dimension")
-
-            additional_coordinates[coord] = next(iter(coords_current))
-
         df.attrs = {
             "attrs": self._ds.attrs,
             "time_format": time_format,
@@ -216,6 +418,7 @@ class DatasetDataFormatAccessor(_accessor_base.BaseDatasetAccessor):
         mode: str = "w",
         group: str | None = None,
         encoding: Mapping | None = None,
+        processing_info_encoding: typing.Literal["codes", "legacy"] = "codes",
     ) -> bytes | None:
         """Write dataset contents to a netCDF file.
 
@@ -241,17 +444,34 @@ class DatasetDataFormatAccessor(_accessor_base.BaseDatasetAccessor):
             ones ``{"compression": "gzip", "compression_opts": 9}``.
             This allows using any compression plugin installed in the HDF5
             library, e.g. LZF.
+        processing_info_encoding : {"codes", "legacy"}, default: "codes"
+            How to store processing information. With ``"codes"``, the unique
+            processing descriptions are stored in one additional variable and each
+            timeseries stores the index of its processing description. Files written
+            like this can't be read by primap2 versions before 0.12. With
+            ``"legacy"``, the processing description of each timeseries is serialized
+            separately like in earlier primap2 versions. This is slower and needs
+            more space, but can be read by all primap2 versions.
         """
+        if processing_info_encoding not in ("codes", "legacy"):
+            logger.error(f"Unknown processing_info_encoding {processing_info_encoding!r}.")
+            raise ValueError(f"Unknown processing_info_encoding {processing_info_encoding!r}.")
         ds = self._ds.pint.dequantify()
         if "publication_date" in ds.attrs:
             ds.attrs["publication_date"] = ds.attrs["publication_date"].isoformat()
-        for entity in ds:
+        for entity in list(ds):
             if (
                 isinstance(entity, str)
                 and entity.startswith("Processing of ")
                 and ds[entity].data.dtype == object
             ):
-                ds[entity].data = np.vectorize(lambda x: x.serialize())(ds[entity].data)
+                if processing_info_encoding == "legacy":
+                    ds[entity] = ds[entity].copy(
+                        data=np.vectorize(lambda x: x.serialize())(ds[entity].data)
+                    )
+                else:
+                    ds[entity], descriptions = encode_processing_info(ds[entity])
+                    ds[descriptions.name] = descriptions
         return ds.to_netcdf(
             path=path,
             mode=mode,
@@ -339,6 +559,31 @@ def split_var_name(var_name: str) -> tuple[str, str]:
     return entity[:-1], gwp_context[:-1]
 
 
+def sort_ranks(values: Iterable) -> np.ndarray:
+    """Rank of each value when sorting, with missing values ranked last."""
+    codes, uniques = pd.factorize(np.asarray(values, dtype=object), sort=True)
+    codes[codes == -1] = len(uniques)
+    return codes
+
+
+def lexsort_ranks(ranks: list[np.ndarray]) -> np.ndarray:
+    """Indices which sort rows by the given ranks, the first ranks being the primary key.
+
+    If possible, the ranks are combined into a single integer key, which is much faster
+    to sort than sorting by all ranks separately.
+    """
+    radixes = [int(rank.max(initial=0)) + 1 for rank in ranks]
+    if math.prod(radixes) > np.iinfo(np.int64).max:
+        # np.lexsort uses the last key as primary key
+        return np.lexsort(ranks[::-1])
+
+    key = np.zeros(len(ranks[0]) if ranks else 0, dtype=np.int64)
+    for rank, radix in zip(ranks, radixes, strict=True):
+        key *= radix
+        key += rank
+    return np.argsort(key, kind="stable")
+
+
 def ensure_no_dimension_without_coordinates(ds: xr.Dataset):
     for dim in ds.dims:
         if dim not in ds.coords:
@@ -690,3 +935,355 @@ class TimeseriesProcessingDescription:
         """
         ust = msgpack.unpackb(b, raw=False, use_list=False)
         return cls(steps=[ProcessingStepDescription.structure(x) for x in ust["steps"]])
+
+
+class LazyTimeseriesProcessingDescription(TimeseriesProcessingDescription):
+    """View of a single timeseries' processing description in a ProcessingDescriptionArray.
+
+    The steps are only created from the compact storage when they are accessed, so
+    a view is much smaller than a TimeseriesProcessingDescription. Otherwise, it
+    behaves like a TimeseriesProcessingDescription.
+    """
+
+    __slots__ = ("_array", "_index")
+
+    def __init__(self, array: "ProcessingDescriptionArray", index: int):
+        object.__setattr__(self, "_array", array)
+        object.__setattr__(self, "_index", index)
+
+    @property
+    def steps(self) -> list[ProcessingStepDescription]:
+        return self._array.steps(self._index)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, TimeseriesProcessingDescription):
+            return NotImplemented
+        return self.steps == other.steps
+
+    def __ne__(self, other: object) -> bool:
+        eq = self.__eq__(other)
+        return eq if eq is NotImplemented else not eq
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def __repr__(self) -> str:
+        return f"TimeseriesProcessingDescription(steps={self.steps!r})"
+
+    def __reduce__(self):
+        # send a plain TimeseriesProcessingDescription, not the whole array
+        return TimeseriesProcessingDescription, (self.steps,)
+
+
+@define(frozen=True)
+class ProcessingDescriptionArray:
+    """Compact, columnar storage of the processing descriptions of many timeseries.
+
+    Instead of one TimeseriesProcessingDescription object per timeseries with a list
+    of ProcessingStepDescription objects, all steps are stored in flat arrays. The
+    strings for functions, descriptions, and sources are stored only once in a table
+    of strings and referenced by integer codes, and the time points of the steps are
+    stored as bitmasks over all time points used in any step.
+
+    Use :py:meth:`from_objects` to create the compact storage from an array of
+    TimeseriesProcessingDescription objects, and :py:meth:`views` to get an array of
+    lightweight views for use as the data of a processing variable.
+
+    Attributes
+    ----------
+    shape
+        Shape of the original array of processing descriptions.
+    strings
+        Table of all strings used for functions, descriptions, and sources.
+    times
+        All time points used in any step, sorted.
+    offsets
+        The steps of the i-th timeseries (in C order) are the steps from
+        ``offsets[i]`` up to ``offsets[i + 1]``.
+    present
+        False for timeseries without a processing description.
+    function
+        Code of the function of each step in ``strings``.
+    description
+        Code of the description of each step in ``strings``.
+    source
+        Code of the source of each step in ``strings``, or -1 if it has no source.
+    time_all
+        True for steps which changed all time points.
+    time_mask
+        Bitmask of the time points of each step, packed using
+        :py:func:`numpy.packbits`.
+    """
+
+    shape: tuple[int, ...]
+    strings: tuple[str, ...]
+    times: np.ndarray
+    offsets: np.ndarray
+    present: np.ndarray
+    function: np.ndarray
+    description: np.ndarray
+    source: np.ndarray
+    time_all: np.ndarray
+    time_mask: np.ndarray
+
+    @classmethod
+    def from_objects(cls, data: np.ndarray) -> "ProcessingDescriptionArray":
+        """Create the compact storage from an array of processing descriptions.
+
+        Parameters
+        ----------
+        data
+            Array of TimeseriesProcessingDescription objects. Elements which are not
+            TimeseriesProcessingDescription objects (e.g. None) denote timeseries
+            without processing description.
+        """
+        data = np.asarray(data, dtype=object)
+        flat = data.ravel()
+
+        # fast path: views of a single compact array, e.g. as returned by compose
+        arrays = {
+            id(tpd._array): tpd._array
+            for tpd in flat
+            if isinstance(tpd, LazyTimeseriesProcessingDescription)
+        }
+        if len(arrays) == 1 and all(
+            tpd is None or isinstance(tpd, LazyTimeseriesProcessingDescription) for tpd in flat
+        ):
+            indices = np.array([-1 if tpd is None else tpd._index for tpd in flat], dtype=np.int64)
+            return next(iter(arrays.values())).take(indices.reshape(data.shape))
+
+        codes: dict[str, int] = {}
+        offsets = np.zeros(len(flat) + 1, dtype=np.int64)
+        present = np.zeros(len(flat), dtype=bool)
+        function = []
+        description = []
+        source = []
+        step_times = []
+        n_steps = 0
+        for i, tpd in enumerate(flat):
+            if isinstance(tpd, TimeseriesProcessingDescription):
+                present[i] = True
+                for step in tpd.steps:
+                    function.append(codes.setdefault(step.function, len(codes)))
+                    description.append(codes.setdefault(step.description, len(codes)))
+                    source.append(
+                        -1 if step.source is None else codes.setdefault(step.source, len(codes))
+                    )
+                    step_times.append(step.time)
+                    n_steps += 1
+            offsets[i + 1] = n_steps
+
+        time_all = np.array(
+            [isinstance(time, str) and time == "all" for time in step_times], dtype=bool
+        )
+        time_arrays = [
+            np.asarray(time)
+            for time, is_all in zip(step_times, time_all, strict=True)
+            if not is_all
+        ]
+        if time_arrays:
+            all_times = np.concatenate(time_arrays)
+        else:
+            all_times = np.array([], dtype="datetime64[ns]")
+        times = np.unique(all_times)
+        time_mask = np.zeros((n_steps, len(times)), dtype=bool)
+        if len(all_times):
+            step_ids = np.repeat(np.flatnonzero(~time_all), [len(time) for time in time_arrays])
+            time_mask[step_ids, np.searchsorted(times, all_times)] = True
+
+        return cls(
+            shape=data.shape,
+            strings=tuple(codes),
+            times=times,
+            offsets=offsets,
+            present=present,
+            function=np.array(function, dtype=np.int32),
+            description=np.array(description, dtype=np.int32),
+            source=np.array(source, dtype=np.int32),
+            time_all=time_all,
+            time_mask=np.packbits(time_mask, axis=1),
+        )
+
+    @classmethod
+    def from_bytes(cls, b: bytes) -> "ProcessingDescriptionArray":
+        """Parse from binary data as produced by "to_bytes".
+
+        Like for TimeseriesProcessingDescription.deserialize, the time points are
+        returned with a precision of years.
+        """
+        u = msgpack.unpackb(b, raw=False)
+        times = np.array(u["times"], dtype=np.datetime64)
+        time_all = np.frombuffer(u["time_all"], dtype=np.uint8).astype(bool)
+        return cls(
+            shape=tuple(u["shape"]),
+            strings=tuple(u["strings"]),
+            times=times,
+            offsets=np.frombuffer(u["offsets"], dtype="<i8").astype(np.int64),
+            present=np.frombuffer(u["present"], dtype=np.uint8).astype(bool),
+            function=np.frombuffer(u["function"], dtype="<i4").astype(np.int32),
+            description=np.frombuffer(u["description"], dtype="<i4").astype(np.int32),
+            source=np.frombuffer(u["source"], dtype="<i4").astype(np.int32),
+            time_all=time_all,
+            time_mask=np.frombuffer(u["time_mask"], dtype=np.uint8).reshape(
+                len(time_all), (len(times) + 7) // 8
+            ),
+        )
+
+    def to_bytes(self) -> bytes:
+        """Convert into binary data, e.g. for saving to disk.
+
+        Like for TimeseriesProcessingDescription.serialize, the time points are stored
+        with a precision of years.
+        """
+        return msgpack.packb(
+            {
+                "version": 1,
+                "shape": list(self.shape),
+                "strings": list(self.strings),
+                "times": list(np.datetime_as_string(self.times, unit="Y")),
+                "offsets": self.offsets.astype("<i8").tobytes(),
+                "present": self.present.astype(np.uint8).tobytes(),
+                "function": self.function.astype("<i4").tobytes(),
+                "description": self.description.astype("<i4").tobytes(),
+                "source": self.source.astype("<i4").tobytes(),
+                "time_all": self.time_all.astype(np.uint8).tobytes(),
+                "time_mask": np.ascontiguousarray(self.time_mask).tobytes(),
+            },
+            use_bin_type=True,
+        )
+
+    def __len__(self) -> int:
+        return len(self.present)
+
+    def take(self, indices: np.ndarray) -> "ProcessingDescriptionArray":
+        """New array with the processing descriptions at the given flat indices.
+
+        The shape of the result is the shape of indices. Indices of -1 denote
+        timeseries without processing description.
+        """
+        indices = np.asarray(indices, dtype=np.int64)
+        flat = indices.ravel()
+        missing = flat == -1
+        starts = self.offsets[np.where(missing, 0, flat)]
+        lengths = np.where(missing, 0, self.offsets[np.where(missing, 0, flat) + 1] - starts)
+        offsets = np.zeros(len(flat) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        step_index = np.repeat(starts - offsets[:-1], lengths) + np.arange(offsets[-1])
+        return ProcessingDescriptionArray(
+            shape=indices.shape,
+            strings=self.strings,
+            times=self.times,
+            offsets=offsets,
+            present=self.present[flat] & ~missing,
+            function=self.function[step_index],
+            description=self.description[step_index],
+            source=self.source[step_index],
+            time_all=self.time_all[step_index],
+            time_mask=self.time_mask[step_index],
+        )
+
+    def unique(self) -> tuple["ProcessingDescriptionArray", np.ndarray]:
+        """Find the unique processing descriptions.
+
+        Returns
+        -------
+            unique, codes. unique is a one-dimensional array of the unique processing
+            descriptions, codes is an integer array in the original shape with the
+            index of the processing description of each timeseries in unique, or -1
+            for timeseries without processing description.
+        """
+        # identify equal steps, using lexsort which is much faster than np.unique on
+        # the rows of a table
+        if self.time_mask.shape[1]:
+            mask_rows = np.ascontiguousarray(self.time_mask).view(
+                np.dtype((np.void, self.time_mask.shape[1]))
+            )
+            _, mask_ids = np.unique(mask_rows.ravel(), return_inverse=True)
+        else:
+            mask_ids = np.zeros(len(self.time_all), dtype=np.int64)
+        columns = np.stack(
+            [self.function, self.description, self.source, self.time_all, mask_ids.ravel()]
+        ).astype(np.int64)
+        order = np.lexsort(columns)
+        sorted_columns = columns[:, order]
+        new_step = np.ones(len(order), dtype=bool)
+        new_step[1:] = np.any(sorted_columns[:, 1:] != sorted_columns[:, :-1], axis=0)
+        step_ids = np.empty(len(order), dtype=np.int64)
+        step_ids[order] = np.cumsum(new_step) - 1
+
+        codes = np.full(len(self), -1, dtype=np.int32)
+        unique_codes: dict[bytes, int] = {}
+        representatives = []
+        for index in np.flatnonzero(self.present):
+            key = step_ids[self.offsets[index] : self.offsets[index + 1]].tobytes()
+            code = unique_codes.get(key)
+            if code is None:
+                code = unique_codes[key] = len(representatives)
+                representatives.append(index)
+            codes[index] = code
+        return self.take(np.array(representatives, dtype=np.int64)), codes.reshape(self.shape)
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate size of the compact storage in bytes."""
+        return sum(len(s) for s in self.strings) + sum(
+            arr.nbytes
+            for arr in (
+                self.times,
+                self.offsets,
+                self.present,
+                self.function,
+                self.description,
+                self.source,
+                self.time_all,
+                self.time_mask,
+            )
+        )
+
+    def step(self, step_index: int) -> ProcessingStepDescription:
+        """Create the processing step description of a single step."""
+        if self.time_all[step_index]:
+            time: np.ndarray | typing.Literal["all"] = "all"
+        else:
+            time = self.times[
+                np.unpackbits(self.time_mask[step_index], count=len(self.times)).astype(bool)
+            ]
+        source_code = self.source[step_index]
+        return ProcessingStepDescription(
+            time=time,
+            function=self.strings[self.function[step_index]],
+            description=self.strings[self.description[step_index]],
+            source=None if source_code == -1 else self.strings[source_code],
+        )
+
+    def steps(self, index: int) -> list[ProcessingStepDescription]:
+        """Create the processing step descriptions of the timeseries at the flat index."""
+        return [
+            self.step(step_index)
+            for step_index in range(self.offsets[index], self.offsets[index + 1])
+        ]
+
+    def __getitem__(self, index: int) -> TimeseriesProcessingDescription | None:
+        """Create the processing description of the timeseries at the flat index."""
+        if not self.present[index]:
+            return None
+        return TimeseriesProcessingDescription(steps=self.steps(index))
+
+    def views(self) -> np.ndarray:
+        """Array of lazy views of the processing descriptions in the original shape.
+
+        Timeseries without processing description are None.
+        """
+        result = np.empty(len(self), dtype=object)
+        for index in np.flatnonzero(self.present):
+            result[index] = LazyTimeseriesProcessingDescription(self, int(index))
+        return result.reshape(self.shape)
+
+    def to_objects(self) -> np.ndarray:
+        """Array of TimeseriesProcessingDescription objects in the original shape.
+
+        Timeseries without processing description are None.
+        """
+        result = np.empty(len(self), dtype=object)
+        for index in np.flatnonzero(self.present):
+            result[index] = self[index]
+        return result.reshape(self.shape)
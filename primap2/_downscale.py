@@ -52,6 +52,10 @@ class DataArrayDownscalingAccessor(BaseDataArrayAccessor):
           If for all points where the basket and all basket_contents are defined,
           it should be checked if the sum of the basket_contents actually equals
           the basket. A ``ValueError`` is raised if the consistency check fails.
+          Note that for dask-backed data the check is not lazy: the deviations are
+          computed (chunk by chunk) when this function is called, while the
+          downscaling itself stays lazy. Use ``check_consistency=False`` to avoid
+          computing any data.
         sel: Selection dict, optional
           If the downscaling should only be done on a subset of the Dataset while
           retaining all other values unchanged, give a selection dictionary. The
@@ -161,6 +165,10 @@ class DatasetDownscalingAccessor(BaseDatasetAccessor):
           If for all points where the basket and all basket_contents are defined,
           it should be checked if the sum of the basket_contents actually equals
           the basket. A ``ValueError`` is raised if the consistency check fails.
+          Note that for dask-backed data the check is not lazy: the deviations are
+          computed (chunk by chunk) when this function is called, while the
+          downscaling itself stays lazy. Use ``check_consistency=False`` to avoid
+          computing any data.
         sel: Selection dict, optional
           If the downscaling should only be done on a subset of the Dataset while
           retaining all other values unchanged, give a selection dictionary. The
@@ -216,12 +224,12 @@ class DatasetDownscalingAccessor(BaseDatasetAccessor):
 
         if check_consistency:
             deviation = abs(basket_ds / basket_sum - 1)
-            devmax = deviation.to_array().max()
+            devmax = float(deviation.to_array().max().pint.dequantify().data)
             if devmax > tolerance:
                 raise ValueError(
                     f"Sum of the basket_contents {basket_contents!r} deviates"
                     f" {devmax * 100} % from the basket"
-                    f" {basket!r}, which is more than the allowed 1 %. "
+                    f" {basket!r}, which is more than the allowed {tolerance * 100}%. "
                     "To continue regardless, set check_consistency=False."
                 )
 
@@ -277,6 +285,10 @@ class DatasetDownscalingAccessor(BaseDatasetAccessor):
           If for all points where the basket and all basket_contents are defined,
           it should be checked if the sum of the basket_contents actually equals
           the basket. A ``ValueError`` is raised if the consistency check fails.
+          Note that for dask-backed data the check is not lazy: the deviations are
+          computed (chunk by chunk) when this function is called, while the
+          downscaling itself stays lazy. Use ``check_consistency=False`` to avoid
+          computing any data.
         sel: Selection dict, optional
           If the downscaling should only be done on a subset of the Dataset while
           retaining all other values unchanged, give a selection dictionary. The
@@ -1,13 +1,20 @@
 """Merge arrays and datasets with optional tolerances."""
 
+import concurrent.futures
 import contextlib
+import functools
+import math
+from collections.abc import Hashable, Sequence
+from typing import NamedTuple
 
 import numpy as np
 import pandas as pd
 import xarray as xr
 from loguru import logger
+from xarray.core.merge import merge_attrs
 
-from ._accessor_base import BaseDataArrayAccessor, BaseDatasetAccessor
+from ._accessor_base import BaseDataArrayAccessor, BaseDatasetAccessor, is_chunked
+from ._units import ureg
 
 
 def merge_with_tolerance_core(
@@ -24,9 +31,11 @@ def merge_with_tolerance_core(
     treated as equal if the relative difference is below the tolerance threshold.
     The result will use the values present in da_start.
 
-    If a merge using xr.merge is not possible the function identifies the conflicting
-    values and checks if the relative difference is above the tolerance threshold.
-    If it is, an error is raised (if ``error_on_discrepancy = True``) or a warning is
+    The DataArrays are aligned only once: values which are present in both
+    DataArrays are compared on the intersection of the coordinates, and the result is
+    written directly into an array covering the union of the coordinates. If
+    the relative difference of conflicting values is above the tolerance threshold,
+    an error is raised (if ``error_on_discrepancy = True``) or a warning is
     logged (if ``error_on_discrepancy = False``).
 
     The function assumes DataArrays have been checked for identical coordinates
@@ -51,22 +60,231 @@ def merge_with_tolerance_core(
         merged : xr.DataArray
             DataArray with data from da_merge merged into da_start
     """
-    with contextlib.suppress(xr.MergeError):
-        da_result = xr.merge(
-            [da_start, da_merge],
-            compat="no_conflicts",
-            join="outer",
+    if is_chunked(da_start) or is_chunked(da_merge):
+        return merge_with_tolerance_xarray(
+            da_start=da_start,
+            da_merge=da_merge,
+            tolerance=tolerance,
+            error_on_discrepancy=error_on_discrepancy,
+        )
+
+    try:
+        alignment = align_for_merge(
+            da_start.coords.to_dataset(), da_merge.coords.to_dataset(), combine_attrs="override"
+        )
+        da_result, da_error = merge_aligned(
+            da_start=da_start, da_merge=da_merge, alignment=alignment, tolerance=tolerance
+        )
+    except (ValueError, KeyError, xr.MergeError, pd.errors.InvalidIndexError):
+        # coordinates which can't be aligned using their indexes, let xarray
+        # handle all special cases
+        return merge_with_tolerance_xarray(
+            da_start=da_start,
+            da_merge=da_merge,
+            tolerance=tolerance,
+            error_on_discrepancy=error_on_discrepancy,
+        )
+
+    if da_error is not None:
+        # there are differences larger than the tolerance
+        log_message = generate_log_message(da_error=da_error, tolerance=tolerance)
+        if error_on_discrepancy:
+            logger.error(log_message)
+            raise xr.MergeError(log_message)
+        else:
+            # log warning, continue with merging
+            logger.warning(log_message)
+
+    da_result.attrs = da_start.attrs
+    return da_result
+
+
+class MergeAlignment(NamedTuple):
+    """Alignment of two objects to merge, computed once for all variables."""
+
+    #: coordinates and attrs of the result
+    coords: xr.Dataset
+    #: for each dimension, the positions of the start values in the result
+    start_positions: dict[Hashable, np.ndarray]
+    #: for each dimension, the positions of the values to merge in the result
+    merge_positions: dict[Hashable, np.ndarray]
+    #: for each dimension, the positions of the values present in both objects in
+    #: the start object and the object to merge
+    overlap_start: dict[Hashable, np.ndarray]
+    overlap_merge: dict[Hashable, np.ndarray]
+
+
+def align_for_merge(
+    ds_start: xr.Dataset,
+    ds_merge: xr.Dataset,
+    *,
+    combine_attrs: xr.core.types.CombineAttrsOptions,
+) -> MergeAlignment:
+    """Align the coordinates of two Datasets to merge using their indexes.
+
+    Raises an error if the coordinates can't be aligned using their indexes, e.g.
+    because of duplicate index values or non-index coordinates with conflicting
+    values.
+    """
+    # aligns the coordinates, also the non-index coordinates, and combines attrs
+    coords = xr.merge(
+        [ds_start.drop_vars(ds_start.data_vars), ds_merge.drop_vars(ds_merge.data_vars)],
+        compat="no_conflicts",
+        join="outer",
+        combine_attrs=combine_attrs,
+    )
+    start_positions = {}
+    merge_positions = {}
+    overlap_start = {}
+    overlap_merge = {}
+    for dim in coords.dims:
+        index = coords.indexes[dim]
+        start_index = ds_start.indexes[dim]
+        merge_index = ds_merge.indexes[dim]
+        start_positions[dim] = index.get_indexer(start_index)
+        merge_positions[dim] = index.get_indexer(merge_index)
+        positions = start_index.get_indexer(merge_index)
+        in_both = positions >= 0
+        overlap_start[dim] = positions[in_both]
+        overlap_merge[dim] = np.nonzero(in_both)[0]
+    return MergeAlignment(
+        coords=coords,
+        start_positions=start_positions,
+        merge_positions=merge_positions,
+        overlap_start=overlap_start,
+        overlap_merge=overlap_merge,
+    )
+
+
+def merge_aligned(
+    *,
+    da_start: xr.DataArray | None,
+    da_merge: xr.DataArray | None,
+    alignment: MergeAlignment,
+    tolerance: float,
+) -> tuple[xr.DataArray, xr.DataArray | None]:
+    """Merge two aligned DataArrays, one of them can be None.
+
+    Values which are present in both DataArrays are compared on the intersection of
+    the coordinates only, and the result is written directly into an array
+    covering the union of the coordinates, using the values of da_start where
+    present.
+
+    Returns the merged DataArray without attrs and the relative deviations larger
+    than the tolerance, or None if there are none.
+    """
+    da_any = da_start if da_start is not None else da_merge
+    dims = da_any.dims
+    units = da_any.pint.units
+    if da_start is not None and da_merge is not None:
+        if (units is None) != (da_merge.pint.units is None) or set(dims) != set(da_merge.dims):
+            raise ValueError("Units or dimensions differ.")
+        if units is not None:
+            da_merge = da_merge.pint.to(units)
+
+    def magnitude(da: xr.DataArray) -> np.ndarray:
+        da = da.transpose(*dims)
+        return da.pint.magnitude if units is not None else da.to_numpy()
+
+    start = None if da_start is None else magnitude(da_start)
+    merge = None if da_merge is None else magnitude(da_merge)
+
+    da_error = None
+    if start is not None and merge is not None:
+        # compare the values present in both arrays
+        start_overlap = start[np.ix_(*(alignment.overlap_start[dim] for dim in dims))]
+        merge_overlap = merge[np.ix_(*(alignment.overlap_merge[dim] for dim in dims))]
+        conflict = (
+            ~pd.isnull(start_overlap) & ~pd.isnull(merge_overlap) & (start_overlap != merge_overlap)
         )
-        # all done as no errors occurred and thus no duplicates were present
-        # make sure we have a DataArray not a Dataset
-        return da_result[da_start.name]
-    # there are conflicts (overlapping coordinates) between da_start and da_merge
+        if conflict.any():
+            with np.errstate(divide="ignore", invalid="ignore"):
+                deviation = np.where(
+                    conflict, abs(start_overlap - merge_overlap) / start_overlap, np.nan
+                )
+            if (deviation > tolerance).any():
+                da_comp = xr.DataArray(
+                    deviation,
+                    dims=dims,
+                    coords={
+                        dim: da_start.indexes[dim][alignment.overlap_start[dim]] for dim in dims
+                    },
+                    name=da_start.name,
+                )
+                da_error = da_comp.where(da_comp > tolerance, drop=True)
+
+    # write the result, taking the values from da_start where present
+    shape = tuple(len(alignment.coords.indexes[dim]) for dim in dims)
+    arrays = [array for array in (start, merge) if array is not None]
+    dtype = np.result_type(*arrays)
+    if dtype.kind in "biu" and (merge is not None or shape != start.shape):
+        # missing values need NaN
+        dtype = np.dtype(np.float64)
+    result = np.full(shape, np.nan, dtype=dtype)
+    if start is not None:
+        result[np.ix_(*(alignment.start_positions[dim] for dim in dims))] = start
+    if merge is not None:
+        merge_block = np.ix_(*(alignment.merge_positions[dim] for dim in dims))
+        result_block = result[merge_block]
+        missing = pd.isnull(result_block)
+        result_block[missing] = merge[missing]
+        result[merge_block] = result_block
+
+    coords = {
+        name: coord
+        for name, coord in alignment.coords.coords.items()
+        if set(coord.dims).issubset(dims)
+    }
+    da_result = xr.DataArray(
+        result if units is None else ureg.Quantity(result, units),
+        dims=dims,
+        coords=coords,
+        name=da_any.name,
+    )
+    return da_result, da_error
+
+
+def merge_with_tolerance_xarray(
+    *,
+    da_start: xr.DataArray,
+    da_merge: xr.DataArray,
+    tolerance: float = 0.01,
+    error_on_discrepancy: bool = True,
+) -> xr.DataArray:
+    """Merge two DataArrays with a tolerance using xarray's alignment.
+
+    Like :py:func:`merge_with_tolerance_core`, but using xarray operations, which
+    also supports chunked data and coordinates which can't be aligned using their
+    indexes.
+    """
+    chunked = is_chunked(da_start) or is_chunked(da_merge)
+    if not chunked:
+        with contextlib.suppress(xr.MergeError):
+            da_result = xr.merge(
+                [da_start, da_merge],
+                compat="no_conflicts",
+                join="outer",
+            )
+            # all done as no errors occurred and thus no duplicates were present
+            # make sure we have a DataArray not a Dataset
+            return da_result[da_start.name]
+        # there are conflicts (overlapping coordinates) between da_start and da_merge
 
     # calculate the deviation between da_start and da_merge
     da_comp = abs(da_start - da_merge) / da_start
-    da_error = da_comp.where(da_comp > tolerance, drop=True)
+    if chunked:
+        # xr.merge would load the data to check for conflicts, instead only compute
+        # if there are discrepancies, which can be done chunk by chunk. Only if there
+        # are discrepancies, compute the details for the error message.
+        has_error = bool((da_comp > tolerance).any())
+        if has_error:
+            da_comp = da_comp.compute()
+            da_error = da_comp.where(da_comp > tolerance, drop=True)
+    else:
+        da_error = da_comp.where(da_comp > tolerance, drop=True)
+        has_error = bool(np.logical_not(da_error.isnull()).any())
 
-    if np.logical_not(da_error.isnull()).any():
+    if has_error:
         # there are differences larger than the tolerance
         log_message = generate_log_message(da_error=da_error, tolerance=tolerance)
         if error_on_discrepancy:
@@ -215,6 +433,81 @@ class DatasetMergeAccessor(BaseDatasetAccessor):
 
         ds_start = self._ds
 
+        if (
+            is_chunked(ds_start)
+            or is_chunked(ds_merge)
+            or set(ds_start.coords) != set(ds_merge.coords)
+            or set(ds_start.dims) != set(ds_merge.dims)
+        ):
+            return merge_datasets_xarray(
+                ds_start=ds_start,
+                ds_merge=ds_merge,
+                tolerance=tolerance,
+                error_on_discrepancy=error_on_discrepancy,
+                combine_attrs=combine_attrs,
+            )
+
+        try:
+            # align once for all variables
+            alignment = align_for_merge(ds_start, ds_merge, combine_attrs=combine_attrs)
+            data_vars = {}
+            errors = []
+            for var in [*ds_start.data_vars, *ds_merge.data_vars]:
+                if var in data_vars:
+                    continue
+                da_start = ds_start[var] if var in ds_start.data_vars else None
+                da_merge = ds_merge[var] if var in ds_merge.data_vars else None
+                da_result, da_error = merge_aligned(
+                    da_start=da_start,
+                    da_merge=da_merge,
+                    alignment=alignment,
+                    tolerance=tolerance,
+                )
+                if da_start is not None and da_merge is not None:
+                    da_result.attrs = merge_attrs([da_start.attrs, da_merge.attrs], combine_attrs)
+                else:
+                    da_result.attrs = (da_start if da_start is not None else da_merge).attrs
+                if da_error is not None:
+                    errors.append(generate_log_message(da_error=da_error, tolerance=tolerance))
+                data_vars[var] = da_result
+        except (ValueError, KeyError, xr.MergeError, pd.errors.InvalidIndexError):
+            # coordinates which can't be aligned using their indexes, let xarray
+            # handle all special cases
+            return merge_datasets_xarray(
+                ds_start=ds_start,
+                ds_merge=ds_merge,
+                tolerance=tolerance,
+                error_on_discrepancy=error_on_discrepancy,
+                combine_attrs=combine_attrs,
+            )
+
+        if errors:
+            # report the discrepancies for all variables at once
+            log_message = "\n".join(errors)
+            if error_on_discrepancy:
+                logger.error(log_message)
+                raise xr.MergeError(log_message)
+            else:
+                logger.warning(log_message)
+
+        return xr.Dataset(data_vars, coords=alignment.coords.coords, attrs=alignment.coords.attrs)
+
+
+def merge_datasets_xarray(
+    *,
+    ds_start: xr.Dataset,
+    ds_merge: xr.Dataset,
+    tolerance: float,
+    error_on_discrepancy: bool,
+    combine_attrs: xr.core.types.CombineAttrsOptions,
+) -> xr.Dataset:
+    """Merge two Datasets with a tolerance using xarray's alignment.
+
+    Like :py:meth:`xarray.Dataset.pr.merge`, but using xarray operations, which also
+    supports chunked data and coordinates which can't be aligned using their indexes.
+    """
+    if not (is_chunked(ds_start) or is_chunked(ds_merge)):
+        # for chunked data, xr.merge would load all data to check for conflicts
         with contextlib.suppress(xr.MergeError, ValueError):
             # if there are no conflicts just merge using xr.merge
             return xr.merge(
@@ -223,30 +516,245 @@ class DatasetMergeAccessor(BaseDatasetAccessor):
                 join="outer",
                 combine_attrs=combine_attrs,
             )
-        # merge by hand
-        ensure_compatible_coords_dims(ds_merge, ds_start)
-
-        vars_start = set(ds_start.data_vars)
-        vars_merge = set(ds_merge.data_vars)
-        vars_common = vars_start & vars_merge
-        vars_only_start = vars_start - vars_common
-        vars_only_merge = vars_merge - vars_common
-
-        # merge variables which are only in one dataset and therefore trivially
-        # mergeable
-        ds_result = xr.merge(
-            [ds_start[vars_only_start], ds_merge[vars_only_merge]],
+    # merge by hand
+    ensure_compatible_coords_dims(ds_merge, ds_start)
+
+    vars_start = set(ds_start.data_vars)
+    vars_merge = set(ds_merge.data_vars)
+    vars_common = vars_start & vars_merge
+    vars_only_start = vars_start - vars_common
+    vars_only_merge = vars_merge - vars_common
+
+    # merge potentially problematic variables which are in both datasets
+    merged = []
+    for var in vars_common:
+        logger.debug(f"merging for {var}")
+        merged.append(
+            merge_with_tolerance_xarray(
+                da_start=ds_start[var],
+                da_merge=ds_merge[var],
+                tolerance=tolerance,
+                error_on_discrepancy=error_on_discrepancy,
+            )
+        )
+
+    # merge variables which are only in one dataset and therefore trivially
+    # mergeable together with the merged variables
+    ds_result = xr.merge(
+        [ds_start[vars_only_start], ds_merge[vars_only_merge]],
+        combine_attrs=combine_attrs,
+    )
+    return xr.merge([ds_result, *merged], combine_attrs="override")
+
+
+def merge_many(
+    datasets: Sequence[xr.Dataset],
+    *,
+    tolerance: float = 0.01,
+    error_on_discrepancy: bool = True,
+    combine_attrs: xr.core.types.CombineAttrsOptions = "drop_conflicts",
+    n_workers: int | None = None,
+    executor: concurrent.futures.Executor | None = None,
+) -> xr.Dataset:
+    """Merge many Datasets with a tolerance for discrepancies in values present in several.
+
+    The result is the same as merging the datasets one after the other using
+    :py:meth:`xarray.Dataset.pr.merge`, i.e. values from earlier datasets take
+    precedence, and values from later datasets are compared against the values
+    merged so far. However, the union of the coordinates is computed only once and
+    each variable of the result is allocated only once and filled dataset by
+    dataset, which is much faster than merging pairwise when merging many datasets.
+    Discrepancies larger than the tolerance are reported for all datasets and
+    variables at once.
+
+    Parameters
+    ----------
+    datasets
+        The datasets to merge, in order of precedence.
+    tolerance: float (optional), default = 0.01
+        The tolerance to use when comparing data. Tolerance is relative to the values
+        merged so far. Thus, by default a 1% deviation of values in later datasets
+        from values in earlier datasets is tolerated.
+    error_on_discrepancy: (optional), default = True
+        If true throw an exception if false a warning and return values from
+        the earlier datasets in cases of conflict.
+    combine_attrs: (optional), default = "drop_conflicts"
+        Governs how to combine conflicting attrs. Is passed on to the xr merge
+        functions.
+    n_workers
+        If given and larger than 1, merge in parallel using a pool of n_workers
+        threads. The datasets are split into groups of consecutive datasets, the groups
+        are merged in parallel and the results are merged afterwards (a tree
+        reduction). The merged values are the same as when merging sequentially, but
+        values are only compared against values of earlier datasets in the same
+        group before the groups are merged, so the reported discrepancies can
+        differ, and if there are discrepancies in several groups only the first
+        is raised.
+    executor
+        Instead of n_workers, you can also supply your own
+        :py:class:`concurrent.futures.Executor` which is used to merge the groups
+        in parallel.
+
+    Returns
+    -------
+        merged
+            Dataset with the data of all datasets merged
+    """
+    if executor is not None and n_workers is not None:
+        raise ValueError("Only one of n_workers and executor can be given.")
+    if not datasets:
+        raise ValueError("No datasets to merge given.")
+    for ds in datasets:
+        if ds.pr.has_processing_info():
+            raise NotImplementedError(
+                "Dataset contains processing information, this is not supported yet. "
+                "Use ds.pr.remove_processing_info()."
+            )
+        ensure_compatible_coords_dims(datasets[0], ds)
+
+    if n_workers is not None and n_workers > 1:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=n_workers) as pool:
+            return merge_many(
+                datasets,
+                tolerance=tolerance,
+                error_on_discrepancy=error_on_discrepancy,
+                combine_attrs=combine_attrs,
+                executor=pool,
+            )
+    if executor is not None and len(datasets) > 2:
+        group_size = math.ceil(math.sqrt(len(datasets)))
+        futures = [
+            executor.submit(
+                merge_many,
+                datasets[i : i + group_size],
+                tolerance=tolerance,
+                error_on_discrepancy=error_on_discrepancy,
+                combine_attrs=combine_attrs,
+            )
+            for i in range(0, len(datasets), group_size)
+        ]
+        return merge_many(
+            [future.result() for future in futures],
+            tolerance=tolerance,
+            error_on_discrepancy=error_on_discrepancy,
             combine_attrs=combine_attrs,
         )
 
-        # merge potentially problematic variables which are in both datasets
-        for var in vars_common:
-            logger.debug(f"merging for {var}")
-            ds_result_new = merge_with_tolerance_core(
-                da_start=ds_start[var],
-                da_merge=ds_merge[var],
+    def merge_pairwise() -> xr.Dataset:
+        return functools.reduce(
+            lambda ds_start, ds_merge: ds_start.pr.merge(
+                ds_merge,
                 tolerance=tolerance,
                 error_on_discrepancy=error_on_discrepancy,
+                combine_attrs=combine_attrs,
+            ),
+            datasets,
+        )
+
+    if len(datasets) == 1:
+        return datasets[0].copy()
+    if any(is_chunked(ds) for ds in datasets):
+        return merge_pairwise()
+
+    try:
+        # compute the union of the coordinates once for all datasets and variables
+        coords = xr.merge(
+            [ds.drop_vars(ds.data_vars) for ds in datasets],
+            compat="no_conflicts",
+            join="outer",
+            combine_attrs=combine_attrs,
+        )
+        positions = [
+            {dim: coords.indexes[dim].get_indexer(ds.indexes[dim]) for dim in ds.dims}
+            for ds in datasets
+        ]
+        data_vars = {}
+        errors = []
+        for var in dict.fromkeys(var for ds in datasets for var in ds.data_vars):
+            sources = [
+                (ds[var], ds_positions)
+                for ds, ds_positions in zip(datasets, positions, strict=True)
+                if var in ds.data_vars
+            ]
+            data_vars[var] = merge_variable_many(
+                sources, coords=coords, tolerance=tolerance, errors=errors
             )
-            ds_result = xr.merge([ds_result, ds_result_new], combine_attrs="override")
-        return ds_result
+            data_vars[var].attrs = merge_attrs([da.attrs for da, _ in sources], combine_attrs)
+    except (ValueError, KeyError, xr.MergeError, pd.errors.InvalidIndexError):
+        # coordinates which can't be aligned using their indexes, let xarray
+        # handle all special cases
+        return merge_pairwise()
+
+    if errors:
+        # report the discrepancies for all variables at once
+        log_message = "\n".join(errors)
+        if error_on_discrepancy:
+            logger.error(log_message)
+            raise xr.MergeError(log_message)
+        else:
+            logger.warning(log_message)
+
+    return xr.Dataset(data_vars, coords=coords.coords, attrs=coords.attrs)
+
+
+def merge_variable_many(
+    sources: list[tuple[xr.DataArray, dict[Hashable, np.ndarray]]],
+    *,
+    coords: xr.Dataset,
+    tolerance: float,
+    errors: list[str],
+) -> xr.DataArray:
+    """Merge the data of a variable from many sources into the union coordinates.
+
+    The sources are the DataArrays together with the positions of their values in
+    the result for each dimension. A log message is appended to errors for each source
+    with discrepancies larger than the tolerance.
+    """
+    da_first = sources[0][0]
+    dims = da_first.dims
+    units = da_first.pint.units
+    arrays = []
+    for da, _ in sources:
+        if (units is None) != (da.pint.units is None) or set(dims) != set(da.dims):
+            raise ValueError("Units or dimensions differ.")
+        da = da.transpose(*dims)
+        arrays.append(da.to_numpy() if units is None else da.pint.to(units).pint.magnitude)
+
+    shape = tuple(len(coords.indexes[dim]) for dim in dims)
+    dtype = np.result_type(*arrays)
+    if dtype.kind in "biu":
+        # missing values need NaN
+        dtype = np.dtype(np.float64)
+    result = np.full(shape, np.nan, dtype=dtype)
+    for (da, positions), values in zip(sources, arrays, strict=True):
+        block_index = np.ix_(*(positions[dim] for dim in dims))
+        block = result[block_index]
+        present = ~pd.isnull(block)
+        conflict = present & ~pd.isnull(values) & (block != values)
+        if conflict.any():
+            with np.errstate(divide="ignore", invalid="ignore"):
+                deviation = np.where(conflict, abs(block - values) / block, np.nan)
+            if (deviation > tolerance).any():
+                da_comp = xr.DataArray(
+                    deviation,
+                    dims=dims,
+                    coords={dim: da.indexes[dim] for dim in dims},
+                    name=da.name,
+                )
+                errors.append(
+                    generate_log_message(
+                        da_error=da_comp.where(da_comp > tolerance, drop=True),
+                        tolerance=tolerance,
+                    )
+                )
+        block[~present] = values[~present]
+        result[block_index] = block
+
+    return xr.DataArray(
+        result if units is None else ureg.Quantity(result, units),
+        dims=dims,
+        coords={
+            name: coord for name, coord in coords.coords.items() if set(coord.dims).issubset(dims)
+        },
+        name=da_first.name,
+    )
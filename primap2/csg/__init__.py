@@ -5,7 +5,9 @@ Generate a composite harmonized dataset from multiple sources according to defin
 source priorities and matching algorithms.
 """
 
+from ._cache import ComposeCache
 from ._compose import compose
+from ._incremental import compose_incremental
 from ._models import (
     PriorityDefinition,
     StrategyDefinition,
@@ -16,6 +18,8 @@ from ._strategies.substitution import SubstitutionStrategy
 
 __all__ = [
     "compose",
+    "compose_incremental",
+    "ComposeCache",
     "PriorityDefinition",
     "StrategyDefinition",
     "SubstitutionStrategy",
@@ -0,0 +1,114 @@
+"""Caching of composed timeseries."""
+
+import hashlib
+import os
+import pathlib
+import tempfile
+import typing
+
+import msgpack
+import numpy as np
+
+from primap2._data_format import TimeseriesProcessingDescription
+
+
+def cache_key(*, data: np.ndarray, context: typing.Iterable[typing.Any]) -> str:
+    """Hash the input data of a timeseries and its context into a cache key.
+
+    The context has to contain everything else the result depends on, like the
+    coordinates of the data and the applicable priorities and strategies. Items of
+    the context are hashed using their repr, so they need a deterministic repr.
+    """
+    h = hashlib.sha256()
+    for item in context:
+        h.update(repr(item).encode())
+        h.update(b"\0")
+    h.update(data.dtype.str.encode())
+    h.update(repr(data.shape).encode())
+    h.update(np.ascontiguousarray(data).tobytes())
+    return h.hexdigest()
+
+
+class ComposeCache:
+    """Cache for the results of composing single timeseries.
+
+    Results are stored under a key which is a hash of the input data of the
+    timeseries, its coordinates, and the priorities and strategies applicable to the
+    timeseries. Therefore, when composing again after some input data changed, only
+    the timeseries which are affected by the changes are computed again. Because the
+    strategies are part of the key via their repr, strategies need a deterministic
+    repr for cached results to be found again in a new session. This is the case for
+    strategies defined using ``attrs``.
+
+    Parameters
+    ----------
+    path
+        If given, results are stored on disk in this directory, so that they are also
+        available in later sessions and in worker processes when composing in
+        parallel. Otherwise, results are stored in memory.
+
+    Attributes
+    ----------
+    hits
+        Number of results found in the cache.
+    misses
+        Number of results not found in the cache.
+    """
+
+    def __init__(self, path: pathlib.Path | str | None = None):
+        self.path = None if path is None else pathlib.Path(path)
+        if self.path is not None:
+            self.path.mkdir(parents=True, exist_ok=True)
+        self._memory: dict[str, tuple[np.ndarray, TimeseriesProcessingDescription]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def _file(self, key: str) -> pathlib.Path:
+        # use subdirectories to avoid too many files in one directory
+        return self.path / key[:2] / f"{key}.msgpack"
+
+    def get(self, key: str) -> tuple[np.ndarray, TimeseriesProcessingDescription] | None:
+        """Get the result data and processing description stored under the key.
+
+        Returns None if nothing is stored under the key.
+        """
+        if key in self._memory:
+            self.hits += 1
+            return self._memory[key]
+        if self.path is not None:
+            try:
+                packed = self._file(key).read_bytes()
+            except FileNotFoundError:
+                pass
+            else:
+                unpacked = msgpack.unpackb(packed, raw=False)
+                result = np.frombuffer(unpacked["result"], dtype=unpacked["dtype"]).copy()
+                processing = TimeseriesProcessingDescription.deserialize(unpacked["processing"])
+                self.hits += 1
+                return result, processing
+        self.misses += 1
+        return None
+
+    def set(
+        self, key: str, result: np.ndarray, processing: TimeseriesProcessingDescription
+    ) -> None:
+        """Store the result data and processing description under the key."""
+        if self.path is None:
+            self._memory[key] = result, processing
+        else:
+            file = self._file(key)
+            file.parent.mkdir(exist_ok=True)
+            packed = msgpack.packb(
+                {
+                    "result": np.ascontiguousarray(result).tobytes(),
+                    "dtype": result.dtype.str,
+                    "processing": processing.serialize(),
+                },
+                use_bin_type=True,
+            )
+            # write to a temporary file first so that concurrent readers never see
+            # partially written files
+            fd, tmp_name = tempfile.mkstemp(dir=file.parent, suffix=".tmp")
+            with os.fdopen(fd, "wb") as fp:
+                fp.write(packed)
+            os.replace(tmp_name, file)
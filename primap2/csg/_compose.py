@@ -1,7 +1,9 @@
 """Compose a harmonized dataset from multiple input datasets."""
 
+import concurrent.futures
 import contextlib
 import math
+import types
 import typing
 from collections.abc import Hashable
 
@@ -12,7 +14,7 @@ from loguru import logger
 
 import primap2._data_format
 
-from . import _models
+from . import _cache, _models
 from ._strategies.exceptions import StrategyUnableToProcess
 
 
@@ -22,6 +24,10 @@ def compose(
     priority_definition: _models.PriorityDefinition,
     strategy_definition: _models.StrategyDefinition,
     progress_bar: type[tqdm.tqdm] | None = tqdm.tqdm,
+    batched: bool = True,
+    n_workers: int | None = None,
+    executor: concurrent.futures.Executor | None = None,
+    cache: _cache.ComposeCache | None = None,
 ) -> xr.Dataset:
     """
     Compose a harmonized dataset from multiple input datasets.
@@ -80,6 +86,33 @@ def compose(
         By default, show progress bars using the tqdm package during the
         operation. If None, don't show any progress bars. You can supply a class
         compatible to tqdm.tqdm's protocol if you want to customize the progress bar.
+    batched
+        By default, all timeseries of a variable are composed at once using whole-array
+        operations, which is much faster for large datasets. Only timeseries which
+        need a filling strategy without a ``fill_many`` method or which use rules that
+        can not be evaluated in batch are composed one by one. The results are
+        identical to composing every timeseries one by one (apart from floating point
+        differences for strategies using numerical fits), which you can request by
+        setting ``batched=False``.
+    n_workers
+        If given and larger than 1, compose in parallel using a pool of n_workers
+        processes. The work is split by variable and by the values of the first
+        dimension of each variable which is not a priority dimension, and each of these
+        shards is composed in its own worker process. Note that the filling strategies
+        have to be picklable to be sent to the worker processes, so they have to be
+        defined at the top level of a module.
+    executor
+        Instead of n_workers, you can also supply your own
+        :py:class:`concurrent.futures.Executor` which is used to compose the shards
+        in parallel.
+    cache
+        If given, results for single timeseries are looked up in the cache before
+        computing them, and computed results are stored in the cache. The results are
+        stored under a hash of the input data of the timeseries and the rules which
+        apply to the timeseries, so when composing again after changing part of
+        the input data, only the affected timeseries are computed again. When composing
+        in parallel, use a cache which is stored on disk so that the worker processes
+        can share it.
 
     Returns
     -------
@@ -90,10 +123,24 @@ def compose(
             additional variables of the form "Processing of $variable" are added which
             describe the processing steps done for each timeseries.
     """
+    if executor is not None and n_workers is not None:
+        raise ValueError("Only one of n_workers and executor can be given.")
+    if n_workers is not None and n_workers > 1:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=n_workers) as pool:
+            return compose(
+                input_data=input_data,
+                priority_definition=priority_definition,
+                strategy_definition=strategy_definition,
+                progress_bar=progress_bar,
+                batched=batched,
+                executor=pool,
+                cache=cache,
+            )
+
     result_das = {}
     input_data = input_data.pr.dequantify()
 
-    if progress_bar is None:
+    if progress_bar is None or executor is not None:
         variable_iterator = input_data
     else:
         variable_iterator = progress_bar(input_data)
@@ -103,8 +150,9 @@ def compose(
 
     strategy_definition.check_dimensions(input_data)
 
+    shards = []
     for variable in variable_iterator:
-        if progress_bar is not None:
+        if progress_bar is not None and executor is None:
             variable_iterator.set_postfix_str(str(variable))
 
         input_da = input_data[variable]
@@ -125,6 +173,25 @@ def compose(
             priority_dimensions=priority_dimensions,
         )
 
+        limited_priority_definition = priority_definition.limit("entity", entity).limit(
+            "variable", variable
+        )
+        limited_strategy_definition = strategy_definition.limit("entity", entity).limit(
+            "variable", variable
+        )
+
+        if executor is not None:
+            shards += submit_shards(
+                executor=executor,
+                input_da=input_da,
+                priority_definition=limited_priority_definition,
+                strategy_definition=limited_strategy_definition,
+                group_by_dimensions=group_by_dimensions,
+                batched=batched,
+                cache=cache,
+            )
+            continue
+
         number_of_timeseries = math.prod(len(input_da[dim]) for dim in group_by_dimensions)
 
         if progress_bar is None:
@@ -132,22 +199,31 @@ def compose(
         else:
             pbar = progress_bar(total=number_of_timeseries, unit="ts", unit_scale=True)
 
-        iterate_next_fixed_dimension(
+        if batched:
+            compose_function = compose_variable_batched
+        else:
+            compose_function = iterate_next_fixed_dimension
+        compose_function(
             input_da=input_da,
-            priority_definition=priority_definition.limit("entity", entity).limit(
-                "variable", variable
-            ),
-            strategy_definition=strategy_definition.limit("entity", entity).limit(
-                "variable", variable
-            ),
+            priority_definition=limited_priority_definition,
+            strategy_definition=limited_strategy_definition,
             group_by_dimensions=group_by_dimensions,
             result_da=result_das[variable],
             result_processing_da=result_das[f"Processing of {variable}"],
             progress_bar=pbar,
+            cache=cache,
         )
         if pbar is not None:
             pbar.close()
 
+    if executor is not None:
+        collect_shards(shards=shards, result_das=result_das, progress_bar=progress_bar)
+
+    for name, da in result_das.items():
+        if isinstance(name, str) and name.startswith("Processing of "):
+            # store the processing descriptions compactly, they repeat a lot
+            da.data = primap2._data_format.ProcessingDescriptionArray.from_objects(da.data).views()
+
     result_ds = xr.Dataset(result_das).pr.quantify()
     # composing removes the priority dimensions, also remove the attrs describing
     # the priority dimensions
@@ -198,9 +274,124 @@ def preallocate_result_arrays(
     return result_da, processing_result_da
 
 
+class Shard(typing.NamedTuple):
+    """Part of a variable which is composed on its own, possibly in another process."""
+
+    variable: Hashable
+    index: slice | types.EllipsisType
+    number_of_timeseries: int
+    future: concurrent.futures.Future
+
+
+def submit_shards(
+    *,
+    executor: concurrent.futures.Executor,
+    input_da: xr.DataArray,
+    priority_definition: _models.PriorityDefinition,
+    strategy_definition: _models.StrategyDefinition,
+    group_by_dimensions: tuple[Hashable, ...],
+    batched: bool,
+    cache: _cache.ComposeCache | None,
+) -> list[Shard]:
+    """Split the variable along the first group-by dimension and submit the shards."""
+    if group_by_dimensions:
+        split_dimension = group_by_dimensions[0]
+        indices = [slice(i, i + 1) for i in range(input_da.sizes[split_dimension])]
+        shard_das = [input_da.isel({split_dimension: index}) for index in indices]
+    else:
+        indices = [...]
+        shard_das = [input_da]
+    number_of_timeseries = math.prod(len(input_da[dim]) for dim in group_by_dimensions[1:])
+    shards = []
+    for index, shard_da in zip(indices, shard_das, strict=True):
+        future = executor.submit(
+            compose_shard,
+            input_da=shard_da,
+            priority_definition=priority_definition,
+            strategy_definition=strategy_definition,
+            group_by_dimensions=group_by_dimensions,
+            batched=batched,
+            cache=cache,
+        )
+        shards.append(
+            Shard(
+                variable=input_da.name,
+                index=index,
+                number_of_timeseries=number_of_timeseries,
+                future=future,
+            )
+        )
+    return shards
+
+
+def compose_shard(
+    *,
+    input_da: xr.DataArray,
+    priority_definition: _models.PriorityDefinition,
+    strategy_definition: _models.StrategyDefinition,
+    group_by_dimensions: tuple[Hashable, ...],
+    batched: bool,
+    cache: _cache.ComposeCache | None,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Compose a shard of a variable, returns the result and processing data."""
+    result_da, result_processing_da = preallocate_result_arrays(
+        input_da=input_da,
+        group_by_dimensions=group_by_dimensions,
+        priority_dimensions=priority_definition.priority_dimensions,
+    )
+    if batched:
+        compose_function = compose_variable_batched
+    else:
+        compose_function = iterate_next_fixed_dimension
+    compose_function(
+        input_da=input_da,
+        priority_definition=priority_definition,
+        strategy_definition=strategy_definition,
+        group_by_dimensions=group_by_dimensions,
+        result_da=result_da,
+        result_processing_da=result_processing_da,
+        progress_bar=None,
+        cache=cache,
+    )
+    return result_da.data, result_processing_da.data
+
+
+def collect_shards(
+    *,
+    shards: list[Shard],
+    result_das: dict[Hashable, xr.DataArray],
+    progress_bar: type[tqdm.tqdm] | None,
+) -> None:
+    """Wait for the shards to finish and write their results into result_das."""
+    if progress_bar is None:
+        pbar = None
+    else:
+        pbar = progress_bar(
+            total=sum(shard.number_of_timeseries for shard in shards),
+            unit="ts",
+            unit_scale=True,
+        )
+    shards_by_future = {shard.future: shard for shard in shards}
+    for future in concurrent.futures.as_completed(shards_by_future):
+        shard = shards_by_future[future]
+        result, processing = future.result()
+        # the first group-by dimension is the first dimension of the processing
+        # variable and the second dimension of the result variable, after time
+        result_das[shard.variable].data[:, shard.index] = result
+        result_das[f"Processing of {shard.variable}"].data[shard.index] = processing
+        if pbar is not None:
+            pbar.update(shard.number_of_timeseries)
+    if pbar is not None:
+        pbar.close()
+
+
 def priority_coordinates_repr(*, fill_ts: xr.DataArray, priority_dimensions: list[Hashable]) -> str:
     """Reduce the priority coordinates to a short string representation."""
-    priority_coordinates: dict[str, str] = {str(k): fill_ts[k].item() for k in priority_dimensions}
+    return selection_repr({str(k): fill_ts[k].item() for k in priority_dimensions})
+
+
+def selection_repr(priority_coordinates: dict[str, typing.Any]) -> str:
+    """Short string representation of the priority coordinates of a timeseries."""
     if len(priority_coordinates) == 1:
         # only one priority dimension, just output the value because it is clear what is
         # meant
@@ -217,31 +408,61 @@ def iterate_next_fixed_dimension(
     result_da: xr.DataArray,
     result_processing_da: xr.DataArray,
     progress_bar: tqdm.tqdm | None,
+    priority_index: _models.SelectorIndex | None = None,
+    strategy_index: _models.SelectorIndex | None = None,
+    priority_matches: int | None = None,
+    strategy_matches: int | None = None,
+    cache: _cache.ComposeCache | None = None,
+    selection: dict[Hashable, typing.Any] | None = None,
 ) -> None:
     """Recursively iterate over dimensions in group_by_dimensions.
 
     If there is only one dimension left, actually compute results and store
     them in the result_da and the result_processing_da. Otherwise, iterate over one
     dimension and recursively call iterate_next_fixed_dimension again.
+
+    The priorities and strategies are limited to the values of the fixed dimensions
+    using precompiled selector indexes, which are created in the first call. In the
+    recursive calls, the bitsets of the priorities and strategies which match the
+    values of the dimensions already consumed are passed on in priority_matches and
+    strategy_matches, and the values themselves in selection.
     """
+    if selection is None:
+        selection = {}
+    if priority_index is None or strategy_index is None:
+        priority_index = priority_definition.index(group_by_dimensions)
+        strategy_index = strategy_definition.index(group_by_dimensions)
+        priority_matches = priority_index.all_selectors
+        strategy_matches = strategy_index.all_selectors
+
     my_dim = group_by_dimensions[0]
     new_group_by_dimensions = group_by_dimensions[1:]
     for val_array in input_da[my_dim]:
         val = val_array.item()
-        limited_strategy_definition = strategy_definition.limit(dim=my_dim, value=val)
-        limited_priority_definition = priority_definition.limit(dim=my_dim, value=val)
+        val_selection = {**selection, my_dim: val}
+        limited_priority_matches = priority_matches & priority_index.matching(my_dim, val)
+        limited_strategy_matches = strategy_matches & strategy_index.matching(my_dim, val)
         if new_group_by_dimensions:
             # have to iterate further until all dimensions are consumed
             iterate_next_fixed_dimension(
                 input_da=input_da.loc[{my_dim: val}],
-                priority_definition=limited_priority_definition,
-                strategy_definition=limited_strategy_definition,
+                priority_definition=priority_definition,
+                strategy_definition=strategy_definition,
                 group_by_dimensions=new_group_by_dimensions,
                 result_da=result_da.loc[{my_dim: val}],
                 result_processing_da=result_processing_da.loc[{my_dim: val}],
                 progress_bar=progress_bar,
+                priority_index=priority_index,
+                strategy_index=strategy_index,
+                priority_matches=limited_priority_matches,
+                strategy_matches=limited_strategy_matches,
+                cache=cache,
+                selection=val_selection,
             )
         else:
+            limited_priority_definition = priority_definition.limit_indexed(
+                priority_index, limited_priority_matches
+            )
             # Result exclusions are handled here (per definition, we don't do any
             # processing on result exclusions) but input data exclusions are handled
             # in compose_timeseries (per definition, we skip to the next source when
@@ -251,15 +472,514 @@ def iterate_next_fixed_dimension(
                 (
                     result_da.loc[{my_dim: val}],
                     result_processing_da.loc[{my_dim: val}],
-                ) = compose_timeseries(
+                ) = compose_timeseries_cached(
                     input_data=input_da.loc[{my_dim: val}],
                     priority_definition=limited_priority_definition,
-                    strategy_definition=limited_strategy_definition,
+                    strategy_definition=strategy_definition.limit_indexed(
+                        strategy_index, limited_strategy_matches
+                    ),
+                    cache=cache,
+                    selection=val_selection,
                 )
             if progress_bar is not None:
                 progress_bar.update()
 
 
+def compose_variable_batched(
+    *,
+    input_da: xr.DataArray,
+    priority_definition: _models.PriorityDefinition,
+    strategy_definition: _models.StrategyDefinition,
+    group_by_dimensions: tuple[Hashable, ...],
+    result_da: xr.DataArray,
+    result_processing_da: xr.DataArray,
+    progress_bar: tqdm.tqdm | None,
+    cache: _cache.ComposeCache | None = None,
+) -> None:
+    """Compose all timeseries of a variable at once using whole-array operations.
+
+    Instead of recursing into every single timeseries, the priorities, exclusions and
+    strategies are evaluated as boolean masks over all timeseries, and strategies
+    are applied to all timeseries which use them at once via their ``fill_many``
+    method. Timeseries which need a strategy without ``fill_many`` are composed one
+    by one using compose_timeseries. Variables using rules which can't be evaluated
+    as masks are composed using iterate_next_fixed_dimension.
+
+    The results are identical to the results of iterate_next_fixed_dimension, apart
+    from floating point differences for strategies which solve numerical fits
+    differently in ``fill_many`` and ``fill``.
+    """
+    if not can_batch(
+        input_da=input_da,
+        priority_definition=priority_definition,
+        strategy_definition=strategy_definition,
+        group_by_dimensions=group_by_dimensions,
+    ):
+        iterate_next_fixed_dimension(
+            input_da=input_da,
+            priority_definition=priority_definition,
+            strategy_definition=strategy_definition,
+            group_by_dimensions=group_by_dimensions,
+            result_da=result_da,
+            result_processing_da=result_processing_da,
+            progress_bar=progress_bar,
+            cache=cache,
+        )
+        return
+
+    priority_dimensions = priority_definition.priority_dimensions
+    masks = SelectorMasks(input_da=input_da, group_by_dimensions=group_by_dimensions)
+    n_ts = masks.number_of_timeseries
+    time = input_da["time"].to_numpy()
+    # time is the last axis so that each timeseries is one row after reshaping
+    data = input_da.transpose(*group_by_dimensions, *priority_dimensions, "time").to_numpy()
+
+    result_excluded = np.zeros(n_ts, dtype=bool)
+    for selector in priority_definition.exclude_result:
+        result_excluded |= masks.match(selector)
+
+    priority_selector_index = priority_definition.index(group_by_dimensions)
+    strategy_selector_index = strategy_definition.index(group_by_dimensions)
+
+    result = np.full((n_ts, len(time)), np.nan)
+    processing = np.empty(n_ts, dtype=object)
+    cached = np.zeros(n_ts, dtype=bool)
+    if cache is not None:
+        cache_keys = batch_cache_keys(
+            input_da=input_da,
+            data=data,
+            masks=masks,
+            rows=np.flatnonzero(~result_excluded),
+            priority_definition=priority_definition,
+            strategy_definition=strategy_definition,
+            priority_selector_index=priority_selector_index,
+            strategy_selector_index=strategy_selector_index,
+        )
+        for row, key in cache_keys.items():
+            cache_result = cache.get(key)
+            if cache_result is not None:
+                result[row], processing[row] = cache_result
+                cached[row] = True
+
+    # evaluate all rules for all priorities upfront
+    priorities = []
+    for selector in priority_definition.priorities:
+        try:
+            priority_index = tuple(
+                input_da.get_index(dim).get_loc(selector[dim]) for dim in priority_dimensions
+            )
+        except KeyError:
+            logger.debug(f"{selector=} matched no input_data, skipping.")
+            continue
+        priority_coordinates = {dim: selector[dim] for dim in priority_dimensions}
+
+        applicable = masks.match(selector, limit_semantics=True)
+        input_excluded = np.zeros(n_ts, dtype=bool)
+        for exclude_selector in priority_definition.exclude_input:
+            input_excluded |= masks.match(exclude_selector, scalars=priority_coordinates)
+        strategy_matches = np.array(
+            [
+                masks.match(strategy_selector, scalars=priority_coordinates)
+                for strategy_selector, _ in strategy_definition.strategies
+            ],
+            dtype=bool,
+        ).reshape(len(strategy_definition.strategies), n_ts)
+        priorities.append((priority_index, applicable, input_excluded, strategy_matches))
+
+    steps: list[list[primap2.ProcessingStepDescription]] = [[] for _ in range(n_ts)]
+    # timeseries which need processing by compose_timeseries, e.g. because they
+    # need a strategy without fill_many
+    fallback = np.zeros(n_ts, dtype=bool)
+    started = np.zeros(n_ts, dtype=bool)
+    done = result_excluded | cached
+    for priority_index, applicable, input_excluded, strategy_matches in priorities:
+        rows = np.flatnonzero(applicable & ~done)
+        if not rows.size:
+            continue
+        started[rows] = True
+
+        priority_ts = input_da.isel(dict(zip(priority_dimensions, priority_index, strict=True)))
+        fill_ts_repr = priority_coordinates_repr(
+            fill_ts=priority_ts, priority_dimensions=priority_dimensions
+        )
+        fill_ts = data[(slice(None),) * len(group_by_dimensions) + priority_index].reshape(
+            n_ts, len(time)
+        )[rows]
+
+        excluded = input_excluded[rows]
+        excluded_step = primap2.ProcessingStepDescription(
+            time="all",
+            description=f"{fill_ts_repr} is excluded from processing, skipped",
+            function="compose_timeseries",
+            source=fill_ts_repr,
+        )
+        for row in rows[excluded]:
+            steps[row].append(excluded_step)
+        rows = rows[~excluded]
+        fill_ts = fill_ts[~excluded]
+
+        all_nan = np.isnan(fill_ts).all(axis=1)
+        all_nan_step = primap2.ProcessingStepDescription(
+            time="all",
+            description=f"{fill_ts_repr} is fully NaN, skipped",
+            function="compose_timeseries",
+            source=fill_ts_repr,
+        )
+        for row in rows[all_nan]:
+            steps[row].append(all_nan_step)
+        rows = rows[~all_nan]
+        fill_ts = fill_ts[~all_nan]
+
+        logger.debug(f"Filling {len(rows)} timeseries with {fill_ts_repr} now.")
+        pending = np.ones(len(rows), dtype=bool)
+        for (_, strategy), strategy_match in zip(
+            strategy_definition.strategies, strategy_matches, strict=True
+        ):
+            strategy_mask = pending & strategy_match[rows]
+            if not strategy_mask.any():
+                continue
+            strategy_rows = rows[strategy_mask]
+            if not hasattr(strategy, "fill_many"):
+                fallback[strategy_rows] = True
+                done[strategy_rows] = True
+                pending[strategy_mask] = False
+                continue
+
+            filled_ts, descriptions, unable = strategy.fill_many(
+                ts=result[strategy_rows],
+                fill_ts=fill_ts[strategy_mask],
+                time=time,
+                fill_ts_repr=fill_ts_repr,
+            )
+            unable_step = primap2.ProcessingStepDescription(
+                time="all",
+                description=f"strategy {strategy.type} unable to process "
+                f"{fill_ts_repr}, skipping to next strategy",
+                function="compose_timeseries",
+                source=fill_ts_repr,
+            )
+            for row, row_descriptions, row_unable in zip(
+                strategy_rows, descriptions, unable, strict=True
+            ):
+                if row_unable:
+                    steps[row].append(unable_step)
+                else:
+                    steps[row] += row_descriptions
+            filled_rows = strategy_rows[~unable]
+            result[filled_rows] = filled_ts[~unable]
+            done[filled_rows] = ~np.isnan(filled_ts[~unable]).any(axis=1)
+            # timeseries which could not be processed continue with the next strategy
+            pending[strategy_mask] = unable
+
+        # no configured strategy was able to process, compose_timeseries raises an error
+        fallback[rows[pending]] = True
+        done[rows[pending]] = True
+
+    # no priority selector matched, compose_timeseries raises an error
+    fallback |= ~started & ~result_excluded & ~cached
+
+    for row in np.flatnonzero(~result_excluded & ~fallback & ~cached):
+        processing[row] = primap2._data_format.TimeseriesProcessingDescription(steps=steps[row])
+    if progress_bar is not None:
+        progress_bar.update(n_ts - fallback.sum())
+
+    for row in np.flatnonzero(fallback):
+        priority_matches, strategy_matches = selector_matches(
+            selection=masks.selection(row),
+            priority_selector_index=priority_selector_index,
+            strategy_selector_index=strategy_selector_index,
+        )
+        result_ts, processing[row] = compose_timeseries(
+            input_data=input_da.loc[masks.selection(row)],
+            priority_definition=priority_definition.limit_indexed(
+                priority_selector_index, priority_matches
+            ),
+            strategy_definition=strategy_definition.limit_indexed(
+                strategy_selector_index, strategy_matches
+            ),
+        )
+        result[row] = result_ts.transpose("time").to_numpy()
+        if progress_bar is not None:
+            progress_bar.update()
+
+    if cache is not None:
+        for row in np.flatnonzero(~result_excluded & ~cached):
+            cache.set(cache_keys[row], result[row].copy(), processing[row])
+
+    shape = tuple(input_da.sizes[dim] for dim in group_by_dimensions)
+    result_da.values = result.transpose().reshape((len(time), *shape))
+    result_processing_da.values = processing.reshape(shape)
+
+
+def selector_matches(
+    *,
+    selection: dict[Hashable, typing.Any],
+    priority_selector_index: _models.SelectorIndex,
+    strategy_selector_index: _models.SelectorIndex,
+) -> tuple[int, int]:
+    """Bitsets of the priorities and strategies matching the fixed coordinates."""
+    priority_matches = priority_selector_index.all_selectors
+    strategy_matches = strategy_selector_index.all_selectors
+    for dim, value in selection.items():
+        priority_matches &= priority_selector_index.matching(dim, value)
+        strategy_matches &= strategy_selector_index.matching(dim, value)
+    return priority_matches, strategy_matches
+
+
+def batch_cache_keys(
+    *,
+    input_da: xr.DataArray,
+    data: np.ndarray,
+    masks: "SelectorMasks",
+    rows: np.ndarray,
+    priority_definition: _models.PriorityDefinition,
+    strategy_definition: _models.StrategyDefinition,
+    priority_selector_index: _models.SelectorIndex,
+    strategy_selector_index: _models.SelectorIndex,
+) -> dict[int, str]:
+    """Compute the cache keys for the given timeseries of a variable.
+
+    The key of a timeseries is computed from its input data, its fixed coordinates and
+    the priorities and strategies applicable to it.
+    """
+    rows_data = data.reshape(masks.number_of_timeseries, -1)
+    variable_context = variable_cache_context(
+        input_da=input_da, priority_dimensions=priority_definition.priority_dimensions
+    )
+    definitions_context: dict[tuple[int, int], str] = {}
+    keys = {}
+    for row in rows:
+        selection = masks.selection(row)
+        matches = selector_matches(
+            selection=selection,
+            priority_selector_index=priority_selector_index,
+            strategy_selector_index=strategy_selector_index,
+        )
+        if matches not in definitions_context:
+            definitions_context[matches] = repr(
+                (
+                    priority_definition.limit_indexed(priority_selector_index, matches[0]),
+                    strategy_definition.limit_indexed(strategy_selector_index, matches[1]),
+                )
+            )
+        keys[row] = timeseries_cache_key(
+            data=rows_data[row],
+            variable_context=variable_context,
+            selection=selection,
+            definitions_context=definitions_context[matches],
+        )
+    return keys
+
+
+def variable_cache_context(
+    *, input_da: xr.DataArray, priority_dimensions: tuple[Hashable, ...]
+) -> str:
+    """Hash everything about a variable which is shared by all of its timeseries.
+
+    This includes the name and entity of the variable and the coordinates of the
+    priority dimensions and the time, but not the fixed coordinates of single
+    timeseries.
+    """
+    return _cache.cache_key(
+        data=np.empty(0),
+        context=(
+            input_da.name,
+            input_da.attrs.get("entity"),
+            (*priority_dimensions, "time"),
+            {dim: input_da[dim].to_numpy().tolist() for dim in priority_dimensions},
+            input_da["time"].to_numpy().tolist(),
+        ),
+    )
+
+
+def timeseries_cache_key(
+    *,
+    data: np.ndarray,
+    variable_context: str,
+    selection: dict[Hashable, typing.Any],
+    definitions_context: str,
+) -> str:
+    """Compute the cache key of a single timeseries.
+
+    Used for composing in batches and for composing single timeseries, so that
+    results can be shared between both.
+
+    Parameters
+    ----------
+    data
+        The input data of the timeseries, with the priority dimensions first and the
+        time last.
+    variable_context
+        The context of the variable, see variable_cache_context.
+    selection
+        The fixed coordinates of the timeseries.
+    definitions_context
+        The repr of the priority definition and strategy definition limited to the
+        timeseries.
+    """
+    return _cache.cache_key(
+        data=data.ravel(),
+        context=(
+            variable_context,
+            sorted((str(dim), value) for dim, value in selection.items()),
+            definitions_context,
+        ),
+    )
+
+
+def can_batch(
+    *,
+    input_da: xr.DataArray,
+    priority_definition: _models.PriorityDefinition,
+    strategy_definition: _models.StrategyDefinition,
+    group_by_dimensions: tuple[Hashable, ...],
+) -> bool:
+    """Check if all rules for the variable can be evaluated in batch."""
+    priority_dimensions = set(priority_definition.priority_dimensions)
+    fixed_dimensions = set(group_by_dimensions)
+    if (
+        not group_by_dimensions
+        or input_da.dtype.kind != "f"
+        or not priority_dimensions.issubset(input_da.dims)
+        or not all(input_da.get_index(dim).is_unique for dim in input_da.dims)
+    ):
+        return False
+    allowed_keys = [
+        (priority_definition.priorities, priority_dimensions | fixed_dimensions),
+        (
+            priority_definition.exclude_input,
+            priority_dimensions | fixed_dimensions | {"entity", "variable"},
+        ),
+        (priority_definition.exclude_result, fixed_dimensions | {"entity", "variable"}),
+        (
+            [selector for selector, _ in strategy_definition.strategies],
+            priority_dimensions | fixed_dimensions,
+        ),
+    ]
+    return all(
+        set(selector).issubset(keys) for selectors, keys in allowed_keys for selector in selectors
+    )
+
+
+class SelectorMasks:
+    """Evaluate selectors for all timeseries of a DataArray at once.
+
+    The timeseries are numbered in the order of the group-by dimensions, like in
+    a C-ordered array.
+    """
+
+    def __init__(self, *, input_da: xr.DataArray, group_by_dimensions: tuple[Hashable, ...]):
+        self.input_da = input_da
+        shape = tuple(input_da.sizes[dim] for dim in group_by_dimensions)
+        self.number_of_timeseries = math.prod(shape)
+        self.values = {dim: input_da[dim].to_numpy().tolist() for dim in group_by_dimensions}
+        self.indices = dict(
+            zip(
+                group_by_dimensions,
+                np.unravel_index(np.arange(self.number_of_timeseries), shape),
+                strict=True,
+            )
+        )
+
+    def match(
+        self,
+        selector: dict[Hashable, typing.Any],
+        *,
+        scalars: dict[Hashable, typing.Any] | None = None,
+        limit_semantics: bool = False,
+    ) -> np.ndarray:
+        """Boolean mask of the timeseries matching the selector.
+
+        Keys which are not group-by dimensions are looked up in scalars or are
+        "entity" or "variable". With limit_semantics, values are evaluated like in
+        PriorityDefinition.limit (supporting primap2.Not), otherwise like in
+        match_selector.
+        """
+        if scalars is None:
+            scalars = {}
+        mask = np.ones(self.number_of_timeseries, dtype=bool)
+        for key, selector_value in selector.items():
+            if key in self.indices:
+                dim_mask = np.array(
+                    [
+                        self._match_value(value, selector_value, limit_semantics)
+                        for value in self.values[key]
+                    ],
+                    dtype=bool,
+                )
+                mask &= dim_mask[self.indices[key]]
+            elif key in scalars:
+                if not self._match_value(scalars[key], selector_value, limit_semantics):
+                    mask[:] = False
+            elif key == "entity":
+                if not _models.equal_or_in(self.input_da.attrs["entity"], selector_value):
+                    mask[:] = False
+            elif key == "variable":
+                if not _models.equal_or_in(self.input_da.name, selector_value):
+                    mask[:] = False
+        return mask
+
+    @staticmethod
+    def _match_value(value: typing.Any, selector_value: typing.Any, limit_semantics: bool) -> bool:
+        if limit_semantics and isinstance(selector_value, primap2.Not):
+            return not _models.equal_or_in(value, selector_value.value)
+        return _models.equal_or_in(value, selector_value)
+
+    def selection(self, row: int) -> dict[Hashable, typing.Any]:
+        """The coordinates of the timeseries with the given number."""
+        return {dim: self.values[dim][indices[row]] for dim, indices in self.indices.items()}
+
+
+def compose_timeseries_cached(
+    *,
+    input_data: xr.DataArray,
+    priority_definition: _models.PriorityDefinition,
+    strategy_definition: _models.StrategyDefinition,
+    cache: _cache.ComposeCache | None,
+    selection: dict[Hashable, typing.Any],
+) -> tuple[xr.DataArray, primap2._data_format.TimeseriesProcessingDescription]:
+    """Like compose_timeseries, but look up the result in the cache first.
+
+    If cache is None, this is the same as compose_timeseries. The selection contains
+    the fixed coordinates of the timeseries and is used for the cache key.
+    """
+    if cache is None:
+        return compose_timeseries(
+            input_data=input_data,
+            priority_definition=priority_definition,
+            strategy_definition=strategy_definition,
+        )
+
+    priority_dimensions = priority_definition.priority_dimensions
+    key = timeseries_cache_key(
+        data=input_data.transpose(*priority_dimensions, "time").to_numpy(),
+        variable_context=variable_cache_context(
+            input_da=input_data, priority_dimensions=priority_dimensions
+        ),
+        selection=selection,
+        definitions_context=repr((priority_definition, strategy_definition)),
+    )
+    cache_result = cache.get(key)
+    if cache_result is not None:
+        result, processing = cache_result
+        result_ts = xr.DataArray(
+            result,
+            dims=["time"],
+            coords={"time": input_data["time"]},
+            name=input_data.name,
+            attrs=input_data.attrs,
+        )
+        return result_ts, processing
+
+    result_ts, processing = compose_timeseries(
+        input_data=input_data,
+        priority_definition=priority_definition,
+        strategy_definition=strategy_definition,
+    )
+    cache.set(key, result_ts.transpose("time").to_numpy(), processing)
+    return result_ts, processing
+
+
 def compose_timeseries(
     *,
     input_data: xr.DataArray,
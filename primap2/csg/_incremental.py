@@ -0,0 +1,209 @@
+"""Update an existing composed dataset after parts of the input data changed."""
+
+import itertools
+import typing
+from collections.abc import Hashable
+
+import numpy as np
+import tqdm
+import xarray as xr
+from loguru import logger
+
+import primap2
+
+from . import _models
+from ._compose import compose, selection_repr
+
+
+def compose_incremental(
+    *,
+    previous_result: xr.Dataset,
+    input_data: xr.Dataset,
+    changed_selection: dict[Hashable, str | list[str]],
+    priority_definition: _models.PriorityDefinition,
+    strategy_definition: _models.StrategyDefinition,
+    progress_bar: type[tqdm.tqdm] | None = tqdm.tqdm,
+    batched: bool = True,
+) -> xr.Dataset:
+    """
+    Update a composed dataset after parts of the input data changed.
+
+    Only the timeseries which depend on the changed input data are composed again,
+    all other timeseries are taken from the previous result. A timeseries of the
+    result depends on a timeseries of the input data if the input timeseries was used
+    (or skipped because it was excluded or fully NaN) while composing it, which is
+    read from the processing descriptions stored in the "Processing of $variable"
+    variables of the previous result.
+
+    Parameters
+    ----------
+    previous_result
+        Result of :py:func:`primap2.csg.compose` for the input data before the change.
+    input_data
+        The changed input data. The input data must have the same variables and
+        coordinates as the input data used to compute the previous result, only the
+        data values may differ. Variables which are not in the previous result yet are
+        composed completely.
+    changed_selection
+        Selection of the changed input data. Like in the priority definition, the
+        selection can use any dimension of the input data as well as "entity" and
+        "variable". Values are either a single value or a list of values. Timeseries
+        of variables which don't have all dimensions used in the selection are
+        considered unchanged. The "time" is ignored, if any data of a timeseries
+        changed, the full timeseries is considered to be changed.
+    priority_definition
+        The priority definition used to compute the previous result. Changing the
+        priorities is not supported, in that case use :py:func:`primap2.csg.compose`.
+    strategy_definition
+        The strategy definition used to compute the previous result.
+    progress_bar
+        By default, show progress bars using the tqdm package during the
+        operation. If None, don't show any progress bars.
+    batched
+        Compose all changed timeseries of a variable at once, see
+        :py:func:`primap2.csg.compose`.
+
+    Returns
+    -------
+        result
+            The previous result, with the changed timeseries and their processing
+            descriptions updated. The previous result is not modified.
+    """
+    priority_dimensions = priority_definition.priority_dimensions
+    result_ds = previous_result.copy()
+
+    for variable in input_data.data_vars:
+        input_da = input_data[variable]
+        processing_variable = f"Processing of {variable}"
+        if not selection_matches_variable(
+            changed_selection=changed_selection,
+            variable=variable,
+            entity=input_da.attrs["entity"],
+            dims=input_da.dims,
+        ):
+            continue
+
+        if variable not in previous_result:
+            logger.debug(f"{variable} not in previous result, composing it completely.")
+            composed = compose(
+                input_data=input_data[[variable]],
+                priority_definition=priority_definition,
+                strategy_definition=strategy_definition,
+                progress_bar=progress_bar,
+                batched=batched,
+            )
+            result_ds[variable] = composed[variable]
+            result_ds[processing_variable] = composed[processing_variable]
+            continue
+
+        group_by_dimensions = tuple(
+            dim for dim in input_da.dims if dim != "time" and dim not in priority_dimensions
+        )
+        previous_processing = previous_result[processing_variable]
+        for dim in group_by_dimensions:
+            if not np.array_equal(input_da[dim].to_numpy(), previous_processing[dim].to_numpy()):
+                raise ValueError(
+                    f"Coordinates of {dim!r} of {variable!r} differ between the input data"
+                    f" and the previous result, compose the full dataset instead."
+                )
+
+        affected = affected_timeseries(
+            input_da=input_da,
+            previous_processing=previous_processing,
+            changed_selection=changed_selection,
+            priority_dimensions=priority_dimensions,
+        )
+        n_affected = int(affected.sum())
+        logger.debug(f"Composing {n_affected} changed timeseries of {variable}.")
+        if n_affected == 0:
+            continue
+
+        # compose the smallest block of timeseries containing all affected timeseries.
+        # The unaffected timeseries in the block will have the same result as before.
+        block = {
+            dim: affected[dim].to_numpy()[
+                affected.any([other for other in affected.dims if other != dim]).to_numpy()
+            ]
+            for dim in affected.dims
+        }
+        composed = compose(
+            input_data=input_data[[variable]].loc[block],
+            priority_definition=priority_definition,
+            strategy_definition=strategy_definition,
+            progress_bar=progress_bar,
+            batched=batched,
+        )
+        result_da = previous_result[variable].copy(deep=True)
+        result_da.loc[block] = composed[variable].transpose(*result_da.dims)
+        result_ds[variable] = result_da
+        result_processing_da = previous_processing.copy(deep=True)
+        result_processing_da.loc[block] = composed[processing_variable].transpose(
+            *result_processing_da.dims
+        )
+        result_processing_da.data = primap2._data_format.ProcessingDescriptionArray.from_objects(
+            result_processing_da.data
+        ).views()
+        result_ds[processing_variable] = result_processing_da
+
+    return result_ds
+
+
+def selection_matches_variable(
+    *,
+    changed_selection: dict[Hashable, str | list[str]],
+    variable: Hashable,
+    entity: str,
+    dims: typing.Iterable[Hashable],
+) -> bool:
+    """Check if the changed selection can match timeseries of the variable."""
+    dims = set(dims)
+    for key, value in changed_selection.items():
+        if key == "entity":
+            if not _models.equal_or_in(entity, value):
+                return False
+        elif key == "variable":
+            if not _models.equal_or_in(variable, value):
+                return False
+        elif key != "time" and key not in dims:
+            return False
+    return True
+
+
+def affected_timeseries(
+    *,
+    input_da: xr.DataArray,
+    previous_processing: xr.DataArray,
+    changed_selection: dict[Hashable, str | list[str]],
+    priority_dimensions: list[Hashable],
+) -> xr.DataArray:
+    """Determine the timeseries of the result which depend on the changed input data.
+
+    Returns a boolean array with the dimensions of the processing descriptions.
+    """
+    affected = xr.ones_like(previous_processing, dtype=bool)
+    for dim, value in changed_selection.items():
+        if dim in previous_processing.dims:
+            values = [value] if isinstance(value, str) else value
+            affected &= previous_processing[dim].isin(values)
+
+    # all sources of the changed input data as they are named in the processing
+    # descriptions
+    priority_values = []
+    for dim in priority_dimensions:
+        values = input_da[dim].to_numpy().tolist()
+        if dim in changed_selection:
+            values = [v for v in values if _models.equal_or_in(v, changed_selection[dim])]
+        priority_values.append(values)
+    changed_sources = {
+        selection_repr(dict(zip(map(str, priority_dimensions), combination, strict=True)))
+        for combination in itertools.product(*priority_values)
+    }
+
+    def uses_changed_source(processing: typing.Any) -> bool:
+        if not isinstance(processing, primap2.TimeseriesProcessingDescription):
+            # excluded from the result
+            return False
+        return any(step.source in changed_sources for step in processing.steps)
+
+    uses_changed = np.vectorize(uses_changed_source, otypes=[bool])(previous_processing.data)
+    return affected & previous_processing.copy(data=uses_changed)
@@ -4,6 +4,7 @@ import typing
 from collections.abc import Hashable
 
 import attrs
+import numpy as np
 import xarray as xr
 from attr import define
 
@@ -34,6 +35,101 @@ def match_selector(*, selector: dict[Hashable, str | list[str]], ts: xr.DataArra
     return True
 
 
+@define(frozen=True)
+class SelectorIndex:
+    """
+    Precompiled index to quickly limit selectors to values of fixed dimensions.
+
+    For each indexed dimension, the selectors which can match a coordinate value are
+    stored as a bitset, where bit i is set if selector i can match. Limiting the
+    selectors to values of several dimensions then is a bitwise and of the bitsets
+    of all dimensions. Selectors which don't specify a dimension match all values of
+    the dimension, and negative selections using primap2.Not are stored as the
+    complement of the values they exclude.
+
+    Attributes
+    ----------
+    selectors
+        The selectors in the original order, with the indexed dimensions removed.
+    all_selectors
+        Bitset where the bits for all selectors are set.
+    unconstrained
+        For each indexed dimension, the bitset of selectors which don't specify the
+        dimension.
+    positive
+        For each indexed dimension, a mapping from coordinate values to the bitset of
+        selectors specifying the value or a list containing the value.
+    negated
+        For each indexed dimension, the bitset of selectors specifying the dimension
+        using primap2.Not.
+    negated_values
+        For each indexed dimension, a mapping from coordinate values to the bitset of
+        selectors which exclude the value using primap2.Not.
+    """
+
+    selectors: list[dict[Hashable, typing.Any]]
+    all_selectors: int
+    unconstrained: dict[Hashable, int]
+    positive: dict[Hashable, dict[typing.Any, int]]
+    negated: dict[Hashable, int]
+    negated_values: dict[Hashable, dict[typing.Any, int]]
+
+    @classmethod
+    def from_selectors(
+        cls,
+        selectors: typing.Iterable[dict[Hashable, typing.Any]],
+        dimensions: typing.Iterable[Hashable],
+    ) -> "SelectorIndex":
+        """Compile the index for the given selectors and fixed dimensions."""
+        selectors = list(selectors)
+        dimensions = list(dimensions)
+        unconstrained = {dim: 0 for dim in dimensions}
+        positive: dict[Hashable, dict[typing.Any, int]] = {dim: {} for dim in dimensions}
+        negated = {dim: 0 for dim in dimensions}
+        negated_values: dict[Hashable, dict[typing.Any, int]] = {dim: {} for dim in dimensions}
+        for i, sel in enumerate(selectors):
+            bit = 1 << i
+            for dim in dimensions:
+                if dim not in sel:
+                    unconstrained[dim] |= bit
+                    continue
+                match_value = sel[dim]
+                if isinstance(match_value, primap2.Not):
+                    negated[dim] |= bit
+                    values_map = negated_values[dim]
+                    match_value = match_value.value
+                else:
+                    values_map = positive[dim]
+                if isinstance(match_value, str):
+                    match_value = [match_value]
+                for value in match_value:
+                    values_map[value] = values_map.get(value, 0) | bit
+        return cls(
+            selectors=[{k: v for k, v in sel.items() if k not in dimensions} for sel in selectors],
+            all_selectors=(1 << len(selectors)) - 1,
+            unconstrained=unconstrained,
+            positive=positive,
+            negated=negated,
+            negated_values=negated_values,
+        )
+
+    def matching(self, dim: Hashable, value: typing.Any) -> int:
+        """Bitset of the selectors which can match the value in the dimension."""
+        return (
+            self.unconstrained[dim]
+            | self.positive[dim].get(value, 0)
+            | (self.negated[dim] & ~self.negated_values[dim].get(value, 0))
+        )
+
+    @staticmethod
+    def indices(matches: int) -> typing.Generator[int, None, None]:
+        """Yields the indices of the selectors in the bitset, in ascending order."""
+        while matches:
+            lowest_bit = matches & -matches
+            yield lowest_bit.bit_length() - 1
+            matches ^= lowest_bit
+
+
 @define(frozen=True, kw_only=True)
 class PriorityDefinition:
     """
@@ -122,6 +218,27 @@ class PriorityDefinition:
             exclude_input=self.exclude_input,
         )
 
+    def index(self, dimensions: typing.Iterable[Hashable]) -> SelectorIndex:
+        """Precompile the priorities for limiting them to values of fixed dimensions.
+
+        Limiting using the index with limit_indexed is equivalent to calling limit for
+        every fixed dimension, but much faster.
+        """
+        return SelectorIndex.from_selectors(self.priorities, dimensions)
+
+    def limit_indexed(self, index: SelectorIndex, matches: int) -> "PriorityDefinition":
+        """Limit to the priorities in the bitset matches of the precompiled index.
+
+        Use the index to determine the bitset for the values of all fixed dimensions
+        first, e.g. ``index.matching("area (ISO3)", "COL") & index.matching(...)``.
+        """
+        return PriorityDefinition(
+            priority_dimensions=self.priority_dimensions,
+            priorities=[index.selectors[i] for i in index.indices(matches)],
+            exclude_result=self.exclude_result,
+            exclude_input=self.exclude_input,
+        )
+
     def excludes_result(self, ts: xr.DataArray) -> bool:
         """Check if a selected result timeseries is excluded from processing."""
         return any(
@@ -169,6 +286,10 @@ class FillingStrategyModel(typing.Protocol, Hashable):
     immutability is usually to use the decorator ``attrs.define`` from the
     ``attrs`` package with the ``frozen=True`` argument.
 
+    Optionally, you can additionally implement the ``fill_many`` method as defined
+    in ``BatchFillingStrategyModel`` to process many timeseries at once, which speeds
+    up ``compose`` considerably.
+
     Attributes
     ----------
     type
@@ -236,6 +357,56 @@ class FillingStrategyModel(typing.Protocol, Hashable):
         ...
 
 
+class BatchFillingStrategyModel(FillingStrategyModel, typing.Protocol):
+    """
+    Fill missing data in many timeseries at once using other timeseries.
+
+    Filling strategies which follow this protocol in addition to the
+    ``FillingStrategyModel`` protocol are used by ``compose`` to process all
+    timeseries which use the strategy with the same fill timeseries source at once.
+    """
+
+    def fill_many(
+        self,
+        *,
+        ts: np.ndarray,
+        fill_ts: np.ndarray,
+        time: np.ndarray,
+        fill_ts_repr: str,
+    ) -> tuple[np.ndarray, list[list[ProcessingStepDescription]], np.ndarray]:
+        """Fill gaps in many timeseries using data from the fill timeseries.
+
+        This is the batched equivalent of ``fill``, and has to give the same results
+        as calling ``fill`` for every timeseries on its own, apart from floating point
+        differences. The input arrays must not be modified.
+
+        Parameters
+        ----------
+        ts
+            Base timeseries, as a 2-dimensional array where each row is one
+            timeseries and the columns are the time points.
+        fill_ts
+            Fill timeseries, as an array with the same shape as ts, where each row is
+            used to fill the corresponding row of ts.
+        time
+            Time points of the columns of ts and fill_ts.
+        fill_ts_repr
+            String representation of fill_ts. Human-readable short representation of
+            the fill_ts (e.g. the source). It is the same for all rows.
+
+        Returns
+        -------
+            filled_ts, descriptions, unable_to_process. filled_ts contains the results
+            as an array with the same shape as ts. descriptions contains for each row
+            the list of processing step descriptions, like returned by ``fill``.
+            unable_to_process is a boolean array with one entry per row, which is True
+            for rows where ``fill`` would raise ``StrategyUnableToProcess``. For these
+            rows, the contents of filled_ts and descriptions are ignored and the next
+            applicable filling strategy is used.
+        """
+        ...
+
+
 @define(frozen=True)
 class StrategyDefinition:
     """
@@ -283,6 +454,21 @@ class StrategyDefinition:
             ]
         )
 
+    def index(self, dimensions: typing.Iterable[Hashable]) -> SelectorIndex:
+        """Precompile the strategy selectors for limiting them to values of fixed
+        dimensions.
+
+        Limiting using the index with limit_indexed is equivalent to calling limit for
+        every fixed dimension, but much faster.
+        """
+        return SelectorIndex.from_selectors((sel for sel, _ in self.strategies), dimensions)
+
+    def limit_indexed(self, index: SelectorIndex, matches: int) -> "StrategyDefinition":
+        """Limit to the strategies in the bitset matches of the precompiled index."""
+        return StrategyDefinition(
+            strategies=[(index.selectors[i], self.strategies[i][1]) for i in index.indices(matches)]
+        )
+
     def check_dimensions(self, ds: xr.Dataset):
         """Raise an error if the strategy definition uses the wrong dimensions."""
         applicable_dimensions = set(dim_names(ds)).union({"entity", "variable"})
@@ -35,6 +35,10 @@ class GlobalLSStrategy:
     If ``allow_negative = False`` and the harmonized time-series :math:`\\textrm{fill_ts}_h(t)`
     contains negative data a :py:class:`StrategyUnableToProcess` error will be raised.
 
+    To process many timeseries at once, use ``fill_many``, which solves the least squares
+    problems for all timeseries at once using the closed-form solutions of the normal
+    equations instead of calling scipy for every timeseries.
+
     Attributes
     ----------
     allow_shift: bool, default True
@@ -91,7 +95,7 @@ class GlobalLSStrategy:
         filled_mask = ts.isnull() & ~fill_ts.isnull()
         time_filled = filled_mask["time"][filled_mask].to_numpy()
 
-        if time_filled.any():
+        if filled_mask.any():
             # check if we have overlap. if not use substitution strategy
             # this might not be necessary because we initialize the LS algorithm with 1,
             # but better make it explicit
@@ -154,3 +158,114 @@ class GlobalLSStrategy:
             ]
 
         return filled_ts, descriptions
+
+    def fill_many(
+        self,
+        *,
+        ts: np.ndarray,
+        fill_ts: np.ndarray,
+        time: np.ndarray,
+        fill_ts_repr: str,
+    ) -> tuple[np.ndarray, list[list[primap2.ProcessingStepDescription]], np.ndarray]:
+        """Fill missing data in many timeseries by global least square matching.
+
+        For a description of the algorithm, see the documentation of this class. The
+        least squares problems of all timeseries are solved at once using the
+        closed-form solution, so results can differ from ``fill`` by floating point
+        precision. Where the problem is rank-deficient, the minimum norm solution is
+        used like in :py:func:`scipy.linalg.lstsq`.
+
+        Parameters
+        ----------
+            ts
+                Base timeseries, as an array of shape (number of timeseries, time).
+                Missing data (NaNs) in these timeseries will be filled.
+                This function does not modify the data in ts.
+            fill_ts
+                Fill timeseries, as an array of the same shape as ts.
+                This function does not modify the data in fill_ts.
+            time
+                The time points of the columns of ts and fill_ts.
+            fill_ts_repr
+                String representation of fill_ts. Human-readable short representation of
+                the fill_ts (e.g. the source).
+
+        Returns
+        -------
+            filled_ts, descriptions, unable_to_process.
+                filled_ts contains the results, where missing
+                data in ts is (partly) filled using scaled data from fill_ts.
+                descriptions contains for each timeseries information about which years
+                were affected and filled how.
+                unable_to_process is True for timeseries which have no overlap with
+                their fill timeseries or which would contain negative data after
+                harmonization.
+        """
+        ts_null = np.isnan(ts)
+        fill_null = np.isnan(fill_ts)
+        filled_mask = ts_null & ~fill_null
+        overlap = ~ts_null & ~fill_null
+
+        needs_filling = filled_mask.any(axis=1)
+        n = overlap.sum(axis=1)
+        unable = needs_filling & (n == 0)
+        fitted = needs_filling & (n > 0)
+
+        e = np.where(overlap, fill_ts, 0.0)
+        e_ref = np.where(overlap, ts, 0.0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            if self.allow_shift:
+                e_mean = e.sum(axis=1) / n
+                e_ref_mean = e_ref.sum(axis=1) / n
+                e_centered = np.where(overlap, fill_ts - e_mean[:, np.newaxis], 0.0)
+                e_ref_centered = np.where(overlap, ts - e_ref_mean[:, np.newaxis], 0.0)
+                s_ee = (e_centered**2).sum(axis=1)
+                s_eref = (e_centered * e_ref_centered).sum(axis=1)
+                # rank-deficient if the ratio of the singular values of the design matrix
+                # (e, 1) is below machine precision, like in scipy.linalg.lstsq
+                rank_deficient = n * s_ee <= (np.finfo(float).eps * ((e**2).sum(axis=1) + n)) ** 2
+                a = np.where(rank_deficient, e_mean * e_ref_mean / (e_mean**2 + 1), s_eref / s_ee)
+                b = np.where(rank_deficient, e_ref_mean / (e_mean**2 + 1), e_ref_mean - a * e_mean)
+                fill_ts_harmo = fill_ts * a[:, np.newaxis] + b[:, np.newaxis]
+                negative = (fill_ts_harmo < 0).any(axis=1)
+                unable |= fitted & negative
+                fitted &= ~negative
+            else:
+                s_ee = (e**2).sum(axis=1)
+                # least_squares starts with a factor of 1 and can't improve on it if
+                # e is zero everywhere
+                a = np.where(s_ee > 0, (e * e_ref).sum(axis=1) / s_ee, 1.0)
+                fill_ts_harmo = fill_ts * a[:, np.newaxis]
+
+        filled_ts = np.where(ts_null & fitted[:, np.newaxis], fill_ts_harmo, ts)
+
+        descriptions = []
+        for i, row_mask in enumerate(filled_mask):
+            if unable[i]:
+                descriptions.append([])
+                continue
+            if not fitted[i]:
+                description = f"no additional data in {fill_ts_repr}"
+            elif self.allow_shift:
+                description = (
+                    f"filled with least squares matched data from "
+                    f"{fill_ts_repr}. a*x+b with a={a[i]:0.3f}, "
+                    f"b={b[i]:0.3f}"
+                )
+            else:
+                description = (
+                    "filled with least squares matched data from "
+                    f"{fill_ts_repr}. Factor={a[i]:0.3f}"
+                )
+            descriptions.append(
+                [
+                    primap2.ProcessingStepDescription(
+                        time=time[row_mask],
+                        description=description,
+                        function=self.type,
+                        source=fill_ts_repr,
+                    )
+                ]
+            )
+
+        return filled_ts, descriptions, unable
@@ -1,6 +1,7 @@
 """Simple strategy which replaces NaNs by datapoints from second timeseries."""
 
 import attrs
+import numpy as np
 import xarray as xr
 
 import primap2
@@ -55,3 +56,54 @@ class SubstitutionStrategy:
             source=fill_ts_repr,
         )
         return filled_ts, [description]
+
+    def fill_many(
+        self,
+        *,
+        ts: np.ndarray,
+        fill_ts: np.ndarray,
+        time: np.ndarray,
+        fill_ts_repr: str,
+    ) -> tuple[np.ndarray, list[list[primap2.ProcessingStepDescription]], np.ndarray]:
+        """Fill gaps in many timeseries at once using data from the fill timeseries.
+
+        Parameters
+        ----------
+        ts
+            Base timeseries, as an array of shape (number of timeseries, time).
+            This function does not modify the data in ts.
+        fill_ts
+            Fill timeseries, as an array of the same shape as ts.
+            This function does not modify the data in fill_ts.
+        time
+            The time coordinate of the timeseries.
+        fill_ts_repr
+            String representation of fill_ts. Human-readable short representation of
+            the fill_ts (e.g. the source), which is the same for all timeseries.
+
+        Returns
+        -------
+            filled_ts, descriptions, unable_to_process. filled_ts contains the results
+            in the same shape as ts. descriptions contains, for each timeseries, the
+            descriptions of the processing steps, exactly as ``fill`` would return
+            them. Substitution is always possible, so unable_to_process is False for
+            all timeseries.
+        """
+        ts_null = np.isnan(ts)
+        filled_ts = np.where(ts_null, fill_ts, ts)
+        filled_mask = ts_null & ~np.isnan(fill_ts)
+
+        # timeseries filled in the same years share the description
+        description_cache: dict[bytes, primap2.ProcessingStepDescription] = {}
+        descriptions = []
+        for row_mask in filled_mask:
+            key = row_mask.tobytes()
+            if key not in description_cache:
+                description_cache[key] = primap2.ProcessingStepDescription(
+                    time="all" if row_mask.all() else time[row_mask],
+                    description="substituted with corresponding values from" f" {fill_ts_repr}",
+                    function=self.type,
+                    source=fill_ts_repr,
+                )
+            descriptions.append([description_cache[key]])
+        return filled_ts, descriptions, np.zeros(len(ts), dtype=bool)
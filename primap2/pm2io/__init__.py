@@ -4,6 +4,7 @@ from ._data_reading import (
     convert_long_dataframe_if,
     convert_wide_dataframe_if,
     read_long_csv_file_if,
+    read_many_if,
     read_wide_csv_file_if,
 )
 from ._GHG_inventory_reading import nir_add_unit_information, nir_convert_df_to_long
@@ -16,6 +17,7 @@ from ._interchange_format import (
 __all__ = [
     "read_long_csv_file_if",
     "read_wide_csv_file_if",
+    "read_many_if",
     "convert_long_dataframe_if",
     "convert_wide_dataframe_if",
     "from_interchange_format",
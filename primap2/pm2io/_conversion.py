@@ -1,8 +1,15 @@
+import functools
+import inspect
 import itertools
 import re
+from collections.abc import Callable
 
+import pandas as pd
 from loguru import logger
 
+# maximum number of distinct inputs remembered by each of the conversion functions
+CONVERSION_CACHE_SIZE = 2**16
+
 # basic units
 _basic_units = ["g", "t"]
 
@@ -16,7 +23,92 @@ _units_prefixes = [i[0] + i[1] for i in _units_prefixes]
 # build regexp to match the basic units with prefixes in units
 _units_prefixes_regexp = "(" + "|".join(_units_prefixes) + ")"
 
+# basket entities which use GWPs in PRIMAP1
+_entities_gwp = [
+    "KYOTOGHG",
+    "HFCS",
+    "PFCS",
+    "FGASES",
+    "OTHERHFCS CO2EQ",
+    "OTHERHFCS",
+    "OTHERPFCS",
+]
+
+# define the mapping of PRIMAP GWP specifications to PRIMAP2 GWP specification
+# no GWP given will be mapped to SAR
+_gwp_mapping = {
+    "SAR": "SARGWP100",
+    "AR4": "AR4GWP100",
+    "AR5": "AR5GWP100",
+    "AR5CCF": "AR5CCFGWP100",  # not sure if implemented in scmdata units
+    "AR6": "AR6GWP100",
+}
+
+# regexps to match the GWP conversion variables and the GWPs
+_entities_gwp_regexp = re.compile("(" + "|".join(_entities_gwp) + ")")
+_gwps_regexp = re.compile("(" + "|".join(_gwp_mapping) + ")$")
+
+
+class _ConversionError(Exception):
+    """Carries the result of a failed conversion past the cache."""
+
+    def __init__(self, result: str):
+        self.result = result
+
+
+def memoize_conversion(func: Callable[..., str]) -> Callable[..., str]:
+    """Remember the results of a conversion function in a bounded cache.
+
+    Failed conversions (results starting with "error_") are not cached so that the
+    warning explaining the failure is logged on every call.
+    """
+
+    @functools.lru_cache(maxsize=CONVERSION_CACHE_SIZE)
+    def cached(*args):
+        result = func(*args)
+        if result.startswith("error_"):
+            raise _ConversionError(result)
+        return result
+
+    signature = inspect.signature(func)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        # normalise keyword arguments so that all calls share the same cache entries
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        try:
+            return cached(*bound.args)
+        except _ConversionError as err:
+            return err.result
+
+    wrapper.cache_info = cached.cache_info
+    wrapper.cache_clear = cached.cache_clear
+    return wrapper
 
+
+def convert_series(func: Callable[..., str], *series: pd.Series) -> pd.Series:
+    """Apply a conversion function to pandas Series of values.
+
+    The function is called once per unique value (or unique combination of values if
+    multiple series are given). Missing values are not converted and stay missing.
+    """
+    first = series[0]
+    valid = pd.concat(series, axis=1).notna().all(axis=1).to_numpy()
+    result = pd.Series(index=first.index, dtype=object, name=first.name)
+    if not valid.any():
+        return result
+    if len(series) == 1:
+        codes, uniques = pd.factorize(first[valid])
+        converted = [func(value) for value in uniques]
+    else:
+        codes, uniques = pd.MultiIndex.from_arrays([s[valid] for s in series]).factorize()
+        converted = [func(*values) for values in uniques]
+    result[valid] = pd.Series(converted, dtype=object).to_numpy()[codes]
+    return result
+
+
+@memoize_conversion
 def convert_unit_to_primap2(unit: str, entity: str) -> str:
     """Convert PRIMAP1 emissions module style units and units in similar formats to
     primap2 units.
@@ -103,6 +195,7 @@ def code_invalid_warn(code: str, message: str) -> str:
     return "error_" + code
 
 
+@memoize_conversion
 def convert_ipcc_code_primap_to_primap2(code: str) -> str:
     """Convert IPCC emissions category codes from PRIMAP1 emissions module style to
     primap2 style.
@@ -291,14 +384,15 @@ def convert_ipcc_code_primap_to_primap2(code: str) -> str:
     return new_code
 
 
+@memoize_conversion
 def convert_entity_gwp_primap_to_primap2(entity_pm1: str) -> str:
     """Convert PRIMAP1 emissions module style entity names to primap2 style.
 
     The conversion only considers the GWP, currently the variable itself is
     unchanged.
 
-    Currently the function uses a limited set of GWP values (defined in gwp_mapping) and
-    works on a limited set of variables (defined in entities_gwp).
+    Currently the function uses a limited set of GWP values (defined in _gwp_mapping) and
+    works on a limited set of variables (defined in _entities_gwp).
 
     Parameters
     ----------
@@ -310,49 +404,17 @@ def convert_entity_gwp_primap_to_primap2(entity_pm1: str) -> str:
     entity: str
         entity in PRIMAP2 format
     """
-    entities_gwp = [
-        "KYOTOGHG",
-        "HFCS",
-        "PFCS",
-        "FGASES",
-        "OTHERHFCS CO2EQ",
-        "OTHERHFCS",
-        "OTHERPFCS",
-    ]
-
-    # define the mapping of PRIMAP GWP specifications to PRIMAP2 GWP specification
-    # no GWP given will be mapped to SAR
-    gwp_mapping = {
-        "SAR": "SARGWP100",
-        "AR4": "AR4GWP100",
-        "AR5": "AR5GWP100",
-        "AR5CCF": "AR5CCFGWP100",  # not sure if implemented in scmdata units
-        "AR6": "AR6GWP100",
-    }
-
-    # build regexp to match the GWP conversion variables
-    regexp_str = "("
-    for current_entity in entities_gwp:
-        regexp_str = regexp_str + current_entity + "|"
-    regexp_str = regexp_str[0:-1] + ")"
-
-    # build regexp to match the GWPs
-    regexp_str_gwps = "("
-    for mapping in gwp_mapping:
-        regexp_str_gwps = regexp_str_gwps + mapping + "|"
-    regexp_str_gwps = regexp_str_gwps[0:-1] + ")$"
-
     # check if entity in entities_gwp
-    found = re.match(regexp_str, entity_pm1)
+    found = _entities_gwp_regexp.match(entity_pm1)
     if found is None:
         # not a basket entity which uses GWPs
         entity_pm2 = entity_pm1
     else:
         # check if GWP information present in entity
-        match = re.search(regexp_str_gwps, entity_pm1)
+        match = _gwps_regexp.search(entity_pm1)
         if match is None:
             # SAR GWPs are default in PRIMAP
-            entity_pm2 = entity_pm1 + " (" + gwp_mapping["SAR"] + ")"
+            entity_pm2 = entity_pm1 + " (" + _gwp_mapping["SAR"] + ")"
         else:
             gwp_out = match.group(0)
             # in this case the entity has to be replaced as well
@@ -367,6 +429,66 @@ def convert_entity_gwp_primap_to_primap2(entity_pm1: str) -> str:
                     " This indicates a bug in this function."
                 )
             else:
-                entity_pm2 = match.group(0) + " (" + gwp_mapping[gwp_out] + ")"
+                entity_pm2 = match.group(0) + " (" + _gwp_mapping[gwp_out] + ")"
 
     return entity_pm2
+
+
+def convert_ipcc_codes_primap_to_primap2(codes: pd.Series) -> pd.Series:
+    """Convert a Series of IPCC category codes from PRIMAP1 style to primap2 style.
+
+    Each unique code is converted only once using
+    :py:func:`convert_ipcc_code_primap_to_primap2`, missing values stay missing.
+
+    Parameters
+    ----------
+    codes: pd.Series
+        Category codes in PRIMAP1 format.
+
+    Returns
+    -------
+    codes: pd.Series
+        the category codes in primap2 format
+    """
+    return convert_series(convert_ipcc_code_primap_to_primap2, codes)
+
+
+def convert_entities_gwp_primap_to_primap2(entities: pd.Series) -> pd.Series:
+    """Convert a Series of PRIMAP1 emissions module style entity names to primap2 style.
+
+    Each unique entity is converted only once using
+    :py:func:`convert_entity_gwp_primap_to_primap2`, missing values stay missing.
+
+    Parameters
+    ----------
+    entities: pd.Series
+        entities to process
+
+    Returns
+    -------
+    entities: pd.Series
+        entities in PRIMAP2 format
+    """
+    return convert_series(convert_entity_gwp_primap_to_primap2, entities)
+
+
+def convert_units_to_primap2(units: pd.Series, entities: pd.Series) -> pd.Series:
+    """Convert a Series of PRIMAP1 emissions module style units to primap2 units.
+
+    Each unique combination of unit and entity is converted only once using
+    :py:func:`convert_unit_to_primap2`. Rows where the unit or the entity is missing
+    are not converted.
+
+    Parameters
+    ----------
+    units: pd.Series
+        units to convert
+    entities: pd.Series
+        entities for which the conversion takes place, aligned with units
+
+    Returns
+    -------
+    units: pd.Series
+        converted units
+    """
+    return convert_series(convert_unit_to_primap2, units, entities)
@@ -1,13 +1,17 @@
+import concurrent.futures
 import datetime
+import functools
 import itertools
+import multiprocessing
 import re
-from collections.abc import Callable, Iterable
+from collections.abc import Callable, Iterable, Iterator
 from pathlib import Path
-from typing import IO, Any
+from typing import IO, Any, Literal
 
 import numpy as np
 import pandas as pd
 import pint
+import xarray as xr
 from loguru import logger
 
 from .. import _selection
@@ -17,7 +21,10 @@ from ._interchange_format import (
     INTERCHANGE_FORMAT_COLUMN_ORDER,
     INTERCHANGE_FORMAT_MANDATORY_COLUMNS,
     INTERCHANGE_FORMAT_OPTIONAL_COLUMNS,
+    from_interchange_format,
+    interchange_format_time_columns,
 )
+from ._read_cache import cacheable_reader
 
 SEC_CATS_PREFIX = "sec_cats__"
 
@@ -202,12 +209,59 @@ data_format_details.html#dataset-attributes>`_.
     else:
         data_copy = data_long
 
-    filter_data(data_copy, filter_keep, filter_remove)
+    additional_coordinates = additional_coordinate_metadata(
+        add_coords_cols, coords_cols, coords_terminologies
+    )
+
+    data_copy = process_long_rows(
+        data_copy,
+        coords_cols=coords_cols,
+        add_coords_cols=add_coords_cols,
+        coords_defaults=coords_defaults,
+        coords_terminologies=coords_terminologies,
+        coords_value_mapping=coords_value_mapping,
+        coords_value_filling=coords_value_filling,
+        filter_keep=filter_keep,
+        filter_remove=filter_remove,
+        convert_str=convert_str,
+        attrs=attrs,
+    )
+
+    return finish_long_dataframe(
+        data_copy,
+        attrs=attrs,
+        add_coords_cols=add_coords_cols,
+        additional_coordinates=additional_coordinates,
+        time_format=time_format,
+    )
 
-    add_dimensions_from_defaults(data_copy, coords_defaults, additional_allowed_coords=["time"])
+
+def process_long_rows(
+    data: pd.DataFrame,
+    *,
+    coords_cols: dict[str, str],
+    add_coords_cols: dict[str, list[str]],
+    coords_defaults: dict[str, Any],
+    coords_terminologies: dict[str, str],
+    coords_value_mapping: None | dict[str, Any],
+    coords_value_filling: None | dict[str, dict[str, dict]],
+    filter_keep: None | dict[str, dict[str, Any]],
+    filter_remove: None | dict[str, dict[str, Any]],
+    convert_str: bool | dict[str, float],
+    attrs: dict[str, Any],
+    mapping_cache: None | dict = None,
+) -> pd.DataFrame:
+    """Do all processing steps of the long format conversion which work row by row.
+
+    Because each row is processed independently, this can also be applied to chunks
+    of the data. The naming attrs are added to attrs.
+    """
+    filter_data(data, filter_keep, filter_remove)
+
+    add_dimensions_from_defaults(data, coords_defaults, additional_allowed_coords=["time"])
 
     naming_attrs = rename_columns(
-        data_copy, coords_cols, add_coords_cols, coords_defaults, coords_terminologies
+        data, coords_cols, add_coords_cols, coords_defaults, coords_terminologies
     )
     attrs.update(naming_attrs)
 
@@ -215,30 +269,36 @@ data_format_details.html#dataset-attributes>`_.
         # get data columns (just one as we have long format)
         data_cols = ["data"]
         # find all string values
-        str_values = find_str_values_in_data(data_copy, data_cols)
+        str_values = find_str_values_in_data(data, data_cols)
         # create replacement dict
         str_repl_dict = create_str_replacement_dict(str_values, convert_str)
-        replace_values(data_copy, data_cols, str_repl_dict)
-
-    additional_coordinates = additional_coordinate_metadata(
-        add_coords_cols, coords_cols, coords_terminologies
-    )
+        replace_values(data, data_cols, str_repl_dict)
 
     if coords_value_mapping is not None:
-        map_metadata(data_copy, attrs=attrs, meta_mapping=coords_value_mapping)
+        map_metadata(data, attrs=attrs, meta_mapping=coords_value_mapping, cache=mapping_cache)
 
     if coords_value_filling is not None:
-        data_copy = fill_from_other_col(
-            data_copy, attrs=attrs, coords_value_filling=coords_value_filling
-        )
+        data = fill_from_other_col(data, attrs=attrs, coords_value_filling=coords_value_filling)
+
+    return data
 
-    coords = list(set(data_copy.columns.values) - {"data"})
 
-    harmonize_units(data_copy, dimensions=coords, attrs=attrs)
+def finish_long_dataframe(
+    data: pd.DataFrame,
+    *,
+    attrs: dict[str, Any],
+    add_coords_cols: dict[str, list[str]],
+    additional_coordinates: dict,
+    time_format: str,
+) -> pd.DataFrame:
+    """Harmonize units and convert processed long data to the interchange format."""
+    coords = list(set(data.columns.values) - {"data"})
+
+    harmonize_units(data, dimensions=coords, attrs=attrs)
 
-    data_copy["time"] = pd.to_datetime(data_copy["time"], format=time_format)
+    data["time"] = pd.to_datetime(data["time"], format=time_format)
 
-    data, coords = long_to_wide(data_copy, time_format=time_format)
+    data, coords = long_to_wide(data, time_format=time_format)
 
     data, coords = sort_columns_and_rows(data, dimensions=coords)
     dims = coords.copy()
@@ -255,6 +315,7 @@ data_format_details.html#dataset-attributes>`_.
     return data
 
 
+@cacheable_reader
 def read_long_csv_file_if(
     filepath_or_buffer: str | Path | IO,
     *,
@@ -269,6 +330,8 @@ def read_long_csv_file_if(
     meta_data: None | dict[str, Any] = None,
     time_format: str = "%Y-%m-%d",
     convert_str: bool | dict[str, float] = True,
+    chunksize: None | int = None,
+    cache_dir: None | str | Path = None,
 ) -> pd.DataFrame:
     """Read a CSV file in long (tidy) format into the PRIMAP2 interchange format.
 
@@ -362,6 +425,31 @@ data_format_details.html#dataset-attributes>`_.
         If a dict is given mapping will be as given in the dict for values present in
         the dict and default as in parse_code for all other values
 
+    chunksize : int, optional
+        If given, the CSV file is read in chunks of ``chunksize`` rows. Filtering,
+        string code replacement, and metadata mapping are done for each chunk
+        individually, re-using the results of mapping functions across chunks, and
+        only the processed chunks are combined. Units are harmonized after combining
+        the chunks because the preferred unit of an entity depends on all data. This
+        reduces the memory needed for large files, especially if most of the data
+        is filtered out. In chunked mode, all metadata columns are read as strings so
+        that all chunks are consistent, so give filters for metadata columns as
+        strings.
+        Default: read the whole file at once.
+
+    cache_dir : str or pathlib.Path, optional
+        If given, the result is cached in this directory and returned from the cache
+        when the same file (judged by its content) is read again with the same
+        arguments, skipping the parsing and processing. For mapping functions given
+        in ``coords_value_mapping``, the cache key includes their code, constants,
+        default arguments, and closure variables, so changes to these are picked up.
+        Changes to global variables used by mapping functions are not picked up, so
+        clear the cache directory after changing them. Results are not cached at all
+        if a mapping is an object with the default object repr, which is not
+        deterministic. Only files given as paths are cached. Caching needs the
+        optional dependency ``pyarrow``.
+        Default: no caching.
+
     Returns
     -------
     obj: pd.DataFrame
@@ -404,6 +492,45 @@ data_format_details.html#dataset-attributes>`_.
     if add_coords_cols:
         check_overlapping_specifications_add_cols(coords_cols, add_coords_cols)
 
+    if chunksize is not None:
+        if coords_defaults is None:
+            coords_defaults = {}
+        if add_coords_cols is None:
+            add_coords_cols = {}
+        attrs = {} if meta_data is None else meta_data.copy()
+        additional_coordinates = additional_coordinate_metadata(
+            add_coords_cols, coords_cols, coords_terminologies
+        )
+
+        mapping_cache = {}
+        chunks = [
+            process_long_rows(
+                chunk,
+                coords_cols=coords_cols,
+                add_coords_cols=add_coords_cols,
+                coords_defaults=coords_defaults,
+                coords_terminologies=coords_terminologies,
+                coords_value_mapping=coords_value_mapping,
+                coords_value_filling=coords_value_filling,
+                filter_keep=filter_keep,
+                filter_remove=filter_remove,
+                convert_str=convert_str,
+                attrs=attrs,
+                mapping_cache=mapping_cache,
+            )
+            for chunk in read_long_csv_chunks(
+                filepath_or_buffer, coords_cols, add_coords_cols, chunksize=chunksize
+            )
+        ]
+
+        return finish_long_dataframe(
+            pd.concat(chunks, ignore_index=True),
+            attrs=attrs,
+            add_coords_cols=add_coords_cols,
+            additional_coordinates=additional_coordinates,
+            time_format=time_format,
+        )
+
     data_long = read_long_csv(filepath_or_buffer, coords_cols, add_coords_cols)
 
     return convert_long_dataframe_if(
@@ -636,54 +763,111 @@ data_format_details.html#dataset-attributes>`_.
     else:
         data_if = data_wide
 
-    filter_data(data_if, filter_keep, filter_remove)
+    additional_coordinates = additional_coordinate_metadata(
+        add_coords_cols, coords_cols, coords_terminologies
+    )
+
+    data_if = process_wide_rows(
+        data_if,
+        coords_cols=coords_cols,
+        add_coords_cols=add_coords_cols,
+        coords_defaults=coords_defaults,
+        coords_terminologies=coords_terminologies,
+        coords_value_mapping=coords_value_mapping,
+        coords_value_filling=coords_value_filling,
+        filter_keep=filter_keep,
+        filter_remove=filter_remove,
+        time_columns=time_columns,
+        convert_str=convert_str,
+        attrs=attrs,
+    )
+
+    return finish_wide_dataframe(
+        data_if,
+        attrs=attrs,
+        add_coords_cols=add_coords_cols,
+        additional_coordinates=additional_coordinates,
+        time_format=time_format,
+        time_columns=time_columns,
+    )
+
+
+def process_wide_rows(
+    data: pd.DataFrame,
+    *,
+    coords_cols: dict[str, str],
+    add_coords_cols: dict[str, list[str]],
+    coords_defaults: dict[str, Any],
+    coords_terminologies: dict[str, str],
+    coords_value_mapping: None | dict[str, Any],
+    coords_value_filling: None | dict[str, dict[str, dict]],
+    filter_keep: None | dict[str, dict[str, Any]],
+    filter_remove: None | dict[str, dict[str, Any]],
+    time_columns: list[str],
+    convert_str: bool | dict[str, float],
+    attrs: dict[str, Any],
+    mapping_cache: None | dict = None,
+) -> pd.DataFrame:
+    """Do all processing steps of the wide format conversion which work row by row.
+
+    Because each row is processed independently, this can also be applied to chunks
+    of the data. The naming attrs are added to attrs.
+    """
+    filter_data(data, filter_keep, filter_remove)
 
     if convert_str:
-        # get data columns (just one as we have long format)
         # find all string values
-        str_values = find_str_values_in_data(data_if, time_columns)
+        str_values = find_str_values_in_data(data, time_columns)
         # create replacement dict
         str_repl_dict = create_str_replacement_dict(str_values, convert_str)
-        replace_values(data_if, time_columns, str_repl_dict)
+        replace_values(data, time_columns, str_repl_dict)
 
-    add_dimensions_from_defaults(data_if, coords_defaults)
+    add_dimensions_from_defaults(data, coords_defaults)
 
     naming_attrs = rename_columns(
-        data_if, coords_cols, add_coords_cols, coords_defaults, coords_terminologies
+        data, coords_cols, add_coords_cols, coords_defaults, coords_terminologies
     )
     attrs.update(naming_attrs)
 
-    additional_coordinates = additional_coordinate_metadata(
-        add_coords_cols, coords_cols, coords_terminologies
-    )
-
     if coords_value_mapping is not None:
-        map_metadata(data_if, attrs=attrs, meta_mapping=coords_value_mapping)
+        map_metadata(data, attrs=attrs, meta_mapping=coords_value_mapping, cache=mapping_cache)
 
     if coords_value_filling is not None:
-        data_if = fill_from_other_col(
-            data_if, attrs=attrs, coords_value_filling=coords_value_filling
-        )
+        data = fill_from_other_col(data, attrs=attrs, coords_value_filling=coords_value_filling)
 
-    coords = list(set(data_if.columns.values) - set(time_columns))
+    return data
 
-    harmonize_units(data_if, dimensions=coords, attrs=attrs)
 
-    data_if, coords = sort_columns_and_rows(data_if, dimensions=coords)
+def finish_wide_dataframe(
+    data: pd.DataFrame,
+    *,
+    attrs: dict[str, Any],
+    add_coords_cols: dict[str, list[str]],
+    additional_coordinates: dict,
+    time_format: str,
+    time_columns: list[str],
+) -> pd.DataFrame:
+    """Harmonize units and convert processed wide data to the interchange format."""
+    coords = list(set(data.columns.values) - set(time_columns))
+
+    harmonize_units(data, dimensions=coords, attrs=attrs)
+
+    data, coords = sort_columns_and_rows(data, dimensions=coords)
     dims = coords.copy()
     for add_coord in add_coords_cols.keys():
         dims.remove(add_coord)
 
-    data_if.attrs = interchange_format_attrs_dict(
+    data.attrs = interchange_format_attrs_dict(
         xr_attrs=attrs,
         time_format=time_format,
         dimensions=dims,
         additional_coordinates=additional_coordinates,
     )
 
-    return data_if
+    return data
 
 
+@cacheable_reader
 def read_wide_csv_file_if(
     filepath_or_buffer: str | Path | IO,
     *,
@@ -698,6 +882,8 @@ def read_wide_csv_file_if(
     meta_data: None | dict[str, Any] = None,
     time_format: str = "%Y",
     convert_str: bool | dict[str, float] = True,
+    chunksize: None | int = None,
+    cache_dir: None | str | Path = None,
 ) -> pd.DataFrame:
     """Read a CSV file in wide format into the PRIMAP2 interchange format.
 
@@ -795,6 +981,31 @@ data_format_details.html#dataset-attributes>`_.
         If a dict is given mapping will be as given in the dict for values present in
         the dict and default as in parse_code for all other values
 
+    chunksize : int, optional
+        If given, the CSV file is read in chunks of ``chunksize`` rows. Filtering,
+        string code replacement, and metadata mapping are done for each chunk
+        individually, re-using the results of mapping functions across chunks, and
+        only the processed chunks are combined. Units are harmonized after combining
+        the chunks because the preferred unit of an entity depends on all data. This
+        reduces the memory needed for large files, especially if most of the data
+        is filtered out. In chunked mode, all metadata columns are read as strings so
+        that all chunks are consistent, so give filters for metadata columns as
+        strings.
+        Default: read the whole file at once.
+
+    cache_dir : str or pathlib.Path, optional
+        If given, the result is cached in this directory and returned from the cache
+        when the same file (judged by its content) is read again with the same
+        arguments, skipping the parsing and processing. For mapping functions given
+        in ``coords_value_mapping``, the cache key includes their code, constants,
+        default arguments, and closure variables, so changes to these are picked up.
+        Changes to global variables used by mapping functions are not picked up, so
+        clear the cache directory after changing them. Results are not cached at all
+        if a mapping is an object with the default object repr, which is not
+        deterministic. Only files given as paths are cached. Caching needs the
+        optional dependency ``pyarrow``.
+        Default: no caching.
+
     Returns
     -------
     obj: pd.DataFrame
@@ -841,6 +1052,51 @@ data_format_details.html#dataset-attributes>`_.
     if add_coords_cols:
         check_overlapping_specifications_add_cols(coords_cols, add_coords_cols)
 
+    if chunksize is not None:
+        if add_coords_cols is None:
+            add_coords_cols = {}
+        attrs = {} if meta_data is None else meta_data.copy()
+        additional_coordinates = additional_coordinate_metadata(
+            add_coords_cols, coords_cols, coords_terminologies
+        )
+
+        mapping_cache = {}
+        time_columns = []
+        chunks = []
+        for chunk, time_columns in read_wide_csv_chunks(
+            filepath_or_buffer,
+            coords_cols,
+            add_coords_cols=add_coords_cols,
+            time_format=time_format,
+            chunksize=chunksize,
+        ):
+            chunks.append(
+                process_wide_rows(
+                    chunk,
+                    coords_cols=coords_cols,
+                    add_coords_cols=add_coords_cols,
+                    coords_defaults=coords_defaults,
+                    coords_terminologies=coords_terminologies,
+                    coords_value_mapping=coords_value_mapping,
+                    coords_value_filling=coords_value_filling,
+                    filter_keep=filter_keep,
+                    filter_remove=filter_remove,
+                    time_columns=time_columns,
+                    convert_str=convert_str,
+                    attrs=attrs,
+                    mapping_cache=mapping_cache,
+                )
+            )
+
+        return finish_wide_dataframe(
+            pd.concat(chunks, ignore_index=True),
+            attrs=attrs,
+            add_coords_cols=add_coords_cols,
+            additional_coordinates=additional_coordinates,
+            time_format=time_format,
+            time_columns=time_columns,
+        )
+
     data, time_columns = read_wide_csv(
         filepath_or_buffer,
         coords_cols,
@@ -868,6 +1124,134 @@ data_format_details.html#dataset-attributes>`_.
     return data
 
 
+def read_many_if(
+    paths: Iterable[str | Path],
+    spec: dict[str, Any],
+    *,
+    reader: Literal["wide", "long"] | Callable[..., pd.DataFrame] = "wide",
+    n_workers: int | None = None,
+    executor: concurrent.futures.Executor | None = None,
+    to_dataset: bool = False,
+) -> pd.DataFrame | xr.Dataset:
+    """Read many files into a single PRIMAP2 interchange format DataFrame.
+
+    All files are read with the same specification, the resulting interchange format
+    DataFrames are concatenated and their metadata is merged and checked for
+    consistency once. Because units are harmonized for each file separately, they are
+    harmonized again for the concatenated data. The files should not contain the same
+    time series, otherwise the conversion to an xarray Dataset fails.
+
+    Parameters
+    ----------
+    paths: iterable of str or pathlib.Path
+        Paths of the files to read.
+    spec: dict
+        Keyword arguments for the reader, e.g. ``coords_cols``, ``coords_defaults`` etc.
+        for :py:func:`read_wide_csv_file_if`. Give ``cache_dir`` to cache the results
+        for the individual files.
+    reader: "wide", "long", or callable, optional
+        Reader to use. "wide" uses :py:func:`read_wide_csv_file_if` and "long" uses
+        :py:func:`read_long_csv_file_if`. You can also give your own function which
+        is called with a path as the first argument and the spec as keyword arguments
+        and returns an interchange format DataFrame. Default: "wide".
+    n_workers: int, optional
+        If given and larger than 1, read the files in parallel using a pool of
+        n_workers processes. If you give your own reader function, it has to be
+        defined at the top level of a module so it can be sent to the worker processes.
+    executor: concurrent.futures.Executor, optional
+        Instead of n_workers, you can also supply your own
+        :py:class:`concurrent.futures.Executor` which is used to read the files in
+        parallel.
+    to_dataset: bool, optional
+        If True, convert the concatenated data to a PRIMAP2 xarray Dataset using
+        :py:func:`primap2.pm2io.from_interchange_format` and return the Dataset.
+        Default: False.
+
+    Returns
+    -------
+    obj: pd.DataFrame or xr.Dataset
+        pandas DataFrame with the read data of all files in the interchange format, or
+        the corresponding xarray Dataset if to_dataset is True.
+    """
+    if executor is not None and n_workers is not None:
+        raise ValueError("Only one of n_workers and executor can be given.")
+    if n_workers is not None and n_workers > 1:
+        # spawn fresh worker processes, forking a process which already runs threads
+        # (e.g. from dask) can deadlock
+        with concurrent.futures.ProcessPoolExecutor(
+            max_workers=n_workers, mp_context=multiprocessing.get_context("spawn")
+        ) as pool:
+            return read_many_if(paths, spec, reader=reader, executor=pool, to_dataset=to_dataset)
+
+    paths = list(paths)
+    if not paths:
+        logger.error("No paths to read given.")
+        raise ValueError("No paths to read given.")
+
+    if isinstance(reader, str):
+        readers = {"wide": read_wide_csv_file_if, "long": read_long_csv_file_if}
+        try:
+            reader = readers[reader]
+        except KeyError:
+            logger.error(f"Unknown reader {reader!r}, known readers are: {list(readers)}.")
+            raise ValueError(f"Unknown reader {reader!r}.") from None
+
+    if executor is None:
+        datas = [reader(path, **spec) for path in paths]
+    else:
+        futures = [executor.submit(reader, path, **spec) for path in paths]
+        datas = [future.result() for future in futures]
+
+    data = concat_interchange_format(datas)
+
+    if to_dataset:
+        return from_interchange_format(data)
+    return data
+
+
+def concat_interchange_format(datas: list[pd.DataFrame]) -> pd.DataFrame:
+    """Concatenate interchange format DataFrames and merge their metadata.
+
+    The dataset attrs and the time format have to be the same for all DataFrames,
+    the dimensions, additional coordinates and dtypes are merged and have to be
+    consistent where they are defined for the same entity or coordinate. The units of
+    the concatenated data are harmonized.
+    """
+    attrs = {
+        "attrs": datas[0].attrs["attrs"],
+        "time_format": datas[0].attrs["time_format"],
+        "dimensions": {},
+    }
+    for data in datas:
+        for key in ("attrs", "time_format"):
+            if data.attrs[key] != attrs[key]:
+                logger.error(
+                    f"Can not concatenate interchange format data with different "
+                    f"{key!r}: {attrs[key]!r} and {data.attrs[key]!r}."
+                )
+                raise ValueError(f"Interchange format data has different {key!r}.")
+        for key in ("dimensions", "additional_coordinates", "dtypes"):
+            for name, value in data.attrs.get(key, {}).items():
+                merged = attrs.setdefault(key, {})
+                if name in merged and merged[name] != value:
+                    logger.error(
+                        f"Can not concatenate interchange format data with different "
+                        f"{key!r} for {name!r}: {merged[name]!r} and {value!r}."
+                    )
+                    raise ValueError(f"Interchange format data has different {key!r}.")
+                merged[name] = value
+
+    data = pd.concat(datas, ignore_index=True)
+    time_cols = interchange_format_time_columns(data, attrs)
+    dimensions = [col for col in data.columns if col not in time_cols]
+    # units are harmonized per file, which can result in different units for the
+    # same entity in different files
+    harmonize_units(data, dimensions=dimensions, attrs=attrs["attrs"])
+    data, _ = sort_columns_and_rows(data, dimensions=dimensions)
+    data.attrs = attrs
+    return data
+
+
 def interchange_format_attrs_dict(
     *,
     xr_attrs: dict,
@@ -985,16 +1369,34 @@ def read_wide_csv(
         filepath_or_buffer,
     )
 
-    # get all the columns that are actual data not metadata (usually the years)
-    time_cols = [col for col in data.columns.values if matches_time_format(col, time_format)]
-
-    # remove all cols not in the specification
-    columns = data.columns.values
     if add_coords_cols:
         add_coords_col_names = {value[0] for value in add_coords_cols.values()}
     else:
         add_coords_col_names = set()
 
+    return select_wide_columns(
+        data,
+        coords_cols,
+        add_coords_col_names=add_coords_col_names,
+        time_format=time_format,
+        filepath_or_buffer=filepath_or_buffer,
+    )
+
+
+def select_wide_columns(
+    data: pd.DataFrame,
+    coords_cols: dict[str, str],
+    *,
+    add_coords_col_names: set[str],
+    time_format: str,
+    filepath_or_buffer,
+) -> tuple[pd.DataFrame, list[str]]:
+    """Drop all columns of wide data which are not in the specification."""
+    # get all the columns that are actual data not metadata (usually the years)
+    time_cols = [col for col in data.columns.values if matches_time_format(col, time_format)]
+
+    # remove all cols not in the specification
+    columns = data.columns.values
     data.drop(
         columns=list(
             set(columns) - set(coords_cols.values()) - add_coords_col_names - set(time_cols)
@@ -1014,6 +1416,71 @@ def read_wide_csv(
     return data, time_cols
 
 
+def read_wide_csv_chunks(
+    filepath_or_buffer,
+    coords_cols: dict[str, str],
+    *,
+    add_coords_cols: dict[str, list[str]],
+    time_format: str = "%Y",
+    chunksize: int,
+) -> Iterator[tuple[pd.DataFrame, list[str]]]:
+    """Read a wide CSV file in chunks, yielding each chunk and the time columns.
+
+    All metadata columns are read as strings so that the data types do not differ
+    between chunks.
+    """
+    add_coords_col_names = {value[0] for value in add_coords_cols.values()}
+    meta_cols = set(coords_cols.values()) | add_coords_col_names
+
+    with pd.read_csv(
+        filepath_or_buffer,
+        chunksize=chunksize,
+        dtype={col: str for col in meta_cols},
+    ) as reader:
+        for chunk in reader:
+            yield select_wide_columns(
+                chunk,
+                coords_cols,
+                add_coords_col_names=add_coords_col_names,
+                time_format=time_format,
+                filepath_or_buffer=filepath_or_buffer,
+            )
+
+
+def read_long_csv_chunks(
+    filepath_or_buffer,
+    coords_cols: dict[str, str],
+    add_coords_cols: dict[str, list[str]],
+    *,
+    chunksize: int,
+) -> Iterator[pd.DataFrame]:
+    """Read a long CSV file in chunks.
+
+    All metadata columns are read as strings so that the data types do not differ
+    between chunks.
+    """
+    if "data" not in coords_cols:
+        raise ValueError("No data column in the CSV specified in coords_cols, so nothing to read.")
+
+    if "time" in coords_cols:
+        parse_dates = [coords_cols["time"]]
+    else:
+        parse_dates = False
+
+    add_coords_col_names = {value[0] for value in add_coords_cols.values()}
+    usecols = list(coords_cols.values()) + list(add_coords_col_names)
+    meta_cols = set(usecols) - {coords_cols["data"], coords_cols.get("time")}
+
+    with pd.read_csv(
+        filepath_or_buffer,
+        parse_dates=parse_dates,
+        usecols=usecols,
+        dtype={col: str for col in meta_cols},
+        chunksize=chunksize,
+    ) as reader:
+        yield from reader
+
+
 def read_long_csv(
     filepath_or_buffer,
     coords_cols: dict[str, str],
@@ -1043,21 +1510,40 @@ def read_long_csv(
     return data
 
 
-def spec_to_query_string(filter_spec: dict[str, Any]) -> str:
-    """Convert filter specification to query string.
+def compile_filters(
+    filters: dict[str, dict[str, Any]],
+) -> dict[tuple[str, ...], list[tuple]]:
+    """Compile filter specifications into tables of matching values.
 
-    All column conditions in the filter are combined with &.
+    All filters which use the same set of columns are merged, so the resulting dict
+    maps each set of columns to the list of all value combinations which match
+    any of the filters.
     """
-    queries = []
-    for col in filter_spec:
-        if isinstance(filter_spec[col], list):
-            itemlist = ", ".join(repr(x) for x in filter_spec[col])
-            filter_query = f"`{col}` in [{itemlist}]"
-        else:
-            filter_query = f"`{col}` == {filter_spec[col]!r}"
-        queries.append(filter_query)
+    tables: dict[tuple[str, ...], list[tuple]] = {}
+    for filter_spec in filters.values():
+        cols = tuple(sorted(filter_spec))
+        values = [
+            filter_spec[col] if isinstance(filter_spec[col], list) else [filter_spec[col]]
+            for col in cols
+        ]
+        tables.setdefault(cols, []).extend(itertools.product(*values))
+    return tables
+
 
-    return " & ".join(queries)
+def filter_mask(data: pd.DataFrame, filters: dict[str, dict[str, Any]]) -> np.ndarray:
+    """Boolean mask of all rows which match at least one of the filters.
+
+    Within a filter, all column conditions have to match.
+    """
+    mask = np.zeros(len(data), dtype=bool)
+    for cols, combinations in compile_filters(filters).items():
+        if not cols:
+            mask[:] = True
+        elif len(cols) == 1:
+            mask |= data[cols[0]].isin([values[0] for values in combinations]).to_numpy()
+        else:
+            mask |= pd.MultiIndex.from_frame(data[list(cols)]).isin(combinations)
+    return mask
 
 
 def filter_data(
@@ -1065,27 +1551,21 @@ def filter_data(
     filter_keep: None | dict[str, dict[str, Any]] = None,
     filter_remove: None | dict[str, dict[str, Any]] = None,
 ):
+    keep = np.ones(len(data), dtype=bool)
     # Filters for keeping data are combined with "or" so that
     # everything matching at least one rule is kept.
     if filter_keep:
-        queries = []
-        for filter_spec in filter_keep.values():
-            q = spec_to_query_string(filter_spec)
-            queries.append(f"({q})")
-        query = " | ".join(queries)
-        data.query(query, inplace=True)
+        keep &= filter_mask(data, filter_keep)
 
     # Filters for removing data are negated and combined with "and" so that
     # only rows which don't match any rule are kept.
     if filter_remove:
-        queries = []
-        for filter_spec in filter_remove.values():
-            q = spec_to_query_string(filter_spec)
-            queries.append(f"~({q})")
-        query = " & ".join(queries)
-        data.query(query, inplace=True)
+        keep &= ~filter_mask(data, filter_remove)
 
     data.reset_index(drop=True, inplace=True)
+    if not keep.all():
+        data.drop(index=np.flatnonzero(~keep), inplace=True)
+        data.reset_index(drop=True, inplace=True)
 
 
 def fill_from_other_col(
@@ -1125,18 +1605,15 @@ def fill_from_other_col(
     dim_aliases = _selection.translations_from_attrs(attrs, include_entity=True)
 
     # loop over target columns in value mapping
-    for target_col in coords_value_filling:
-        target_info = coords_value_filling[target_col]
+    for target_col, target_info in coords_value_filling.items():
+        target_col_name = dim_aliases.get(target_col, target_col)
         # loop over source columns
-        for source_col in target_info:
-            mapping_info = target_info[source_col]
-            # loop over cases
-            target_col_name = dim_aliases.get(target_col, target_col)
+        for source_col, mapping_info in target_info.items():
             source_col_name = dim_aliases.get(source_col, source_col)
-            for source_value in mapping_info:
-                df.loc[df[source_col_name] == source_value, target_col_name] = df.loc[
-                    df[source_col_name] == source_value, target_col_name
-                ] = mapping_info[source_value]
+            source = df[source_col_name]
+            # only replace values for rows where a mapping is defined
+            matched = source.isin(list(mapping_info)) & source.notna()
+            df.loc[matched, target_col_name] = source[matched].map(mapping_info)
     return df
 
 
@@ -1166,17 +1643,21 @@ def map_metadata(
     *,
     meta_mapping: dict[str, str | Callable | dict],
     attrs: dict[str, Any],
+    cache: None | dict = None,
 ):
     """Map the metadata according to specifications given in meta_mapping.
     First map entity, then the rest.
+
+    If a cache dict is given, results of mapping functions are stored in it and
+    re-used in subsequent calls with the same cache, e.g. for chunks of the same data.
     """
     meta_mapping_copy = meta_mapping.copy()
     if "entity" in meta_mapping:
         meta_mapping_entity = dict(entity=meta_mapping_copy["entity"])
         meta_mapping_copy.pop("entity")
-        map_metadata_unordered(data, meta_mapping=meta_mapping_entity, attrs=attrs)
+        map_metadata_unordered(data, meta_mapping=meta_mapping_entity, attrs=attrs, cache=cache)
 
-    map_metadata_unordered(data, meta_mapping=meta_mapping_copy, attrs=attrs)
+    map_metadata_unordered(data, meta_mapping=meta_mapping_copy, attrs=attrs, cache=cache)
 
 
 def map_metadata_unordered(
@@ -1184,8 +1665,15 @@ def map_metadata_unordered(
     *,
     meta_mapping: dict[str, str | Callable | dict],
     attrs: dict[str, Any],
+    cache: None | dict = None,
 ):
-    """Map the metadata according to specifications given in meta_mapping."""
+    """Map the metadata according to specifications given in meta_mapping.
+
+    If a cache dict is given, results of mapping functions are stored in it and
+    re-used in subsequent calls with the same cache.
+    """
+    if cache is None:
+        cache = {}
     dim_aliases = _selection.translations_from_attrs(attrs, include_entity=True)
 
     # TODO: add additional mapping functions here
@@ -1221,25 +1709,34 @@ def map_metadata_unordered(
                 func = mapping
                 args = []
 
+            func_cache = cache.setdefault((column, mapping), {})
             if not args:  # simple case: no additional args needed
-                values_to_map = data[column_name].unique()
-                values_mapped = map(func, values_to_map)
-                meta_mapping_df[column_name] = dict(zip(values_to_map, values_mapped, strict=False))
+                # call the function once per unique value and scatter the results
+                codes, uniques = pd.factorize(data[column_name], use_na_sentinel=False)
+                mapped = np.empty(len(uniques), dtype=object)
+                for i, value in enumerate(uniques):
+                    if value not in func_cache:
+                        func_cache[value] = func(value)
+                    mapped[i] = func_cache[value]
+                data[column_name] = mapped[codes]
 
             else:  # need to supply additional arguments
-                # this can't be handled using the replace()-call later since the
-                # mapped values don't depend on the original values only, therefore
-                # we do it directly
+                # the mapped values don't depend on the original values only, so
+                # call the function once per unique combination of the column and
+                # the arguments. Rows where any of them is missing are not mapped.
                 sel = [column_name, *args]
-                values_to_map = np.unique(data[sel].to_records(index=False))
-                for vals_to_map in values_to_map:
-                    # we replace values where all the arguments match - build a
-                    # selector for that, then do the replacement
-                    selector = data[column_name] == vals_to_map[0]
-                    for i, arg in enumerate(args):
-                        selector &= data[arg] == vals_to_map[i + 1]
-
-                    data.loc[selector, column_name] = func(*vals_to_map)
+                valid = data[sel].notna().all(axis=1).to_numpy()
+                if not valid.any():
+                    continue
+                codes, uniques = pd.MultiIndex.from_frame(data.loc[valid, sel]).factorize()
+                mapped = np.empty(len(uniques), dtype=object)
+                for i, key in enumerate(uniques):
+                    if key not in func_cache:
+                        func_cache[key] = func(*key)
+                    mapped[i] = func_cache[key]
+                column_values = data[column_name].to_numpy(dtype=object, copy=True)
+                column_values[valid] = mapped[codes]
+                data[column_name] = column_values
 
         else:
             meta_mapping_df[column_name] = mapping
@@ -1316,12 +1813,13 @@ def find_str_values_in_data(
     # limit our analysis to columns that contain strings
     # (or other object types)
     cols_with_strs = data[columns].select_dtypes(include=[object]).columns.values.tolist()
-    temp = []
-    for col in cols_with_strs:
-        temp += list(data[col].unique())
-    temp = list(set(temp))
-    strs = [x for x in temp if not is_float(x)]
-    return strs
+    if not cols_with_strs:
+        return []
+    values = pd.unique(data[cols_with_strs].to_numpy().ravel())
+    # values which can be parsed as numbers are not strings in this sense. Only check
+    # the values which pandas can't parse individually, e.g. "1_000" is a valid float
+    candidates = values[np.isnan(pd.to_numeric(values, errors="coerce").astype(float))]
+    return [x for x in candidates if not pd.isna(x) and not is_float(x)]
 
 
 def parse_code(code: str) -> float:
@@ -1370,11 +1868,40 @@ def create_str_replacement_dict(
 
 
 def replace_values(data: pd.DataFrame, columns: list[str], na_repl_dict):
-    """Replace str values indicating not-a-number by float NaN."""
-    for col in columns:
-        data[col] = data[col].replace(na_repl_dict)
-        data[col] = pd.to_numeric(data[col], errors="coerce")
-        data[col] = data[col].astype("float64", copy=False, errors="ignore")
+    """Replace str values indicating not-a-number by float NaN.
+
+    All given columns are converted to float64 in one pass, values which can't be
+    converted become NaN.
+    """
+    if not columns:
+        return
+    converted = np.empty((len(data), len(columns)), dtype=np.float64)
+    obj_positions = []
+    for i, col in enumerate(columns):
+        if pd.api.types.is_numeric_dtype(data[col].dtype):
+            converted[:, i] = pd.to_numeric(data[col], errors="coerce").to_numpy(
+                dtype=np.float64, na_value=np.nan
+            )
+        else:
+            # object columns, but also extension dtypes like "string"
+            obj_positions.append(i)
+
+    if obj_positions:
+        # stack all non-numeric columns and convert every distinct value only once
+        obj_cols = [columns[i] for i in obj_positions]
+        codes, uniques = pd.factorize(data[obj_cols].astype(object).to_numpy().ravel(order="F"))
+        uniques = pd.Series(uniques, dtype=object)
+        replaced = uniques.map(lambda x: na_repl_dict.get(x, x) if isinstance(x, str) else x)
+        unique_values = pd.to_numeric(replaced, errors="coerce").to_numpy(
+            dtype=np.float64, na_value=np.nan
+        )
+        # missing values have the code -1 and map to the appended NaN
+        unique_values = np.append(unique_values, np.nan)
+        converted[:, obj_positions] = unique_values[codes].reshape(
+            (len(data), len(obj_cols)), order="F"
+        )
+
+    data[columns] = converted
 
 
 def preferred_unit(entity: str, units: dict[str, str]) -> str | None:
@@ -1479,8 +2006,8 @@ def harmonize_units(
     the unit that occurs first if conversion to the native unit is not possible). Units
     must already be in PRIMAP2 style.
 
-    As unit handling is tricky and with new units new problem occur this function has a
-    lot of (currently commented) debug output
+    The conversion factors are computed once per combination of entity and unit and
+    then applied to all rows in one pass.
 
     Parameters
     ----------
@@ -1507,106 +2034,125 @@ def harmonize_units(
         dim_aliases = _selection.translations_from_attrs(attrs, include_entity=True)
         entity_col = dim_aliases.get("entity", "entity")
     else:
+        dim_aliases = {}
         entity_col = "entity"
 
     if unit_col is None:
         unit_col = dim_aliases.get("unit", "unit")
 
+    # the conversion only depends on the combination of entity and unit, so it is
+    # worked out on the unique combinations first and applied to all rows afterwards
+    combinations = data[[entity_col, unit_col]].drop_duplicates()
+    entities = combinations[entity_col].to_numpy(dtype=object, copy=True)
+    units = combinations[unit_col].to_numpy(dtype=object, copy=True)
+    factors = np.ones(len(combinations))
+
     # find basic entities for all entities and make a list
-    entities = data[entity_col].unique()
     basic_entities = {}
-
-    # print(entities)
-    for entity in entities:
+    for entity in pd.unique(entities):
         # check if GWP given in entity
-        # print(f"entity: {entity}")
         gwp_match = re.findall(r"\(([A-Z0-9]*)\)$", entity)
         if gwp_match:
             gwp_to_use = gwp_match[0]
-            basic_entity = re.findall(r"^[^\(\)\s]*", entity)
-            basic_entity = basic_entity[0]
+            basic_entity = re.findall(r"^[^\(\)\s]*", entity)[0]
         else:
             gwp_to_use = None
             basic_entity = entity
-        # print(f"gwp: {gwp_to_use}")
-        # print(f"basic_entity: {basic_entity}")
         if basic_entity in basic_entities:
             basic_entities[basic_entity][entity] = gwp_to_use
         else:
             basic_entities[basic_entity] = {entity: gwp_to_use}
 
-    for basic_entity in basic_entities:
-        # print(f"basic_entity: {basic_entity}")
-        # print(f"entities: {basic_entities[basic_entity]}")
-        # get all units for this entity
-        data_this_basic_entity = data.loc[data[entity_col].isin(basic_entities[basic_entity])]
-        units_this_basic_entity = data_this_basic_entity[unit_col].unique()
+    for basic_entity, entity_gwps in basic_entities.items():
+        in_basic_entity = np.array([entity in entity_gwps for entity in entities], dtype=bool)
+        units_basic_entity_start = units.copy()
+        units_this_basic_entity = set(units[in_basic_entity])
         unit_gwp_this_basic_entity = {}
         gwp_conversion_this_basic_entity = False
-        for entity in basic_entities[basic_entity].keys():
-            data_this_entity = data_this_basic_entity.loc[data[entity_col] == entity]
-            units_this_entity = data_this_entity[unit_col].unique()
-            for unit in units_this_entity:
-                unit_gwp_this_basic_entity[unit] = basic_entities[basic_entity][entity]
-            if basic_entities[basic_entity][entity] is not None:
+        for entity, gwp in entity_gwps.items():
+            this_entity = in_basic_entity & (entities == entity)
+            for unit in pd.unique(units_basic_entity_start[this_entity]):
+                unit_gwp_this_basic_entity[unit] = gwp
+            if gwp is not None:
                 gwp_conversion_this_basic_entity = True
 
-            if len(units_this_basic_entity) > 1 or gwp_conversion_this_basic_entity:
-                # need unit conversion.
-                # determine unit to convert all units to. If none is found no conversion
-                # is carried out at all
-                unit_to = preferred_unit(basic_entity, unit_gwp_this_basic_entity)
-                # print(f"basic_entity: {basic_entity}, unit_to: {unit_to}")
-                if unit_to is not None:
-                    # print(f"unit conversion for {basic_entity}, "
-                    #      f"{basic_entities[basic_entity]}")
-                    for entity in basic_entities[basic_entity]:
-                        data_this_entity = data.loc[data[entity_col] == entity]
-                        units_this_entity = data_this_entity[unit_col].unique()
-
-                        for unit in units_this_entity:
-                            if unit != unit_to:
-                                # print(f"Working on unit {unit}")
-                                unit_pint = ureg[unit]
-                                # could add a try except block here to throw and log an
-                                # error or add error info in DF instead of crashing
-                                gwp_this_entity = basic_entities[basic_entity][entity]
-                                if gwp_this_entity:
-                                    with ureg.context(gwp_this_entity):
-                                        unit_pint = unit_pint.to(unit_to)
-                                else:
-                                    unit_pint = unit_pint.to(unit_to)
-                                # print(f"Pint unit is {unit_pint}")
-                                factor = unit_pint.magnitude
-                                # print(f"Converting with factor {factor} to unit
-                                # {unit_to}")
-                                mask = (data[entity_col] == entity) & (data[unit_col] == unit)
-                                # print(data.loc[mask, data_cols])
-                                try:
-                                    data.loc[mask, data_cols] *= factor
-                                except TypeError:
-                                    # print(data.loc[mask, data_cols])
-                                    strs = find_str_values_in_data(data, data_cols)
-                                    logger.error(
-                                        f"The following string values are present and "
-                                        f"can not be converted during unit conversion: "
-                                        f"{strs}."
-                                    )
-                                    raise ValueError(
-                                        f"String values {strs} prevent unit conversion."
-                                    ) from None
-
-                                data.loc[mask, unit_col] = unit_to
-
-                        # if entity differs from basic entity and the units are not
-                        # compatible we had GWP conversion and have to adapt the entity
-                        if (entity != basic_entity) and not ureg(unit).is_compatible_with(
-                            ureg[unit_to]
-                        ):
-                            # entity was converted
-                            entity_mask = data[entity_col] == entity
-                            # print(f"Changing entity from {entity} to {basic_entity}")
-                            data.loc[entity_mask, entity_col] = basic_entity
+            if len(units_this_basic_entity) <= 1 and not gwp_conversion_this_basic_entity:
+                continue
+            # need unit conversion.
+            # determine unit to convert all units to. If none is found no conversion
+            # is carried out at all
+            unit_to = preferred_unit(basic_entity, unit_gwp_this_basic_entity)
+            if unit_to is None:
+                continue
+
+            for entity_conv, gwp_conv in entity_gwps.items():
+                this_entity = entities == entity_conv
+                units_this_entity = pd.unique(units[this_entity])
+                for unit in units_this_entity:
+                    if unit != unit_to:
+                        mask = this_entity & (units == unit)
+                        factors[mask] *= unit_conversion_factor(unit, unit_to, gwp_conv)
+                        units[mask] = unit_to
+
+                # if entity differs from basic entity and the units are not
+                # compatible we had GWP conversion and have to adapt the entity
+                if (
+                    entity_conv != basic_entity
+                    and len(units_this_entity) > 0
+                    and not units_compatible(units_this_entity[-1], unit_to)
+                ):
+                    entities[this_entity] = basic_entity
+
+    converted = units != combinations[unit_col].to_numpy(dtype=object)
+    renamed = entities != combinations[entity_col].to_numpy(dtype=object)
+    changed = converted | renamed
+    if not changed.any():
+        return
+
+    # apply the conversion table to all rows at once
+    table = pd.MultiIndex.from_frame(combinations[changed])
+    positions = table.get_indexer(pd.MultiIndex.from_frame(data[[entity_col, unit_col]]))
+    rows = positions != -1
+    positions = positions[rows]
+    convert = np.zeros(len(data), dtype=bool)
+    convert[rows] = converted[changed][positions]
+
+    if convert.any():
+        # integer data can't hold the converted values
+        for col in data_cols:
+            if data[col].dtype.kind in "iub":
+                data[col] = data[col].astype(float)
+        row_factors = factors[changed][positions][converted[changed][positions]]
+        try:
+            for col in data_cols:
+                data.loc[convert, col] = data.loc[convert, col].to_numpy() * row_factors
+        except TypeError:
+            strs = find_str_values_in_data(data, data_cols)
+            logger.error(
+                f"The following string values are present and "
+                f"can not be converted during unit conversion: "
+                f"{strs}."
+            )
+            raise ValueError(f"String values {strs} prevent unit conversion.") from None
+
+    data.loc[rows, unit_col] = units[changed][positions]
+    data.loc[rows, entity_col] = entities[changed][positions]
+
+
+@functools.lru_cache
+def unit_conversion_factor(unit: str, unit_to: str, gwp_context: str | None) -> float:
+    """Factor to convert from unit to unit_to, using the given GWP context if any."""
+    unit_pint = ureg[unit]
+    if gwp_context:
+        with ureg.context(gwp_context):
+            return float(unit_pint.to(unit_to).magnitude)
+    return float(unit_pint.to(unit_to).magnitude)
+
+
+@functools.lru_cache
+def units_compatible(unit: str, unit_to: str) -> bool:
+    """Check if unit can be converted to unit_to without a context."""
+    return ureg(unit).is_compatible_with(ureg[unit_to])
 
 
 def sort_columns_and_rows(
@@ -1635,6 +2181,22 @@ def sort_columns_and_rows(
     """
     time_cols = list(set(data.columns.values) - set(dimensions))
 
+    cols_sorted = sort_dimension_columns(dimensions)
+
+    data: pd.DataFrame = data[cols_sorted + list(sorted(time_cols))]
+
+    data.sort_values(by=cols_sorted, inplace=True)
+    data.reset_index(inplace=True, drop=True)
+
+    return data, cols_sorted
+
+
+def sort_dimension_columns(dimensions: Iterable[str]) -> list[str]:
+    """Sort the dimension columns of the interchange format.
+
+    The columns are ordered according to the order in
+    INTERCHANGE_FORMAT_COLUMN_ORDER, with all other columns alphabetically at the end.
+    """
     other_cols = list(dimensions)
     cols_sorted = []
     for col in INTERCHANGE_FORMAT_COLUMN_ORDER:
@@ -1645,10 +2207,4 @@ def sort_columns_and_rows(
                 break
 
     cols_sorted += list(sorted(other_cols))
-
-    data: pd.DataFrame = data[cols_sorted + list(sorted(time_cols))]
-
-    data.sort_values(by=cols_sorted, inplace=True)
-    data.reset_index(inplace=True, drop=True)
-
-    return data, cols_sorted
+    return cols_sorted
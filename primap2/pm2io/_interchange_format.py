@@ -1,7 +1,9 @@
 import csv
+import io
 import itertools
 import re
 from pathlib import Path
+from typing import IO
 
 import numpy as np
 import pandas as pd
@@ -29,6 +31,9 @@ INTERCHANGE_FORMAT_COLUMN_ORDER = [
     "cat_name_translation",
 ]
 
+# key of the interchange format metadata in the metadata of parquet files
+PARQUET_METADATA_KEY = b"primap2_interchange_format"
+
 INTERCHANGE_FORMAT_STRICTYAML_SCHEMA = sy.Map(
     {
         sy.Optional("data_file"): sy.Str(),
@@ -56,31 +61,6 @@ INTERCHANGE_FORMAT_STRICTYAML_SCHEMA = sy.Map(
 )
 
 
-def dates_to_dimension(ds: xr.Dataset, time_format: str = "%Y") -> xr.DataArray:
-    """
-    This function converts a xr.Dataset where each time point is an individual
-    data variable to a xr.DataArray with a time dimension.
-    All variables which are not in the index are assumed to be time points.
-
-    Parameters
-    ----------
-    ds : xr.Dataset
-        Dataset with individual time points as data variables
-
-    time_format : str
-        format string for the time points. Default: %Y (for year only)
-
-    Returns
-    -------
-    reduced: xr.DataArray
-        xr.DataArray with the time as a dimension and time points as values
-    """
-    empty_vars = (x for x in ds if ds[x].count() == 0)
-    da = ds.drop_vars(empty_vars).to_array("time")
-    da["time"] = pd.to_datetime(da["time"].values, format=time_format, exact=False)
-    return da
-
-
 def metadata_for_variable(unit: str, variable: str) -> dict[str, str]:
     """Convert a primap2 unit and variable key to a metadata dict.
 
@@ -132,61 +112,142 @@ def metadata_for_variable(unit: str, variable: str) -> dict[str, str]:
 
 
 def write_interchange_format(
-    filepath: str | Path, data: pd.DataFrame, attrs: dict | None = None
+    filepath: str | Path,
+    data: pd.DataFrame,
+    attrs: dict | None = None,
+    *,
+    data_format: str = "csv",
 ) -> None:
     """Write dataset in interchange format to disk.
 
     Writes an interchange format dataset consisting of a pandas Dataframe and an
-    additional meta data dict to disk. The data is stored in a csv file while the
-    additional metadata is written to a yaml file.
+    additional meta data dict to disk. By default, the data is stored in a csv file
+    while the additional metadata is written to a yaml file. Alternatively, the data
+    and metadata can be stored together in a single parquet file, which is much
+    faster to read and write for large datasets and keeps the data types.
 
     Parameters
     ----------
     filepath: str or pathlib.Path
         path and filename stem for the dataset. If a file ending is given it will be
-        ignored and replaced by .csv for the data and .yaml for the metadata
+        ignored and replaced by .csv for the data and .yaml for the metadata, or by
+        .parquet if ``data_format="parquet"``.
 
     data: pandas.DataFrame
         DataFrame in PRIMAP2 interchange format
 
     attrs: dict, optional
         Interchange format meta data dict. Default: use data.attrs .
+
+    data_format: str, optional
+        Either "csv" to write a csv and a yaml file or "parquet" to write a single
+        parquet file. In the parquet file, the metadata is stored in the file
+        metadata, the dimension columns are stored dictionary-encoded, and the time
+        columns are stored as float64 if all entities have float data. Writing parquet
+        files needs the optional dependency ``pyarrow``. Default: "csv".
     """
     if attrs is None:
         attrs = data.attrs.copy()
     else:
         attrs = attrs.copy()
 
+    if data_format not in ("csv", "parquet"):
+        logger.error(f"Unknown data_format {data_format!r}, use 'csv' or 'parquet'.")
+        raise ValueError(f"Unknown data_format {data_format!r}.")
+
     # make sure filepath is a Path object
     filepath = Path(filepath)
-    data_file = filepath.parent / (filepath.stem + ".csv")
-    meta_file = filepath.parent / (filepath.stem + ".yaml")
 
     # sort the data for stable output
     data_sorted = data.sort_values(list(data.columns))
 
+    if data_format == "parquet":
+        write_interchange_format_parquet(
+            filepath.parent / (filepath.stem + ".parquet"), data_sorted, attrs
+        )
+        return
+
+    data_file = filepath.parent / (filepath.stem + ".csv")
+    meta_file = filepath.parent / (filepath.stem + ".yaml")
+
     # write the data
     data_sorted.to_csv(data_file, index=False, quoting=csv.QUOTE_NONNUMERIC)
 
     attrs["data_file"] = data_file.name
 
-    # we need to sort the metadata for stable output
+    with meta_file.open("w") as fd:
+        dump_interchange_format_attrs(attrs, fd)
+
+
+def dump_interchange_format_attrs(attrs: dict, stream: IO) -> None:
+    """Write interchange format metadata as yaml, sorted for stable output."""
     attrs_sorted = dict(sorted(attrs.items()))
-    for entry in attrs_sorted["dimensions"]:
-        attrs_sorted["dimensions"][entry] = list(sorted(attrs_sorted["dimensions"][entry]))
-    attrs_sorted["dimensions"] = dict(sorted(attrs_sorted["dimensions"].items()))
+    attrs_sorted["dimensions"] = {
+        entry: sorted(dims) for entry, dims in sorted(attrs_sorted["dimensions"].items())
+    }
     attrs_sorted["attrs"] = dict(sorted(attrs_sorted["attrs"].items()))
 
     yaml = YAML()
     # settings for strictyaml compatibility: don't use flow style or aliases
     yaml.default_flow_style = False
     yaml.representer.ignore_aliases = lambda x: True
-    with meta_file.open("w") as fd:
-        yaml.dump(attrs_sorted, fd)
+    yaml.dump(attrs_sorted, stream)
+
+
+def load_interchange_format_attrs(yaml_str: str) -> dict:
+    """Parse and validate interchange format metadata given as yaml."""
+    meta_data = sy.load(yaml_str, schema=INTERCHANGE_FORMAT_STRICTYAML_SCHEMA).data
+
+    # strictyaml parses a datetime, we only want a date
+    if "publication_date" in meta_data["attrs"]:
+        meta_data["attrs"]["publication_date"] = meta_data["attrs"]["publication_date"].date()
+
+    return meta_data
+
+
+def interchange_format_time_columns(data: pd.DataFrame, attrs: dict) -> list[str]:
+    """Get the names of all columns in the interchange format data which hold data."""
+    non_time_cols = set(itertools.chain(*attrs["dimensions"].values()))
+    non_time_cols |= set(attrs.get("additional_coordinates", {}).keys())
+    return [col for col in data.columns if col not in non_time_cols]
+
+
+def write_interchange_format_parquet(data_file: Path, data: pd.DataFrame, attrs: dict) -> None:
+    """Write interchange format data and metadata to a single parquet file."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    time_cols = interchange_format_time_columns(data, attrs)
+    # dimension columns hold few distinct values and are stored dictionary-encoded,
+    # time columns are stored as floats unless entities with other dtypes are present,
+    # in which case they are stored as strings like in the csv files
+    columns = {}
+    for col in data.columns:
+        if col in time_cols:
+            if attrs.get("dtypes"):
+                columns[col] = data[col].astype(str).where(data[col].notna(), None)
+            else:
+                columns[col] = pd.to_numeric(data[col]).astype(np.float64)
+        else:
+            columns[col] = data[col].astype("category")
+    table = pa.Table.from_pandas(pd.DataFrame(columns), preserve_index=False)
+
+    yaml_stream = io.StringIO()
+    dump_interchange_format_attrs(attrs, yaml_stream)
+    table = table.replace_schema_metadata(
+        {
+            **table.schema.metadata,
+            PARQUET_METADATA_KEY: yaml_stream.getvalue().encode("utf-8"),
+        }
+    )
+
+    pq.write_table(table, data_file)
 
 
 def read_interchange_format(
     filepath: str | Path,
+    *,
+    columns: list[str] | None = None,
 ) -> pd.DataFrame:
     """Read a dataset in the interchange format from disk into memory.
 
@@ -194,12 +255,24 @@ def read_interchange_format(
     in a csv file while the additional metadata is stored in a yaml
     file. This function takes the yaml file as parameter, the data file is specified
     in the yaml file. If no or a wrong ending is given the function tries to load
-    a file by the same name with the ending `.yaml`.
+    a file by the same name with the ending `.yaml`, or with the ending `.parquet` if
+    no yaml file exists.
+
+    Alternatively, the dataset can be stored in a single parquet file which contains
+    the data and the metadata, see :py:func:`write_interchange_format`. Reading
+    parquet files needs the optional dependency ``pyarrow``. Dimension columns are
+    read as pandas categoricals.
 
     Parameters
     ----------
     filepath: str or pathlib.Path
-        path and filename for the dataset (the yaml file, not data file).
+        path and filename for the dataset (the yaml file or the parquet file, not the
+        csv data file).
+    columns: list of str, optional
+        Only read the given columns. Only the data of the given columns is loaded
+        from disk for parquet files. Note that all dimension columns are needed to
+        convert the data using :py:func:`from_interchange_format`.
+        Default: read all columns.
 
     Returns
     -------
@@ -208,21 +281,24 @@ def read_interchange_format(
     """
     filepath = Path(filepath)
     if not filepath.exists():
-        filepath = filepath.with_suffix(".yaml")
+        if not filepath.with_suffix(".yaml").exists() and filepath.with_suffix(".parquet").exists():
+            filepath = filepath.with_suffix(".parquet")
+        else:
+            filepath = filepath.with_suffix(".yaml")
+
+    if filepath.suffix == ".parquet":
+        return read_interchange_format_parquet(filepath, columns=columns)
+
     with filepath.open() as meta_file:
-        yaml = sy.load(meta_file.read(), schema=INTERCHANGE_FORMAT_STRICTYAML_SCHEMA)
-        meta_data = yaml.data
+        meta_data = load_interchange_format_attrs(meta_file.read())
 
     data_file = filepath.parent / meta_data.get("data_file", filepath.stem + ".csv")
     if not data_file.exists():
         raise FileNotFoundError(f"Data file not found at {data_file}.")
 
-    data = pd.read_csv(data_file, dtype=object)
+    data = pd.read_csv(data_file, dtype=object, usecols=columns)
     data.attrs = meta_data
 
-    # strictyaml parses a datetime, we only want a date
-    if "publication_date" in data.attrs["attrs"]:
-        data.attrs["attrs"]["publication_date"] = data.attrs["attrs"]["publication_date"].date()
     # already read in
     if "data_file" in data.attrs:
         del data.attrs["data_file"]
@@ -230,6 +306,24 @@ def read_interchange_format(
     return data
 
 
+def read_interchange_format_parquet(
+    data_file: Path, *, columns: list[str] | None = None
+) -> pd.DataFrame:
+    """Read interchange format data and metadata from a single parquet file."""
+    import pyarrow.parquet as pq
+
+    table = pq.read_table(data_file, columns=columns)
+    metadata = table.schema.metadata or {}
+    if PARQUET_METADATA_KEY not in metadata:
+        logger.error(f"No interchange format metadata found in {data_file}.")
+        raise ValueError(f"No interchange format metadata found in {data_file}.")
+
+    data = table.to_pandas()
+    data.attrs = load_interchange_format_attrs(metadata[PARQUET_METADATA_KEY].decode("utf-8"))
+
+    return data
+
+
 def from_interchange_format(
     data: pd.DataFrame,
     attrs: dict | None = None,
@@ -288,24 +382,19 @@ def from_interchange_format(
 
         add_coord_mapping_dicts[coord] = dict(zip(dim_values, coord_values, strict=False))
 
-    # drop additional coordinates. make a copy first to not alter input DF
-    data_drop = data.drop(columns=attrs["additional_coordinates"].keys(), inplace=False)
-
     # find the time columns
     if_index_cols = set(itertools.chain(*attrs["dimensions"].values()))
-    time_cols = set(data_drop.columns.values) - if_index_cols
-
-    # convert to xarray
-    data_xr = data_drop.to_xarray()
+    time_cols = [
+        col
+        for col in data.columns
+        if col not in if_index_cols and col not in attrs["additional_coordinates"]
+    ]
     index_cols = if_index_cols - {"unit", "time"}
-    data_xr = data_xr.set_index({"index": list(index_cols)})
-    # take the units out as they increase dimensionality and we have only one unit per
-    # entity/variable
-    units = data_xr["unit"]
-    del data_xr["unit"]
+
+    entity_values = data[entity_col].to_numpy()
 
     # build full dimensions dict from specification with default from entry "*"
-    entities = np.unique(data_xr[entity_col].values)
+    entities = np.unique(entity_values)
     dimensions = attrs["dimensions"]
     for entity in entities:
         if entity not in dimensions:
@@ -320,7 +409,7 @@ def from_interchange_format(
             dtypes[entity] = "float"
 
     # check resulting shape to estimate memory consumption
-    dim_lens = {dim: len(np.unique(data_xr[dim].dropna("index"))) for dim in index_cols}
+    dim_lens = {dim: data[dim].nunique() for dim in index_cols}
     dim_lens["time"] = len(time_cols)
     shapes = []
     for _, dims in dimensions.items():
@@ -339,23 +428,51 @@ def from_interchange_format(
             f"continue, raise max_array_size."
         )
 
-    # convert time to dimension and entity to variables.
-    if "time_format" in attrs:
-        da = dates_to_dimension(data_xr, time_format=attrs["time_format"])
-    else:
-        da = dates_to_dimension(data_xr)
+    # time points without any data are dropped
+    values = data[time_cols]
+    time_cols = [col for col, has_data in values.notna().any().items() if has_data]
+    values = values[time_cols].to_numpy()
+    time = pd.to_datetime(time_cols, format=attrs.get("time_format", "%Y"), exact=False)
+
+    # convert entities to variables. Instead of unstacking a MultiIndex, the values of
+    # each dimension are factorized into integer codes, and the data of each entity is
+    # scattered into a preallocated array at the flat index computed from the codes.
     data_vars = {}
     for entity, dims in dimensions.items():
-        da_entity = da.loc[{entity_col: entity}]
-        # we still have a full MultiIndex, so trim it to the relevant dimensions
-        da_entity = da_entity.reset_index(list(index_cols - set(dims)), drop=True)
-        # depending on the version of xarray, an atomic, 0-dimensional coord
-        # for the entity remains. we have to remove it to be able to combine the
-        # dataset afterwards.
-        if entity_col in da_entity.coords:
-            da_entity = da_entity.drop_vars(entity_col)
-        # now we can safely unstack the index
-        data_vars[entity] = da_entity.unstack("index").astype(dtypes[entity])
+        rows = np.flatnonzero(entity_values == entity)
+        entity_dims = [dim for dim in dims if dim in index_cols and dim != entity_col]
+
+        codes = []
+        coords = {"time": time}
+        for dim in entity_dims:
+            dim_codes, dim_values = pd.factorize(data[dim].to_numpy()[rows], sort=True)
+            codes.append(dim_codes)
+            coords[dim] = dim_values
+        shape = tuple(len(coords[dim]) for dim in entity_dims)
+
+        # rows with missing dimension values can't be placed in the array
+        if codes:
+            valid = np.all(np.stack(codes) != -1, axis=0)
+            rows = rows[valid]
+            codes = [dim_codes[valid] for dim_codes in codes]
+        flat_index = np.ravel_multi_index(codes, shape) if codes else np.zeros(len(rows), int)
+        if len(np.unique(flat_index)) != len(flat_index):
+            logger.error(f"Duplicate rows in the interchange format data for {entity!r}.")
+            raise ValueError(f"Duplicate rows in the interchange format data for {entity!r}.")
+
+        # missing values are filled with NaN before conversion to the final dtype
+        if values.dtype.kind in "iuf":
+            fill_dtype = np.result_type(values.dtype, np.float64)
+        else:
+            fill_dtype = object
+        entity_values_arr = np.full((len(time_cols), int(np.prod(shape))), np.nan, fill_dtype)
+        entity_values_arr[:, flat_index] = values[rows].T
+
+        data_vars[entity] = xr.DataArray(
+            entity_values_arr.reshape((len(time_cols), *shape)),
+            coords=coords,
+            dims=["time", *entity_dims],
+        ).astype(dtypes[entity])
 
     data_xr = xr.Dataset(data_vars)
 
@@ -379,7 +496,9 @@ def from_interchange_format(
 
     # fill the entity/variable attributes
     for variable in data_xr:
-        csv_units = np.unique(units.loc[{entity_col: variable}], equal_nan=True)
+        csv_units = np.unique(
+            data["unit"].to_numpy()[entity_values == variable].astype(object), equal_nan=True
+        )
         if len(csv_units) > 1 and any(isinstance(x, str) for x in csv_units):
             logger.error(
                 f"More than one unit for entity {variable!r}: {csv_units!r}. "
@@ -0,0 +1,175 @@
+"""Caching of the results of reading files into the interchange format."""
+
+import functools
+import hashlib
+import inspect
+import io
+import os
+import tempfile
+import types
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+import pandas as pd
+from loguru import logger
+from ruamel.yaml import YAML
+
+# key under which the interchange format attrs are stored in the parquet file metadata
+CACHE_METADATA_KEY = b"primap2_read_cache_attrs"
+
+
+class UncacheableArgumentError(ValueError):
+    """Raised if a reader argument has no deterministic representation."""
+
+
+def canonical_repr(obj: Any) -> str:
+    """Deterministic representation of reader arguments for hashing.
+
+    Dicts and sets are sorted. Functions are represented by their qualified name and
+    their code, including constants, default arguments, and closure variables, so
+    that e.g. different lambdas get different representations. Global variables used
+    by functions are not included. Raises UncacheableArgumentError for objects
+    without a deterministic representation, i.e. objects using the default repr
+    which contains the memory address.
+    """
+    if isinstance(obj, dict):
+        items = sorted(f"{canonical_repr(k)}: {canonical_repr(v)}" for k, v in obj.items())
+        return "{" + ", ".join(items) + "}"
+    if isinstance(obj, set | frozenset):
+        return "{" + ", ".join(sorted(canonical_repr(x) for x in obj)) + "}"
+    if isinstance(obj, list):
+        return "[" + ", ".join(canonical_repr(x) for x in obj) + "]"
+    if isinstance(obj, tuple):
+        return "(" + ", ".join(canonical_repr(x) for x in obj) + ")"
+    if isinstance(obj, types.CodeType):
+        return (
+            f"<code {obj.co_code.hex()} {canonical_repr(obj.co_consts)} "
+            f"{canonical_repr(obj.co_names)}>"
+        )
+    if isinstance(obj, functools.partial):
+        return (
+            f"<partial {canonical_repr(obj.func)} {canonical_repr(obj.args)} "
+            f"{canonical_repr(obj.keywords)}>"
+        )
+    if isinstance(obj, types.MethodType):
+        return f"<method {canonical_repr(obj.__func__)} of {canonical_repr(obj.__self__)}>"
+    if isinstance(obj, types.FunctionType):
+        closure = tuple(cell.cell_contents for cell in obj.__closure__ or ())
+        return (
+            f"<function {obj.__module__}.{obj.__qualname__} "
+            f"{canonical_repr(obj.__code__)} {canonical_repr(obj.__defaults__)} "
+            f"{canonical_repr(obj.__kwdefaults__)} {canonical_repr(closure)}>"
+        )
+    if isinstance(obj, types.BuiltinFunctionType | types.BuiltinMethodType) or (
+        callable(obj) and not hasattr(obj, "__dict__") and hasattr(obj, "__qualname__")
+    ):
+        # builtins like len or str.upper are identified by their name
+        self_obj = getattr(obj, "__self__", None)
+        if self_obj is not None and not isinstance(self_obj, types.ModuleType):
+            return f"<builtin {obj.__qualname__} of {canonical_repr(self_obj)}>"
+        module = getattr(obj, "__module__", None)
+        name = obj.__qualname__ if module is None else f"{module}.{obj.__qualname__}"
+        return f"<builtin {name}>"
+    if type(obj).__repr__ is object.__repr__:
+        raise UncacheableArgumentError(f"{obj!r} has no deterministic representation.")
+    return repr(obj)
+
+
+def read_cache_key(*, filepath: Path, reader: str, arguments: dict[str, Any]) -> str:
+    """Hash the content of the input file and the reader arguments into a cache key."""
+    # local import to avoid circular imports
+    from .. import __version__
+
+    h = hashlib.sha256()
+    h.update(f"{__version__}\0{reader}\0{canonical_repr(arguments)}\0".encode())
+    with filepath.open("rb") as fd:
+        for block in iter(lambda: fd.read(2**20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def cache_file(cache_dir: Path, key: str) -> Path:
+    # use subdirectories to avoid too many files in one directory
+    return cache_dir / key[:2] / f"{key}.parquet"
+
+
+def read_cached(file: Path) -> pd.DataFrame:
+    """Read a cached interchange format DataFrame."""
+    import pyarrow.parquet as pq
+
+    table = pq.read_table(file)
+    data = table.to_pandas()
+    yaml = YAML(typ="safe")
+    data.attrs = yaml.load(table.schema.metadata[CACHE_METADATA_KEY].decode("utf-8"))
+    return data
+
+
+def write_cached(file: Path, data: pd.DataFrame) -> None:
+    """Store an interchange format DataFrame in the cache."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    try:
+        table = pa.Table.from_pandas(data, preserve_index=False)
+    except (pa.ArrowInvalid, pa.ArrowTypeError) as err:
+        # e.g. time columns with mixed strings and numbers
+        logger.warning(f"Could not store read data in the cache: {err}")
+        return
+
+    stream = io.StringIO()
+    yaml = YAML(typ="safe")
+    yaml.default_flow_style = False
+    yaml.dump(data.attrs, stream)
+    table = table.replace_schema_metadata(
+        {**table.schema.metadata, CACHE_METADATA_KEY: stream.getvalue().encode("utf-8")}
+    )
+
+    file.parent.mkdir(parents=True, exist_ok=True)
+    # write to a temporary file first so that concurrent readers never see
+    # partially written files
+    fd, tmp_name = tempfile.mkstemp(dir=file.parent, suffix=".tmp")
+    os.close(fd)
+    pq.write_table(table, tmp_name)
+    os.replace(tmp_name, file)
+
+
+def cacheable_reader(reader: Callable[..., pd.DataFrame]) -> Callable[..., pd.DataFrame]:
+    """Add caching of the results to a reader function.
+
+    The reader function has to take the path of the file to read as the first
+    argument and have a ``cache_dir`` argument. If ``cache_dir`` is given and the
+    file is given as a path, the result is looked up in the cache directory under a
+    hash of the file content and all other arguments, and stored there if it is not
+    found.
+    """
+    signature = inspect.signature(reader)
+    path_argument = next(iter(signature.parameters))
+
+    @functools.wraps(reader)
+    def wrapper(*args, **kwargs):
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        arguments = dict(bound.arguments)
+        cache_dir = arguments.pop("cache_dir")
+        filepath = arguments.pop(path_argument)
+        if cache_dir is None or not isinstance(filepath, str | Path):
+            return reader(*args, **kwargs)
+
+        try:
+            key = read_cache_key(
+                filepath=Path(filepath), reader=reader.__qualname__, arguments=arguments
+            )
+        except UncacheableArgumentError as err:
+            logger.info(f"Not caching the result for {filepath}: {err}")
+            return reader(*args, **kwargs)
+        file = cache_file(Path(cache_dir), key)
+        if file.exists():
+            logger.debug(f"Using cached result for {filepath} from {file}.")
+            return read_cached(file)
+
+        data = reader(filepath, cache_dir=None, **arguments)
+        write_cached(file, data)
+        return data
+
+    return wrapper
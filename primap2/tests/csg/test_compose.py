@@ -1,5 +1,7 @@
 """Tests for csg/_compose.py"""
 
+import concurrent.futures
+
 import numpy as np
 import pandas as pd
 import pytest
@@ -738,3 +740,451 @@ def test_priority_coordinates_repr():
         )
         == "'S'"
     )
+
+
+def test_compose_batched_identical(opulent_ds):
+    """Batched composing gives exactly the same results as composing every timeseries
+    on its own, also with negative selections, exclusions, and strategies which can't
+    be batched."""
+    input_data = opulent_ds.drop_vars(["population"]).pr.loc[
+        {"product": ["milk"], "category": ["0", "1", "1.A"]}
+    ]
+    input_data["CO2"].loc[{"source": "RAND2020", "time": ["2000", "2001"]}] = np.nan * primap2.ureg(
+        "Mt CO2 / year"
+    )
+    input_data["CO2"].loc[
+        {"source": "RAND2021", "scenario (FAOSTAT)": "highpop", "time": "2000"}
+    ] = np.nan * primap2.ureg("Mt CO2 / year")
+    input_data["CH4"].loc[{"source": "RAND2020", "area (ISO3)": "ARG"}] = np.nan * primap2.ureg(
+        "Mt CH4 / year"
+    )
+
+    class CopyingStrategy:
+        """Strategy without fill_many."""
+
+        type = "copying"
+
+        def fill(
+            self,
+            *,
+            ts: xr.DataArray,
+            fill_ts: xr.DataArray,
+            fill_ts_repr: str,
+        ) -> tuple[xr.DataArray, list[primap2.ProcessingStepDescription]]:
+            return primap2.csg.SubstitutionStrategy().fill(
+                ts=ts, fill_ts=fill_ts, fill_ts_repr=fill_ts_repr
+            )
+
+    priority_definition = primap2.csg.PriorityDefinition(
+        priority_dimensions=["source", "scenario (FAOSTAT)"],
+        priorities=[
+            {
+                "area (ISO3)": primap2.Not(["COL", "MEX"]),
+                "source": "RAND2021",
+                "scenario (FAOSTAT)": "lowpop",
+            },
+            {"source": "RAND2020", "scenario (FAOSTAT)": "lowpop"},
+            {"source": "RAND2021", "scenario (FAOSTAT)": "highpop"},
+            {"source": "RAND2022", "scenario (FAOSTAT)": "highpop"},
+            {"source": "RAND2021", "scenario (FAOSTAT)": "lowpop"},
+        ],
+        exclude_input=[
+            {"source": "RAND2021", "scenario (FAOSTAT)": "lowpop", "animal (FAOSTAT)": "cow"},
+        ],
+        exclude_result=[{"entity": "SF6", "category (IPCC 2006)": "1.A"}],
+    )
+    strategy_definition = primap2.csg.StrategyDefinition(
+        strategies=[
+            ({"area (ISO3)": "BOL", "source": "RAND2021"}, CopyingStrategy()),
+            ({}, primap2.csg.SubstitutionStrategy()),
+        ]
+    )
+
+    result_batched = primap2.csg.compose(
+        input_data=input_data,
+        priority_definition=priority_definition,
+        strategy_definition=strategy_definition,
+        progress_bar=None,
+    )
+    result_single = primap2.csg.compose(
+        input_data=input_data,
+        priority_definition=priority_definition,
+        strategy_definition=strategy_definition,
+        progress_bar=None,
+        batched=False,
+    )
+
+    processing_vars = [var for var in result_single if var.startswith("Processing of ")]
+    xr.testing.assert_identical(
+        result_batched.drop_vars(processing_vars), result_single.drop_vars(processing_vars)
+    )
+    for var in processing_vars:
+        assert result_batched[var].dims == result_single[var].dims
+        np.testing.assert_array_equal(
+            np.vectorize(str)(result_batched[var].data),
+            np.vectorize(str)(result_single[var].data),
+        )
+    # make sure the test covers interesting cases
+    processing_ch4 = result_batched["Processing of CH4"].pr.loc[
+        {"area": "ARG", "animal": "cow", "category": "0"}
+    ]
+    assert len(processing_ch4.item().steps) == 3
+    assert result_batched["Processing of SF6"].pr.loc[{"category": "1.A"}].isnull().all()
+
+
+@pytest.mark.parametrize("batched", [True, False])
+def test_compose_parallel(opulent_ds, batched):
+    """Composing in worker processes gives the same results as composing serially."""
+    input_data = opulent_ds.drop_vars(["population"]).pr.loc[
+        {"product": ["milk"], "category": ["0", "1"]}
+    ]
+    input_data["CO2"].loc[{"source": "RAND2020", "time": ["2000", "2001"]}] = np.nan * primap2.ureg(
+        "Mt CO2 / year"
+    )
+    priority_definition = primap2.csg.PriorityDefinition(
+        priority_dimensions=["source", "scenario (FAOSTAT)"],
+        priorities=[
+            {"area (ISO3)": "COL", "source": "RAND2021", "scenario (FAOSTAT)": "lowpop"},
+            {"source": "RAND2020", "scenario (FAOSTAT)": "lowpop"},
+            {"source": "RAND2021", "scenario (FAOSTAT)": "highpop"},
+        ],
+        exclude_result=[{"entity": "SF6", "category (IPCC 2006)": "1"}],
+    )
+    strategy_definition = primap2.csg.StrategyDefinition(
+        strategies=[({}, primap2.csg.SubstitutionStrategy())]
+    )
+
+    result_serial = primap2.csg.compose(
+        input_data=input_data,
+        priority_definition=priority_definition,
+        strategy_definition=strategy_definition,
+        progress_bar=None,
+        batched=batched,
+    )
+    result_parallel = primap2.csg.compose(
+        input_data=input_data,
+        priority_definition=priority_definition,
+        strategy_definition=strategy_definition,
+        batched=batched,
+        n_workers=2,
+    )
+
+    processing_vars = [var for var in result_serial if var.startswith("Processing of ")]
+    xr.testing.assert_identical(
+        result_parallel.drop_vars(processing_vars), result_serial.drop_vars(processing_vars)
+    )
+    for var in processing_vars:
+        assert result_parallel[var].dims == result_serial[var].dims
+        np.testing.assert_array_equal(
+            np.vectorize(str)(result_parallel[var].data),
+            np.vectorize(str)(result_serial[var].data),
+        )
+
+
+def test_compose_executor_and_n_workers(opulent_ds):
+    with (
+        concurrent.futures.ThreadPoolExecutor() as executor,
+        pytest.raises(ValueError, match="Only one of n_workers and executor"),
+    ):
+        primap2.csg.compose(
+            input_data=opulent_ds,
+            priority_definition=primap2.csg.PriorityDefinition(
+                priority_dimensions=["source"], priorities=[{"source": "RAND2020"}]
+            ),
+            strategy_definition=primap2.csg.StrategyDefinition(
+                strategies=[({}, primap2.csg.SubstitutionStrategy())]
+            ),
+            n_workers=2,
+            executor=executor,
+        )
+
+
+def test_compose_batched_global_ls(opulent_ds):
+    """Batched composing with the GlobalLSStrategy gives the same results as composing
+    every timeseries on its own, also when the strategy is unable to process some
+    timeseries."""
+    input_data = opulent_ds.drop_vars(["population", "SF6 (SARGWP100)"]).pr.loc[
+        {"product": ["milk"], "category": ["0", "1"]}
+    ]
+    input_data["CO2"].loc[{"source": "RAND2020", "time": ["2000", "2001"]}] = np.nan * primap2.ureg(
+        "Mt CO2 / year"
+    )
+    # no overlap for CH4 in ARG
+    input_data["CH4"].loc[{"source": "RAND2020", "area (ISO3)": "ARG", "time": "2020"}] = (
+        np.nan * primap2.ureg("Mt CH4 / year")
+    )
+    input_data["CH4"].loc[
+        {"source": "RAND2021", "area (ISO3)": "ARG", "time": slice("2000", "2019")}
+    ] = np.nan * primap2.ureg("Mt CH4 / year")
+    priority_definition = primap2.csg.PriorityDefinition(
+        priority_dimensions=["source", "scenario (FAOSTAT)"],
+        priorities=[
+            {"source": "RAND2020", "scenario (FAOSTAT)": "lowpop"},
+            {"source": "RAND2021", "scenario (FAOSTAT)": "highpop"},
+        ],
+    )
+    strategy_definition = primap2.csg.StrategyDefinition(
+        strategies=[
+            ({"source": "RAND2021"}, primap2.csg.GlobalLSStrategy()),
+            ({}, primap2.csg.SubstitutionStrategy()),
+        ]
+    )
+
+    result_batched = primap2.csg.compose(
+        input_data=input_data,
+        priority_definition=priority_definition,
+        strategy_definition=strategy_definition,
+        progress_bar=None,
+    )
+    result_single = primap2.csg.compose(
+        input_data=input_data,
+        priority_definition=priority_definition,
+        strategy_definition=strategy_definition,
+        progress_bar=None,
+        batched=False,
+    )
+
+    processing_vars = [var for var in result_single if var.startswith("Processing of ")]
+    xr.testing.assert_allclose(
+        result_batched.drop_vars(processing_vars).pr.dequantify(),
+        result_single.drop_vars(processing_vars).pr.dequantify(),
+    )
+    for var in processing_vars:
+        np.testing.assert_array_equal(
+            np.vectorize(str)(result_batched[var].data),
+            np.vectorize(str)(result_single[var].data),
+        )
+    tpd = result_batched["Processing of CH4"].pr.loc[{"area": "ARG"}].data.flat[0]
+    assert tpd.steps[1].description.startswith("strategy globalLS unable to process")
+    assert tpd.steps[2].function == "substitution"
+
+
+@pytest.mark.parametrize("batched", [True, False])
+@pytest.mark.parametrize("on_disk", [True, False])
+def test_compose_cache(opulent_ds, tmp_path, batched, on_disk):
+    input_data = opulent_ds.drop_vars(["population"]).pr.loc[
+        {"product": ["milk"], "category": ["0", "1"], "animal": ["cow"]}
+    ]
+    input_data["CO2"].loc[{"source": "RAND2020", "time": ["2000", "2001"]}] = np.nan * primap2.ureg(
+        "Mt CO2 / year"
+    )
+    priority_definition = primap2.csg.PriorityDefinition(
+        priority_dimensions=["source", "scenario (FAOSTAT)"],
+        priorities=[
+            {"source": "RAND2020", "scenario (FAOSTAT)": "lowpop"},
+            {"source": "RAND2021", "scenario (FAOSTAT)": "highpop"},
+        ],
+        exclude_result=[{"entity": "SF6", "category (IPCC 2006)": "1"}],
+    )
+    strategy_definition = primap2.csg.StrategyDefinition(
+        strategies=[({}, primap2.csg.SubstitutionStrategy())]
+    )
+    cache = primap2.csg.ComposeCache(tmp_path / "cache" if on_disk else None)
+
+    def compose(input_data):
+        return primap2.csg.compose(
+            input_data=input_data,
+            priority_definition=priority_definition,
+            strategy_definition=strategy_definition,
+            progress_bar=None,
+            batched=batched,
+            cache=cache,
+        )
+
+    n_ts = sum(
+        result_da.count().item()
+        for var, result_da in compose(input_data).items()
+        if var.startswith("Processing of ")
+    )
+    assert cache.hits == 0
+    assert cache.misses == n_ts
+
+    result_uncached = primap2.csg.compose(
+        input_data=input_data,
+        priority_definition=priority_definition,
+        strategy_definition=strategy_definition,
+        progress_bar=None,
+    )
+    result_cached = compose(input_data)
+    assert cache.hits == n_ts
+    assert cache.misses == n_ts
+    processing_vars = [var for var in result_uncached if var.startswith("Processing of ")]
+    xr.testing.assert_identical(
+        result_cached.drop_vars(processing_vars), result_uncached.drop_vars(processing_vars)
+    )
+    for var in processing_vars:
+        # like when writing to netcdf, times are truncated to years when storing
+        # processing descriptions on disk
+        serialize = np.vectorize(lambda x: x if x is None else x.serialize())
+        np.testing.assert_array_equal(
+            serialize(result_cached[var].data), serialize(result_uncached[var].data)
+        )
+
+    # changing the input data of one timeseries only computes that timeseries again
+    changed_data = input_data.copy(deep=True)
+    changed_data["CO2"].loc[
+        {"source": "RAND2021", "area (ISO3)": "COL", "category (IPCC 2006)": "0"}
+    ] = 1.0 * primap2.ureg("Mt CO2 / year")
+    result_changed = compose(changed_data)
+    assert cache.misses == n_ts + 1
+    assert cache.hits == 2 * n_ts - 1
+    assert result_changed["CO2"].pr.loc[{"area": "COL", "category": "0", "time": "2000"}].pint.to(
+        "Mt CO2 / year"
+    ).item().magnitude == pytest.approx(1.0)
+
+
+@pytest.mark.parametrize("fill_batched", [True, False])
+def test_compose_cache_shared_between_modes(opulent_ds, fill_batched):
+    input_data = opulent_ds.drop_vars(["population"]).pr.loc[
+        {"product": ["milk"], "category": ["0", "1"], "animal": ["cow"]}
+    ]
+    input_data["CO2"].loc[{"source": "RAND2020", "time": ["2000", "2001"]}] = np.nan * primap2.ureg(
+        "Mt CO2 / year"
+    )
+    priority_definition = primap2.csg.PriorityDefinition(
+        priority_dimensions=["source", "scenario (FAOSTAT)"],
+        priorities=[
+            {"source": "RAND2020", "scenario (FAOSTAT)": "lowpop"},
+            {"source": "RAND2021", "scenario (FAOSTAT)": "highpop"},
+        ],
+    )
+    strategy_definition = primap2.csg.StrategyDefinition(
+        strategies=[({}, primap2.csg.SubstitutionStrategy())]
+    )
+    cache = primap2.csg.ComposeCache()
+
+    def compose(batched):
+        return primap2.csg.compose(
+            input_data=input_data,
+            priority_definition=priority_definition,
+            strategy_definition=strategy_definition,
+            progress_bar=None,
+            batched=batched,
+            cache=cache,
+        )
+
+    result_filled = compose(fill_batched)
+    n_ts = cache.misses
+    assert n_ts > 0
+    # results cached in one mode are found in the other mode
+    result_read = compose(not fill_batched)
+    assert cache.hits == n_ts
+    assert cache.misses == n_ts
+    processing_vars = [var for var in result_filled if var.startswith("Processing of ")]
+    xr.testing.assert_identical(
+        result_read.drop_vars(processing_vars), result_filled.drop_vars(processing_vars)
+    )
+    for var in processing_vars:
+        np.testing.assert_array_equal(
+            np.vectorize(str)(result_read[var].data), np.vectorize(str)(result_filled[var].data)
+        )
+
+
+def test_compose_incremental(opulent_ds):
+    input_data = opulent_ds.drop_vars(["population"]).pr.loc[
+        {"product": ["milk"], "category": ["0", "1"]}
+    ]
+    input_data["CO2"].loc[{"source": "RAND2020", "time": ["2000", "2001"]}] = np.nan * primap2.ureg(
+        "Mt CO2 / year"
+    )
+    priority_definition = primap2.csg.PriorityDefinition(
+        priority_dimensions=["source", "scenario (FAOSTAT)"],
+        priorities=[
+            {"source": "RAND2020", "scenario (FAOSTAT)": "lowpop"},
+            {"source": "RAND2021", "scenario (FAOSTAT)": "highpop"},
+        ],
+        exclude_result=[{"entity": "SF6", "category (IPCC 2006)": "1"}],
+    )
+    strategy_definition = primap2.csg.StrategyDefinition(
+        strategies=[({}, primap2.csg.SubstitutionStrategy())]
+    )
+    previous_result = primap2.csg.compose(
+        input_data=input_data,
+        priority_definition=priority_definition,
+        strategy_definition=strategy_definition,
+        progress_bar=None,
+    )
+
+    changed_data = input_data.copy(deep=True)
+    # used to fill CO2 in 2000 and 2001
+    changed_data["CO2"].loc[
+        {"source": "RAND2021", "scenario (FAOSTAT)": "highpop", "area (ISO3)": ["COL", "ARG"]}
+    ] = 1.0 * primap2.ureg("Mt CO2 / year")
+    # not used at all
+    changed_data["CH4"].loc[{"source": "RAND2021", "area (ISO3)": ["COL", "ARG"]}] = (
+        1.0 * primap2.ureg("Mt CH4 / year")
+    )
+    changed_selection = {"source": "RAND2021", "area (ISO3)": ["COL", "ARG"]}
+
+    result_incremental = primap2.csg.compose_incremental(
+        previous_result=previous_result,
+        input_data=changed_data,
+        changed_selection=changed_selection,
+        priority_definition=priority_definition,
+        strategy_definition=strategy_definition,
+        progress_bar=None,
+    )
+    result_full = primap2.csg.compose(
+        input_data=changed_data,
+        priority_definition=priority_definition,
+        strategy_definition=strategy_definition,
+        progress_bar=None,
+    )
+
+    processing_vars = [var for var in result_full if var.startswith("Processing of ")]
+    xr.testing.assert_identical(
+        result_incremental.drop_vars(processing_vars), result_full.drop_vars(processing_vars)
+    )
+    for var in processing_vars:
+        np.testing.assert_array_equal(
+            np.vectorize(str)(result_incremental[var].data),
+            np.vectorize(str)(result_full[var].data),
+        )
+    changed_co2 = result_incremental["CO2"].pr.loc[{"area": "COL", "time": "2000"}]
+    np.testing.assert_allclose(changed_co2.pint.to("Mt CO2 / year").pint.magnitude, 1.0)
+    # the previous result is unchanged
+    previous_co2 = previous_result["CO2"].pr.loc[{"area": "COL", "time": "2000"}]
+    assert not np.isclose(previous_co2.pint.to("Mt CO2 / year").pint.magnitude, 1.0).any()
+
+
+def test_compose_incremental_affected_timeseries(opulent_ds):
+    input_data = opulent_ds.drop_vars(["population"]).pr.loc[
+        {"product": ["milk"], "category": ["0", "1"]}
+    ]
+    input_data["CO2"].loc[{"source": "RAND2020", "time": ["2000", "2001"]}] = np.nan * primap2.ureg(
+        "Mt CO2 / year"
+    )
+    priority_definition = primap2.csg.PriorityDefinition(
+        priority_dimensions=["source", "scenario (FAOSTAT)"],
+        priorities=[
+            {"source": "RAND2020", "scenario (FAOSTAT)": "lowpop"},
+            {"source": "RAND2021", "scenario (FAOSTAT)": "highpop"},
+        ],
+    )
+    previous_result = primap2.csg.compose(
+        input_data=input_data,
+        priority_definition=priority_definition,
+        strategy_definition=primap2.csg.StrategyDefinition(
+            strategies=[({}, primap2.csg.SubstitutionStrategy())]
+        ),
+        progress_bar=None,
+    )
+
+    def affected(variable, changed_selection):
+        return primap2.csg._incremental.affected_timeseries(
+            input_da=input_data[variable],
+            previous_processing=previous_result[f"Processing of {variable}"],
+            changed_selection=changed_selection,
+            priority_dimensions=priority_definition.priority_dimensions,
+        )
+
+    # the lower priority source is only used for CO2
+    assert affected("CO2", {"source": "RAND2021"}).all()
+    assert not affected("CH4", {"source": "RAND2021"}).any()
+    # sources not in the priorities are never used
+    assert not affected("CO2", {"source": "RAND2022"}).any()
+    # the highest priority source is always used
+    co2_col = affected("CO2", {"source": "RAND2020", "area (ISO3)": "COL"})
+    assert co2_col.loc[{"area (ISO3)": "COL"}].all()
+    assert co2_col.sum() == co2_col.loc[{"area (ISO3)": "COL"}].size
+    assert affected("CH4", {"scenario (FAOSTAT)": "lowpop"}).all()
@@ -1,3 +1,5 @@
+import itertools
+
 import pytest
 
 import primap2.csg
@@ -269,3 +271,49 @@ def test_priority_check():
             ],
             exclude_result=[{"c": "5"}, {"d": ["6", "7"], "a": "3"}],
         ).check_dimensions()
+
+
+def test_priority_limit_indexed():
+    pd = primap2.csg.PriorityDefinition(
+        priority_dimensions=["a", "b"],
+        priorities=[
+            {
+                "a": "1",
+                "b": "2",
+                "c": "3",
+                "d": ["4", "5"],
+                "e": Not("6"),
+                "f": Not(["7", "8"]),
+            },
+            {"a": "2", "b": "3", "d": "6"},
+            {"a": "2", "b": "3"},
+        ],
+        exclude_result=[{"c": "4"}],
+        exclude_input=[{"a": "1", "c": "3", "d": "4"}],
+    )
+    dimensions = ["c", "d", "e", "f"]
+    index = pd.index(dimensions)
+    assert index.selectors == [{"a": "1", "b": "2"}, {"a": "2", "b": "3"}, {"a": "2", "b": "3"}]
+    assert list(index.indices(index.all_selectors)) == [0, 1, 2]
+
+    for values in itertools.product(["3", "4"], ["4", "5", "6"], ["6", "7"], ["6", "7", "8"]):
+        expected = pd
+        matches = index.all_selectors
+        for dim, value in zip(dimensions, values, strict=True):
+            expected = expected.limit(dim, value)
+            matches &= index.matching(dim, value)
+        assert pd.limit_indexed(index, matches) == expected
+
+
+def test_strategy_definition_limit_indexed():
+    sd = primap2.csg.StrategyDefinition(
+        [
+            ({"entity": "A", "source": "S"}, 1),
+            ({"entity": ["A", "B"], "area": "COL"}, 2),
+            ({"source": "T"}, 3),
+        ]
+    )
+    index = sd.index(["entity", "area"])
+    for entity, area in itertools.product(["A", "B", "C"], ["COL", "MEX"]):
+        matches = index.matching("entity", entity) & index.matching("area", area)
+        assert sd.limit_indexed(index, matches) == sd.limit("entity", entity).limit("area", area)
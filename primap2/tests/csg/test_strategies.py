@@ -113,3 +113,70 @@ def test_globalLS_strategy():
 
     # general
     assert "source" not in result_ts.coords.keys()
+
+
+@pytest.mark.parametrize(
+    "strategy",
+    [
+        primap2.csg.SubstitutionStrategy(),
+        primap2.csg.GlobalLSStrategy(),
+        primap2.csg.GlobalLSStrategy(allow_shift=False),
+    ],
+    ids=lambda x: f"{x.type}{getattr(x, 'allow_shift', '')}",
+)
+def test_strategies_fill_many(strategy):
+    """fill_many gives the same results as fill for every row."""
+    rng = np.random.default_rng(1)
+    time = get_single_ts()["time"].to_numpy()
+    n = 40
+    ts = rng.random((n, len(time))) + 1.0
+    fill_ts = rng.random((n, len(time))) * 2.0 + 0.5
+    ts[:, 100:] = np.nan
+    # no overlap
+    fill_ts[0, :100] = np.nan
+    # nothing to fill
+    fill_ts[1, 100:] = np.nan
+    # constant fill values in the overlap
+    fill_ts[2, :100] = 3.0
+    # single overlapping point
+    ts[3, 1:100] = np.nan
+    # negative values after harmonization with shift
+    ts[4, :100] = np.linspace(0.0, 1.0, 100)
+    fill_ts[4, :100] = np.linspace(10.0, 11.0, 100)
+    fill_ts[4, 100:] = 1.0
+    # all values missing
+    ts[5, :] = np.nan
+    # fill values zero everywhere
+    fill_ts[6, :] = 0.0
+    initial_ts = ts.copy()
+    initial_fill_ts = fill_ts.copy()
+
+    filled_ts, descriptions, unable = strategy.fill_many(
+        ts=ts, fill_ts=fill_ts, time=time, fill_ts_repr="B"
+    )
+
+    np.testing.assert_array_equal(ts, initial_ts)
+    np.testing.assert_array_equal(fill_ts, initial_fill_ts)
+    assert filled_ts.shape == ts.shape
+    assert len(descriptions) == n
+    assert unable.shape == (n,)
+
+    for i in range(n):
+        try:
+            expected_ts, expected_descriptions = strategy.fill(
+                ts=get_single_ts(data=ts[i]),
+                fill_ts=get_single_ts(data=fill_ts[i]),
+                fill_ts_repr="B",
+            )
+        except StrategyUnableToProcess:
+            assert unable[i]
+            continue
+        assert not unable[i]
+        np.testing.assert_allclose(filled_ts[i], expected_ts.to_numpy(), rtol=1e-10)
+        assert [str(x) for x in descriptions[i]] == [str(x) for x in expected_descriptions]
+
+    if isinstance(strategy, primap2.csg.GlobalLSStrategy):
+        assert unable[0]
+        assert not unable[1]
+        if strategy.allow_shift:
+            assert unable[4]
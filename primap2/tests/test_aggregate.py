@@ -632,6 +632,29 @@ class TestAddAggregatesCoordinates:
         )
         xr.testing.assert_allclose(expected_result_CO2, actual_result_CO2)
 
+    @pytest.mark.parametrize("area_filter", ["COL", ["COL"]], ids=["scalar", "list"])
+    def test_add_aggregates_coordinates_filter_dimension(self, opulent_ds, area_filter):
+        """Test that scalar and list filter values only aggregate the selected data"""
+        ds = opulent_ds.drop_vars("population")
+        test_ds = ds.pr.add_aggregates_coordinates(
+            agg_info={
+                "category (IPCC 2006)": {
+                    "X": {
+                        "sources": ["1", "2"],
+                        "filter": {"area (ISO3)": area_filter},
+                        "category_names": "X",
+                    }
+                }
+            }
+        )
+
+        expected = ds["CO2"].pr.loc[{"category": ["1", "2"], "area": "COL"}].pr.sum("category")
+        actual = test_ds["CO2"].pr.loc[{"category": "X", "area": "COL"}]
+        xr.testing.assert_allclose(
+            expected, actual.drop_vars(["category (IPCC 2006)", "category_names"])
+        )
+        assert test_ds["CO2"].pr.loc[{"category": "X", "area": "ARG"}].isnull().all()
+
     def test_add_aggregates_coordinates_warning(self, minimal_ds, caplog):
         """
         Test warnings
@@ -723,6 +746,128 @@ class TestAddAggregatesCoordinates:
 
         assert "All Countries" in test_ds.coords["area_name"]
 
+    def test_add_aggregates_coordinates_add_coord_mixed(self, minimal_ds):
+        """Test error if only some rules of a level give an additional coordinate"""
+        test_ds = minimal_ds.assign_coords(area_name=("area (ISO3)", ["COL", "ARG", "MEX", "BOL"]))
+
+        with pytest.raises(
+            ValueError,
+            match="Additional coordinate 'area_name' specified for some aggregates, "
+            r"but not for \['NAM'\]",
+        ):
+            test_ds.pr.add_aggregates_coordinates(
+                agg_info={
+                    "area (ISO3)": {
+                        "SAM": {"sources": ["COL", "ARG", "BOL"], "area_name": "South"},
+                        "NAM": ["MEX"],
+                    }
+                }
+            )
+
+    def test_add_aggregates_coordinates_hierarchy(self, minimal_ds):
+        """Test that aggregates can be used as sources of later rules"""
+        agg_info = {
+            "area (ISO3)": {
+                "SAM": ["COL", "ARG", "BOL"],
+                "all": ["SAM", "MEX"],
+                "COL": {"sources": ["MEX"], "tolerance": 100},
+            }
+        }
+        test_ds = minimal_ds.pr.add_aggregates_coordinates(agg_info=agg_info)
+
+        expected = minimal_ds["CO2"].pr.sum(dim="area (ISO3)")
+        actual = test_ds["CO2"].pr.loc[{"area": "all"}].drop_vars("area (ISO3)")
+        xr.testing.assert_allclose(expected, actual)
+        expected = minimal_ds["CO2"].pr.loc[{"area": ["COL", "ARG", "BOL"]}].pr.sum(dim="area")
+        actual = test_ds["CO2"].pr.loc[{"area": "SAM"}].drop_vars("area (ISO3)")
+        xr.testing.assert_allclose(expected, actual)
+        # existing data is not overwritten
+        xr.testing.assert_identical(
+            minimal_ds["CO2"].pr.loc[{"area": "COL"}], test_ds["CO2"].pr.loc[{"area": "COL"}]
+        )
+        assert test_ds.attrs == minimal_ds.attrs
+
+    def test_aggregation_levels(self, minimal_ds):
+        rules = primap2._aggregate.compile_aggregation_rules(
+            {
+                "SAM": ["COL", "ARG"],
+                "X": ["SAM", "MEX"],
+                "MEX": ["BOL"],
+                "Y": ["BOL", "X"],
+            },
+            da=minimal_ds["CO2"],
+            coordinate="area (ISO3)",
+            tolerance=0.01,
+        )
+        levels = primap2._aggregate.aggregation_levels(rules)
+        # MEX is a source of X, so it is only overwritten in the level of X
+        assert [[rule.target for rule in level] for level in levels] == [
+            ["SAM"],
+            ["X", "MEX"],
+            ["Y"],
+        ]
+
+
+class TestAddAggregatesHierarchy:
+    def test_add_aggregates_hierarchy(self, opulent_ds):
+        hierarchy = {
+            "category": {
+                "X": ["0", "Y"],
+                "Y": ["1.A", "1.B"],
+                "Z": ["DOES NOT EXIST"],
+                "1": ["1.A", "1.B"],
+            }
+        }
+        da = opulent_ds["CO2"].reset_coords(drop=True)
+        da.pr.loc[{"category": "1"}] = da.pr.loc[{"category": ["1.A", "1.B"]}].pr.sum("category")
+        da.pr.loc[{"category": "1", "area": "COL"}] *= 1.001
+
+        result, report = da.pr.add_aggregates_hierarchy(hierarchy, return_report=True)
+
+        expected_y = da.pr.loc[{"category": ["1.A", "1.B"]}].pr.sum("category")
+        xr.testing.assert_allclose(
+            result.pr.loc[{"category": "Y"}].drop_vars("category (IPCC 2006)"), expected_y
+        )
+        expected_x = da.pr.loc[{"category": "0"}].drop_vars("category (IPCC 2006)") + expected_y
+        xr.testing.assert_allclose(
+            result.pr.loc[{"category": "X"}].drop_vars("category (IPCC 2006)"), expected_x
+        )
+        assert "Z" not in result["category (IPCC 2006)"]
+        # existing data is kept
+        xr.testing.assert_identical(result.pr.loc[{"category": "1"}], da.pr.loc[{"category": "1"}])
+
+        report = report.set_index("value")
+        assert report.loc["Y", "level"] == 0
+        assert report.loc["X", "level"] == 1
+        assert report.loc["X", "status"] == "computed"
+        assert report.loc["Z", "status"] == "no data"
+        assert report.loc["1", "status"] == "existing"
+        assert report.loc["1", "max deviation"] == pytest.approx(0.001 / 1.001)
+        assert np.isnan(report.loc["X", "max deviation"])
+        assert (report["coordinate"] == "category (IPCC 2006)").all()
+
+    def test_add_aggregates_hierarchy_dataset(self, opulent_ds):
+        hierarchy = {"area": {"SAM": ["COL", "ARG", "BOL"], "all": ["SAM", "MEX"]}}
+        result, report = opulent_ds.pr.add_aggregates_hierarchy(hierarchy, return_report=True)
+
+        assert "all" in result["area (ISO3)"]
+        for var in opulent_ds.data_vars:
+            if "area (ISO3)" not in opulent_ds[var].dims:
+                xr.testing.assert_identical(result[var], opulent_ds[var])
+                continue
+            xr.testing.assert_allclose(
+                result[var].pr.loc[{"area": "all"}].drop_vars("area (ISO3)"),
+                opulent_ds[var].pr.sum("area", skipna=True, min_count=1),
+            )
+        assert set(report["variable"]) == {
+            var for var in opulent_ds.data_vars if "area (ISO3)" in opulent_ds[var].dims
+        }
+        assert result.attrs == opulent_ds.attrs
+
+    def test_add_aggregates_hierarchy_cycle(self, minimal_ds):
+        with pytest.raises(ValueError, match="contains a cycle"):
+            minimal_ds.pr.add_aggregates_hierarchy({"area": {"A": ["COL", "B"], "B": ["A"]}})
+
 
 # filter, also for individual items in the list and check if results fine
 # filter for entity, variable and a coordinate
@@ -0,0 +1,123 @@
+"""Tests for processing chunked datasets without loading them into memory."""
+
+import pytest
+import xarray as xr
+
+import primap2
+
+from .utils import assert_ds_aligned_equal
+
+dask = pytest.importorskip("dask")
+
+
+@pytest.fixture
+def chunked_ds(opulent_ds, tmp_path) -> xr.Dataset:
+    opulent_ds.pr.to_netcdf(tmp_path / "opulent.nc")
+    return primap2.open_dataset(tmp_path / "opulent.nc", chunks={"area (ISO3)": 1})
+
+
+class ComputeCounter:
+    """dask scheduler counting how often data is computed."""
+
+    def __init__(self):
+        self.computes = 0
+
+    def __call__(self, dsk, keys, **kwargs):
+        self.computes += 1
+        return dask.get(dsk, keys, **kwargs)
+
+
+@pytest.mark.parametrize(
+    "operation",
+    [
+        lambda ds: ds.pr.loc[{"area": ["COL", "ARG"], "category": "0"}],
+        lambda ds: ds.pr.sum("area"),
+        lambda ds: ds.pr.sum("area", skipna_evaluation_dims="time"),
+        lambda ds: ds["CO2"].pr.sum(reduce_to_dim=["time", "area"], keep_attrs=False),
+        lambda ds: ds.pr.fillna(ds.pr.loc[{"area": ["COL"]}]),
+        lambda ds: ds.pr.downscale_timeseries(
+            dim="category (IPCC 2006)",
+            basket="0",
+            basket_contents=["1", "2"],
+            check_consistency=False,
+        ),
+        lambda ds: ds["CO2"].pr.downscale_timeseries(
+            dim="category (IPCC 2006)",
+            basket="0",
+            basket_contents=["1", "2"],
+            check_consistency=False,
+        ),
+    ],
+    ids=["loc", "sum", "sum_skipna_evaluation", "sum_da", "fillna", "downscale", "downscale_da"],
+)
+def test_operations_stay_lazy(chunked_ds, opulent_ds, operation):
+    counter = ComputeCounter()
+    with dask.config.set(scheduler=counter):
+        result = operation(chunked_ds)
+    assert counter.computes == 0
+    assert primap2._accessor_base.is_chunked(result)
+
+    expected = operation(opulent_ds)
+    if isinstance(expected, xr.Dataset):
+        assert_ds_aligned_equal(result.compute(), expected)
+    else:
+        xr.testing.assert_allclose(result.compute(), expected)
+        assert result.attrs == expected.attrs
+
+
+def test_merge_chunked(chunked_ds, opulent_ds):
+    chunked_merge = chunked_ds.copy()
+    chunked_merge["CO2"] = chunked_ds["CO2"] * 1.001
+    counter = ComputeCounter()
+    with dask.config.set(scheduler=counter):
+        result = chunked_ds.pr.merge(chunked_merge)
+    # only the checks for discrepancies are computed, one per common variable
+    assert counter.computes == len(chunked_ds.data_vars)
+    assert primap2._accessor_base.is_chunked(result)
+    assert_ds_aligned_equal(result.compute(), opulent_ds)
+
+    chunked_merge["CO2"] = chunked_ds["CO2"] * 2
+    with pytest.raises(xr.MergeError, match="pr.merge error"):
+        chunked_ds.pr.merge(chunked_merge)
+
+
+def test_to_netcdf_chunked(chunked_ds, opulent_ds, tmp_path):
+    chunked_ds.pr.sum("area").pr.to_netcdf(tmp_path / "summed.nc")
+    assert_ds_aligned_equal(primap2.open_dataset(tmp_path / "summed.nc"), opulent_ds.pr.sum("area"))
+
+
+@pytest.mark.parametrize("check_consistency", [True, False])
+@pytest.mark.parametrize("dataarray", [False, True], ids=["downscale", "downscale_da"])
+def test_downscale_chunked_check_consistency(opulent_ds, tmp_path, check_consistency, dataarray):
+    basket = opulent_ds.pr.loc[{"category": ["1", "2"]}].pr.sum("category")
+    ds = opulent_ds.pr.set("category", "0", basket, existing="overwrite")
+    ds.pr.to_netcdf(tmp_path / "consistent.nc")
+    chunked = primap2.open_dataset(tmp_path / "consistent.nc", chunks={"area (ISO3)": 1})
+    if dataarray:
+        ds, chunked = ds["CO2"], chunked["CO2"]
+
+    def downscale(obj):
+        return obj.pr.downscale_timeseries(
+            dim="category (IPCC 2006)",
+            basket="0",
+            basket_contents=["1", "2"],
+            check_consistency=check_consistency,
+        )
+
+    counter = ComputeCounter()
+    with dask.config.set(scheduler=counter):
+        result = downscale(chunked)
+    # the consistency check is computed eagerly, the downscaling stays lazy
+    assert counter.computes == (1 if check_consistency else 0)
+    assert primap2._accessor_base.is_chunked(result)
+    if dataarray:
+        xr.testing.assert_allclose(result.compute(), downscale(ds))
+    else:
+        assert_ds_aligned_equal(result.compute(), downscale(ds))
+
+
+def test_downscale_chunked_inconsistent(chunked_ds):
+    with pytest.raises(ValueError, match="To continue regardless, set check_consistency=False"):
+        chunked_ds.pr.downscale_timeseries(
+            dim="category (IPCC 2006)", basket="0", basket_contents=["1", "2"]
+        )
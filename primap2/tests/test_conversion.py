@@ -1,3 +1,5 @@
+import numpy as np
+import pandas as pd
 import pytest
 
 import primap2.pm2io as pm2io
@@ -121,3 +123,50 @@ class TestUnitPrimapToPrimap2:
 )
 def test_convert_entity_gwp_primap_to_primap2(entity_pm1, entity_pm2):
     assert pm2io._conversion.convert_entity_gwp_primap_to_primap2(entity_pm1) == entity_pm2
+
+
+def test_failed_conversion_warns_every_time(caplog):
+    for _ in range(2):
+        caplog.clear()
+        assert pm2io._conversion.convert_ipcc_code_primap_to_primap2("IPCA1") == "error_IPCA1"
+        assert "No digit found on first level." in caplog.text
+
+
+def test_convert_by_keyword():
+    conversion = pm2io._conversion
+    assert conversion.convert_unit_to_primap2(unit="Gg", entity="CO2") == "Gg CO2 / yr"
+    assert conversion.convert_unit_to_primap2("Gg", entity="CO2") == "Gg CO2 / yr"
+    assert conversion.convert_ipcc_code_primap_to_primap2(code="IPC1A") == "1.A"
+    assert (
+        conversion.convert_entity_gwp_primap_to_primap2(entity_pm1="KYOTOGHGAR4")
+        == "KYOTOGHG (AR4GWP100)"
+    )
+    with pytest.raises(TypeError):
+        conversion.convert_unit_to_primap2(unit="Gg", substance="CO2")
+
+
+def test_convert_ipcc_codes_primap_to_primap2():
+    codes = pd.Series(["IPC1A", "IPCM0EL", np.nan, "IPC1A"], name="category")
+    converted = pm2io._conversion.convert_ipcc_codes_primap_to_primap2(codes)
+    assert converted.name == "category"
+    assert list(converted[[0, 1, 3]]) == ["1.A", "M.0.EL", "1.A"]
+    assert pd.isna(converted[2])
+
+
+def test_convert_entities_gwp_primap_to_primap2():
+    entities = pd.Series(["CO2", "KYOTOGHGAR4", "KYOTOGHG"], index=[3, 2, 1])
+    converted = pm2io._conversion.convert_entities_gwp_primap_to_primap2(entities)
+    pd.testing.assert_series_equal(
+        converted,
+        pd.Series(
+            ["CO2", "KYOTOGHG (AR4GWP100)", "KYOTOGHG (SARGWP100)"], index=[3, 2, 1], dtype=object
+        ),
+    )
+
+
+def test_convert_units_to_primap2():
+    units = pd.Series(["GgCO2eq", "Gg", "Gg", np.nan])
+    entities = pd.Series(["KYOTOGHG", "CH4", "N2O", "CO2"])
+    converted = pm2io._conversion.convert_units_to_primap2(units, entities)
+    assert list(converted[:3]) == ["Gg CO2 / yr", "Gg CH4 / yr", "Gg N2O / yr"]
+    assert pd.isna(converted[3])
@@ -2,6 +2,7 @@
 """Tests for _data_format.py"""
 
 import logging
+import pickle
 
 import numpy as np
 import pandas as pd
@@ -28,6 +29,103 @@ class TestToNetCDF:
         assert attrs_before == ds.attrs
         assert attrs_before == nds.attrs
 
+    def test_processing_info_encoding(self, opulent_processing_ds, tmp_path):
+        ds = opulent_processing_ds
+        ds["Processing of CO2"].data.flat[0] = None
+        ds.pr.to_netcdf(tmp_path / "temp.nc")
+
+        # the processing info is stored as codes of the unique descriptions
+        raw = xr.open_dataset(tmp_path / "temp.nc", engine="h5netcdf")
+        assert raw["Processing of CO2"].dtype == np.int32
+        assert raw["Processing of CO2"].data.flat[0] == -1
+        assert np.unique(raw["Processing of CO2"].data).tolist() == [-1, 0]
+        assert "descriptions of Processing of CO2" in raw
+
+        nds = primap2.open_dataset(tmp_path / "temp.nc")
+        assert "descriptions of Processing of CO2" not in nds
+        assert nds["Processing of CO2"].data.flat[0] is None
+        assert nds["Processing of CO2"].attrs == ds["Processing of CO2"].attrs
+        xr.testing.assert_identical(
+            nds["Processing of CH4"].isnull(), ds["Processing of CH4"].isnull()
+        )
+        assert str(nds["Processing of CO2"].data.flat[1]) == str(
+            ds["Processing of CO2"].data.flat[1]
+        )
+
+    def test_read_old_processing_info_format(self, opulent_processing_ds, tmp_path):
+        # per-timeseries serialized processing info as written by earlier versions
+        ds = opulent_processing_ds.pint.dequantify()
+        ds.attrs["publication_date"] = ds.attrs["publication_date"].isoformat()
+        for var in ds:
+            if var.startswith("Processing of "):
+                ds[var].data = np.vectorize(lambda x: x.serialize())(ds[var].data)
+        ds.to_netcdf(tmp_path / "temp.nc", engine="h5netcdf", format="NETCDF4")
+
+        nds = primap2.open_dataset(tmp_path / "temp.nc")
+        assert_ds_aligned_equal(opulent_processing_ds, nds)
+
+    def test_write_legacy_processing_info_format(self, opulent_processing_ds, tmp_path):
+        opulent_processing_ds.pr.to_netcdf(tmp_path / "temp.nc", processing_info_encoding="legacy")
+
+        # each timeseries is serialized separately, as read by earlier versions
+        raw = xr.open_dataset(tmp_path / "temp.nc", engine="h5netcdf")
+        assert "descriptions of Processing of CO2" not in raw
+        assert "processing_descriptions" not in raw["Processing of CO2"].attrs
+        decoded = np.vectorize(primap2.TimeseriesProcessingDescription.deserialize)(
+            raw["Processing of CO2"].data
+        )
+        assert str(decoded.flat[1]) == str(opulent_processing_ds["Processing of CO2"].data.flat[1])
+
+        nds = primap2.open_dataset(tmp_path / "temp.nc")
+        assert_ds_aligned_equal(opulent_processing_ds, nds)
+
+        with pytest.raises(ValueError, match="Unknown processing_info_encoding 'pickle'"):
+            opulent_processing_ds.pr.to_netcdf(
+                tmp_path / "temp.nc", processing_info_encoding="pickle"
+            )
+
+    def test_lazy_processing_info(self, opulent_processing_ds, tmp_path):
+        ds = opulent_processing_ds
+        ds["Processing of CO2"].data.flat[0] = None
+        ds.pr.to_netcdf(tmp_path / "temp.nc")
+
+        nds = primap2.open_dataset(tmp_path / "temp.nc", decode_processing_info="lazy")
+        assert "descriptions of Processing of CO2" not in nds
+        assert nds["Processing of CO2"].dtype == object
+        sel = {"area": ["COL", "ARG"], "category": "0"}
+        assert str(nds["Processing of CO2"].pr.loc[sel].data.flat[1]) == str(
+            ds["Processing of CO2"].pr.loc[sel].data.flat[1]
+        )
+        assert nds["Processing of CO2"].data.flat[0] is None
+        assert_ds_aligned_equal(ds, nds.load())
+
+    def test_lazy_processing_info_old_format(self, opulent_processing_ds, tmp_path, monkeypatch):
+        ds = opulent_processing_ds.pint.dequantify()
+        ds.attrs["publication_date"] = ds.attrs["publication_date"].isoformat()
+        for var in ds:
+            if var.startswith("Processing of "):
+                ds[var].data = np.vectorize(lambda x: x.serialize())(ds[var].data)
+        ds.to_netcdf(tmp_path / "temp.nc", engine="h5netcdf", format="NETCDF4")
+
+        deserialized = []
+        deserialize = primap2.TimeseriesProcessingDescription.deserialize
+
+        def counting_deserialize(b):
+            deserialized.append(b)
+            return deserialize(b)
+
+        monkeypatch.setattr(
+            primap2.TimeseriesProcessingDescription, "deserialize", counting_deserialize
+        )
+        nds = primap2.open_dataset(tmp_path / "temp.nc", decode_processing_info="lazy")
+        assert not deserialized
+        selected = nds["Processing of CO2"].pr.loc[{"area": "COL", "category": "0"}].data
+        assert str(selected.flat[0]) == (
+            "Using function=random for times=all: Values created randomly."
+        )
+        # only the selected timeseries are decoded
+        assert len(deserialized) == selected.size < nds["Processing of CO2"].size
+
 
 class TestEnsureValid:
     def test_something_else_entirely(self, caplog):
@@ -312,6 +410,27 @@ class TestToInterchangeFormat:
             " is not supported." in caplog.text
         )
 
+    def test_sorted(self, any_ds):
+        df = any_ds.pr.to_interchange_format()
+        time_cols = [col for col in df.columns if col.isdigit()]
+        dim_cols = [col for col in df.columns if col not in time_cols]
+
+        assert time_cols == sorted(time_cols)
+        expected = df.sort_values(dim_cols, ignore_index=True)
+        pd.testing.assert_frame_equal(df, expected)
+        # all-NaN rows are dropped
+        assert df[time_cols].notna().any(axis=1).all()
+
+
+@pytest.mark.parametrize("radix", [3, 2**62])
+def test_lexsort_ranks(radix):
+    rng = np.random.default_rng(1)
+    ranks = [rng.integers(0, 3, 50) for _ in range(3)]
+    # large ranks don't fit into one combined key and need lexsort
+    ranks[0] = ranks[0] * (radix // 3)
+    expected = pd.DataFrame(ranks).T.sort_values([0, 1, 2], kind="stable").index.to_numpy()
+    np.testing.assert_array_equal(primap2._data_format.lexsort_ranks(ranks), expected)
+
 
 def test_remove_processing_info(opulent_processing_ds):
     result = opulent_processing_ds.pr.remove_processing_info()
@@ -358,3 +477,74 @@ def test_expand_dims(minimal_ds):
 
     assert new_dim in result_ds.coords
     assert "new_value" in result_ds.coords[new_dim].values
+
+
+def test_processing_description_array():
+    times = np.array(["2000", "2001", "2003"], dtype="datetime64[ns]")
+    data = np.array(
+        [
+            [
+                primap2.TimeseriesProcessingDescription(
+                    steps=[
+                        primap2.ProcessingStepDescription(
+                            time=times[:2], function="f", description="d", source="s"
+                        ),
+                        primap2.ProcessingStepDescription(
+                            time="all", function="f", description="other"
+                        ),
+                    ]
+                ),
+                None,
+            ],
+            [
+                primap2.TimeseriesProcessingDescription(steps=[]),
+                primap2.TimeseriesProcessingDescription(
+                    steps=[
+                        primap2.ProcessingStepDescription(
+                            time=times[2:], function="g", description="d", source="s"
+                        ),
+                        primap2.ProcessingStepDescription(
+                            time=times[:0], function="f", description="d", source="t"
+                        ),
+                    ]
+                ),
+            ],
+        ],
+        dtype=object,
+    )
+    array = primap2.ProcessingDescriptionArray.from_objects(data)
+    assert len(array) == 4
+    assert array.strings == ("f", "d", "s", "other", "g", "t")
+    np.testing.assert_array_equal(array.offsets, [0, 2, 2, 2, 4])
+
+    views = array.views()
+    objects = array.to_objects()
+    assert views.shape == objects.shape == data.shape
+    assert views[0, 1] is None
+    assert objects[0, 1] is None
+    for i, j in ((0, 0), (1, 0), (1, 1)):
+        assert isinstance(views[i, j], primap2.TimeseriesProcessingDescription)
+        assert str(views[i, j]) == str(data[i, j])
+        assert str(objects[i, j]) == str(data[i, j])
+        assert views[i, j].serialize() == data[i, j].serialize()
+    assert views[1, 0] == data[1, 0]
+    np.testing.assert_array_equal(views[1, 1].steps[0].time, times[2:])
+    assert len(views[1, 1].steps[1].time) == 0
+
+    # views are pickled as plain processing descriptions
+    assert pickle.loads(pickle.dumps(views[0, 0])).__class__ is (
+        primap2.TimeseriesProcessingDescription
+    )
+
+    unique, codes = primap2.ProcessingDescriptionArray.from_objects(
+        np.array([data[0, 0], data[1, 1], None, data[0, 0], views[0, 0]], dtype=object)
+    ).unique()
+    assert len(unique) == 2
+    np.testing.assert_array_equal(codes, [0, 1, -1, 0, 0])
+
+    decoded = primap2.ProcessingDescriptionArray.from_bytes(array.to_bytes()).to_objects()
+    for i, j in ((0, 0), (1, 0), (1, 1)):
+        assert str(decoded[i, j]) == str(
+            primap2.TimeseriesProcessingDescription.deserialize(data[i, j].serialize())
+        )
+    assert decoded[0, 1] is None
@@ -118,6 +118,129 @@ def test_create_na_replacement_dict(strs, user_na_conv, expected_result):
     assert pm2io._data_reading.create_str_replacement_dict(strs, user_na_conv) == expected_result
 
 
+def test_find_and_replace_str_values():
+    data = pd.DataFrame(
+        {
+            "category": ["1", "2", "3"],
+            "2000": ["NO", "1.5", np.nan],
+            "2001": [1, 2, 3],
+            "2002": ["IE", "C", "1_000"],
+        }
+    )
+    time_cols = ["2000", "2001", "2002"]
+    strs = pm2io._data_reading.find_str_values_in_data(data, time_cols)
+    assert sorted(strs) == ["C", "IE", "NO"]
+
+    repl = pm2io._data_reading.create_str_replacement_dict(strs, {"C": 5.0})
+    pm2io._data_reading.replace_values(data, time_cols, repl)
+    expected = pd.DataFrame(
+        {
+            "category": ["1", "2", "3"],
+            "2000": [0.0, 1.5, np.nan],
+            "2001": [1.0, 2.0, 3.0],
+            "2002": [0.0, 5.0, np.nan],
+        }
+    )
+    pd.testing.assert_frame_equal(data, expected)
+
+
+def test_replace_str_values_string_dtype():
+    data = pd.DataFrame(
+        {
+            "2000": pd.Series(["NO", "1.5", None], dtype="string"),
+            "2001": pd.Series(["C", "2", "IE"], dtype="string"),
+        }
+    )
+    time_cols = ["2000", "2001"]
+    pm2io._data_reading.replace_values(data, time_cols, {"NO": 0, "IE": 0, "C": 5.0})
+    expected = pd.DataFrame({"2000": [0.0, 1.5, np.nan], "2001": [5.0, 2.0, 0.0]})
+    pd.testing.assert_frame_equal(data, expected)
+
+
+def test_map_metadata_cache():
+    calls = []
+
+    def mapping(value):
+        calls.append(value)
+        return value.lower()
+
+    cache = {}
+    for chunk in (["A", "B", "A"], ["B", "C"]):
+        data = pd.DataFrame({"category": chunk})
+        pm2io._data_reading.map_metadata(
+            data, meta_mapping={"category": mapping}, attrs={}, cache=cache
+        )
+        assert list(data["category"]) == [x.lower() for x in chunk]
+
+    assert sorted(calls) == ["A", "B", "C"]
+
+
+def test_map_metadata_args():
+    data = pd.DataFrame(
+        {
+            "unit": ["GgCO2eq", "Gg", "Mt", "Gg", np.nan],
+            "entity": ["KYOTOGHG", "CH4", "CO2", "CO2", "CO2"],
+        }
+    )
+    cache = {}
+    pm2io._data_reading.map_metadata_unordered(
+        data, meta_mapping={"unit": "PRIMAP1"}, attrs={}, cache=cache
+    )
+    assert list(data["unit"][:4]) == ["Gg CO2 / yr", "Gg CH4 / yr", "Mt CO2 / yr", "Gg CO2 / yr"]
+    assert pd.isna(data["unit"][4])
+    # one call per unique combination of unit and entity
+    assert set(cache[("unit", "PRIMAP1")]) == {
+        ("GgCO2eq", "KYOTOGHG"),
+        ("Gg", "CH4"),
+        ("Mt", "CO2"),
+        ("Gg", "CO2"),
+    }
+
+
+def test_filter_data():
+    data = pd.DataFrame(
+        {
+            "category": ["IPC0", "IPC1", "IPC2", "IPC0", "IPC1"],
+            "gas": ["CO2", "CO2", "CH4", "CH4", "N2O"],
+            "country": ["USA", "FRA", "DEU", "DEU", "USA"],
+        },
+        index=[4, 3, 2, 1, 0],
+    )
+    pm2io._data_reading.filter_data(
+        data,
+        filter_keep={
+            "f1": {"category": ["IPC0", "IPC2"]},
+            "f2": {"gas": "N2O"},
+            "f3": {"country": "FRA", "gas": ["CO2"]},
+        },
+        filter_remove={"f1": {"gas": "CH4", "country": "DEU"}},
+    )
+    expected = pd.DataFrame(
+        {
+            "category": ["IPC0", "IPC1", "IPC1"],
+            "gas": ["CO2", "CO2", "N2O"],
+            "country": ["USA", "FRA", "USA"],
+        }
+    )
+    pd.testing.assert_frame_equal(data, expected)
+
+
+def test_fill_from_other_col():
+    data = pd.DataFrame(
+        {
+            "category": ["0", np.nan, "x", np.nan],
+            "category_name": ["Total", "Energy", "IPPU", np.nan],
+        }
+    )
+    pm2io._data_reading.fill_from_other_col(
+        data,
+        coords_value_filling={"category": {"category_name": {"Energy": "1", "IPPU": "2"}}},
+        attrs={},
+    )
+    assert list(data["category"][:3]) == ["0", "1", "2"]
+    assert pd.isna(data["category"][3])
+
+
 def assert_attrs_equal(attrs_result, attrs_expected):
     assert attrs_result.keys() == attrs_expected.keys()
     assert attrs_result["attrs"] == attrs_expected["attrs"]
@@ -621,6 +744,170 @@ class TestReadWideCSVFile:
         df_result = pd.read_csv(tmp_path / "test.csv", index_col=0)
         pd.testing.assert_frame_equal(df_result, df_expected, check_column_type=False)
 
+    @pytest.mark.parametrize("chunksize", [1, 3])
+    def test_chunked(
+        self,
+        chunksize,
+        coords_cols,
+        coords_defaults,
+        coords_terminologies,
+        coords_value_mapping,
+        filter_keep,
+        filter_remove,
+    ):
+        file_input = DATA_PATH / "test_csv_data_sec_cat.csv"
+        meta_data = {"references": "Just ask around."}
+        filter_remove["f1"] = {"gas": "KYOTOGHG"}
+
+        args = dict(
+            coords_cols=coords_cols,
+            coords_defaults=coords_defaults,
+            coords_terminologies=coords_terminologies,
+            coords_value_mapping=coords_value_mapping,
+            filter_keep=filter_keep,
+            filter_remove=filter_remove,
+            meta_data=meta_data,
+        )
+        df_expected = pm2io.read_wide_csv_file_if(file_input, **args)
+        df_result = pm2io.read_wide_csv_file_if(file_input, chunksize=chunksize, **args)
+
+        pd.testing.assert_frame_equal(df_result, df_expected)
+        assert df_result.attrs == df_expected.attrs
+
+    @pytest.mark.parametrize("n_workers", [None, 2])
+    def test_read_many(
+        self,
+        tmp_path,
+        n_workers,
+        coords_cols,
+        coords_defaults,
+        coords_terminologies,
+        coords_value_mapping,
+    ):
+        file_input = DATA_PATH / "test_csv_data_sec_cat.csv"
+        spec = dict(
+            coords_cols=coords_cols,
+            coords_defaults=coords_defaults,
+            coords_terminologies=coords_terminologies,
+            coords_value_mapping=coords_value_mapping,
+            meta_data={"references": "Just ask around."},
+        )
+        df_expected = pm2io.read_wide_csv_file_if(file_input, **spec)
+
+        # split the input into one file per country
+        data = pd.read_csv(file_input)
+        paths = []
+        for country, data_country in data.groupby("country"):
+            paths.append(tmp_path / f"{country}.csv")
+            data_country.to_csv(paths[-1], index=False)
+
+        df_result = pm2io.read_many_if(paths, spec, n_workers=n_workers)
+        pd.testing.assert_frame_equal(df_result, df_expected)
+        assert df_result.attrs == df_expected.attrs
+
+        ds_result = pm2io.read_many_if(paths, spec, to_dataset=True)
+        assert_ds_aligned_equal(
+            ds_result, pm2io.from_interchange_format(df_expected), equal_nan=True
+        )
+
+    def test_cache(
+        self,
+        tmp_path,
+        coords_cols,
+        coords_defaults,
+        coords_terminologies,
+        coords_value_mapping,
+    ):
+        file_input = tmp_path / "input.csv"
+        file_input.write_bytes((DATA_PATH / "test_csv_data_sec_cat.csv").read_bytes())
+        cache_dir = tmp_path / "cache"
+        spec = dict(
+            coords_cols=coords_cols,
+            coords_defaults=coords_defaults,
+            coords_terminologies=coords_terminologies,
+            coords_value_mapping=coords_value_mapping,
+            meta_data={
+                "references": "Just ask around.",
+                "publication_date": datetime.date(2021, 1, 1),
+            },
+        )
+        df_expected = pm2io.read_wide_csv_file_if(file_input, **spec)
+
+        df_first = pm2io.read_wide_csv_file_if(file_input, cache_dir=cache_dir, **spec)
+        assert len(list(cache_dir.glob("*/*.parquet"))) == 1
+        df_cached = pm2io.read_wide_csv_file_if(file_input, cache_dir=cache_dir, **spec)
+        assert len(list(cache_dir.glob("*/*.parquet"))) == 1
+        for df in (df_first, df_cached):
+            pd.testing.assert_frame_equal(df, df_expected)
+            assert df.attrs == df_expected.attrs
+
+        # different arguments
+        pm2io.read_wide_csv_file_if(file_input, cache_dir=cache_dir, convert_str=False, **spec)
+        assert len(list(cache_dir.glob("*/*.parquet"))) == 2
+
+        # changed file content
+        data = pd.read_csv(file_input)
+        data["1991"] = data["1991"] * 2
+        data.to_csv(file_input, index=False)
+        df_changed = pm2io.read_wide_csv_file_if(file_input, cache_dir=cache_dir, **spec)
+        assert len(list(cache_dir.glob("*/*.parquet"))) == 3
+        assert (df_changed["1991"] == 2 * df_expected["1991"]).all()
+
+    def test_cache_mapping_functions(
+        self,
+        tmp_path,
+        coords_cols,
+        coords_defaults,
+        coords_terminologies,
+    ):
+        file_input = DATA_PATH / "test_csv_data_sec_cat.csv"
+        cache_dir = tmp_path / "cache"
+        spec = dict(
+            coords_cols=coords_cols,
+            coords_defaults=coords_defaults,
+            coords_terminologies=coords_terminologies,
+            cache_dir=cache_dir,
+        )
+        df_upper = pm2io.read_wide_csv_file_if(
+            file_input, coords_value_mapping={"area": lambda x: x.upper()}, **spec
+        )
+        df_lower = pm2io.read_wide_csv_file_if(
+            file_input, coords_value_mapping={"area": lambda x: x.lower()}, **spec
+        )
+        assert len(list(cache_dir.glob("*/*.parquet"))) == 2
+        assert (df_upper["area (ISO3)"] == df_upper["area (ISO3)"].str.upper()).all()
+        assert (df_lower["area (ISO3)"] == df_lower["area (ISO3)"].str.lower()).all()
+
+        # objects without a deterministic repr can't be part of the cache key
+        class Mapping:
+            def __call__(self, x):
+                return x
+
+        pm2io.read_wide_csv_file_if(file_input, coords_value_mapping={"area": Mapping()}, **spec)
+        assert len(list(cache_dir.glob("*/*.parquet"))) == 2
+
+    def test_read_many_inconsistent(
+        self,
+        coords_cols,
+        coords_defaults,
+        coords_terminologies,
+        coords_value_mapping,
+    ):
+        file_input = DATA_PATH / "test_csv_data_sec_cat.csv"
+        spec = dict(
+            coords_cols=coords_cols,
+            coords_defaults=coords_defaults,
+            coords_terminologies=coords_terminologies,
+        )
+        with pytest.raises(ValueError, match="Unknown reader"):
+            pm2io.read_many_if([file_input], spec, reader="excel")
+
+        df = pm2io.read_wide_csv_file_if(file_input, **spec)
+        df_other = df.copy()
+        df_other.attrs = {**df.attrs, "time_format": "%Y-%m"}
+        with pytest.raises(ValueError, match="different 'time_format'"):
+            pm2io._data_reading.concat_interchange_format([df, df_other])
+
     def test_col_missing(
         self,
         coords_cols,
@@ -1040,6 +1327,39 @@ class TestLong:
         pd.testing.assert_frame_equal(df_result_wide, df_result_long)
         assert df_result_wide.attrs == df_result_long.attrs
 
+    @pytest.mark.parametrize("chunksize", [1, 4])
+    def test_chunked(
+        self,
+        chunksize,
+        coords_cols,
+        add_coords_cols,
+        coords_defaults,
+        coords_terminologies,
+        coords_value_mapping,
+    ):
+        file_input_long = DATA_PATH / "test_csv_data_category_name_long.csv"
+
+        del coords_cols["sec_cats__Class"]
+        del coords_defaults["sec_cats__Type"]
+        del coords_terminologies["sec_cats__Class"]
+        del coords_terminologies["sec_cats__Type"]
+        coords_cols["time"] = "year"
+        coords_cols["data"] = "emissions"
+
+        args = dict(
+            coords_cols=coords_cols,
+            add_coords_cols=add_coords_cols,
+            coords_defaults=coords_defaults,
+            coords_terminologies=coords_terminologies,
+            coords_value_mapping=coords_value_mapping,
+            time_format="%Y",
+        )
+        df_expected = pm2io.read_long_csv_file_if(file_input_long, **args)
+        df_result = pm2io.read_long_csv_file_if(file_input_long, chunksize=chunksize, **args)
+
+        pd.testing.assert_frame_equal(df_result, df_expected)
+        assert df_result.attrs == df_expected.attrs
+
     def test_no_data_specified(
         self, coords_cols, coords_defaults, coords_terminologies, coords_value_mapping
     ):
@@ -1148,6 +1468,55 @@ class TestRegression:
         assert_ds_aligned_equal(actual, expected, equal_nan=True)
 
 
-# functions that still need individual testing
-# dates_to_dimension(ds: xr.Dataset, time_format: str = "%Y") -> xr.DataArray:
-# harmonize_units
+def test_harmonize_units():
+    data = pd.DataFrame(
+        {
+            "entity": ["CO2", "CO2", "CH4", "CH4 (AR4GWP100)", "KYOTOGHG (AR4GWP100)"],
+            "unit": ["Mt CO2 / yr", "Gg CO2 / yr", "Gg CH4 / yr", "Gg CO2 / yr", "Mt CO2 / yr"],
+            "2000": [1.0, 2.0, 3.0, 25.0, 5.0],
+            "2001": [4, 5, 6, 50, 8],
+        }
+    )
+    pm2io._data_reading.harmonize_units(data, dimensions=["entity", "unit"])
+
+    expected = pd.DataFrame(
+        {
+            "entity": ["CO2", "CO2", "CH4", "CH4", "KYOTOGHG (AR4GWP100)"],
+            "unit": ["Gg CO2 / yr", "Gg CO2 / yr", "Gg CH4 / yr", "Gg CH4 / yr", "Mt CO2 / yr"],
+            "2000": [1000.0, 2.0, 3.0, 1.0, 5.0],
+            "2001": [4000.0, 5.0, 6.0, 2.0, 8.0],
+        }
+    )
+    pd.testing.assert_frame_equal(data, expected)
+
+
+def test_harmonize_units_gwp_without_space():
+    data = pd.DataFrame(
+        {
+            "entity": ["CH4(AR4GWP100)", "CH4"],
+            "unit": ["Gg CO2 / yr", "Gg CH4 / yr"],
+            "2000": [25.0, 3.0],
+        }
+    )
+    pm2io._data_reading.harmonize_units(data, dimensions=["entity", "unit"])
+
+    expected = pd.DataFrame(
+        {
+            "entity": ["CH4", "CH4"],
+            "unit": ["Gg CH4 / yr", "Gg CH4 / yr"],
+            "2000": [1.0, 3.0],
+        }
+    )
+    pd.testing.assert_frame_equal(data, expected)
+
+
+def test_harmonize_units_str_values():
+    data = pd.DataFrame(
+        {
+            "entity": ["CO2", "CO2"],
+            "unit": ["Mt CO2 / yr", "Gg CO2 / yr"],
+            "2000": ["IE", 1.0],
+        }
+    )
+    with pytest.raises(ValueError, match="String values"):
+        pm2io._data_reading.harmonize_units(data, dimensions=["entity", "unit"])
@@ -4,6 +4,7 @@ import csv
 import importlib
 import importlib.resources
 
+import numpy as np
 import pandas as pd
 import pytest
 import xarray as xr
@@ -14,11 +15,12 @@ from primap2 import pm2io
 from . import utils
 
 
-def test_round_trip(any_ds: xr.Dataset, tmp_path):
+@pytest.mark.parametrize("data_format", ["csv", "parquet"])
+def test_round_trip(any_ds: xr.Dataset, tmp_path, data_format):
+    if data_format == "parquet":
+        pytest.importorskip("pyarrow")
     path = tmp_path / "if"
-    pm2io.write_interchange_format(path, any_ds.pr.to_interchange_format())
-    with path.with_suffix(".yaml").open() as fd:
-        print(fd.read())
+    pm2io.write_interchange_format(path, any_ds.pr.to_interchange_format(), data_format=data_format)
     actual = pm2io.from_interchange_format(pm2io.read_interchange_format(path))
     # we expect that Processing information is lost here
     expected = any_ds
@@ -86,3 +88,62 @@ def test_stable_sorting(empty_ds, tmp_path):
 
     assert result_csv == expected_csv
     assert result_yaml == expected_yaml
+
+
+def test_parquet(opulent_ds, tmp_path):
+    pytest.importorskip("pyarrow")
+    path = tmp_path / "if"
+    ds_if = opulent_ds.pr.to_interchange_format()
+    pm2io.write_interchange_format(path, ds_if, data_format="parquet")
+    assert not path.with_suffix(".yaml").exists()
+
+    # discovery without file ending
+    actual = pm2io.read_interchange_format(path)
+    assert actual.attrs == pm2io.read_interchange_format(path.with_suffix(".parquet")).attrs
+    time_cols = [col for col in actual.columns if col.isdigit()]
+    assert (actual[time_cols].dtypes == "float64").all()
+    assert actual["area (ISO3)"].dtype == "category"
+
+    pm2io.write_interchange_format(path, ds_if)
+    expected = pm2io.read_interchange_format(path)
+    assert actual.attrs == expected.attrs
+    pd.testing.assert_frame_equal(
+        actual.astype({col: object for col in actual.columns if col not in time_cols}),
+        expected.astype({col: float for col in time_cols}),
+    )
+
+    # column projection
+    projected = pm2io.read_interchange_format(
+        path.with_suffix(".parquet"), columns=["area (ISO3)", "2000"]
+    )
+    assert list(projected.columns) == ["area (ISO3)", "2000"]
+    assert projected.attrs == expected.attrs
+
+
+def test_unknown_data_format(minimal_ds, tmp_path):
+    with pytest.raises(ValueError, match="Unknown data_format"):
+        pm2io.write_interchange_format(
+            tmp_path / "if", minimal_ds.pr.to_interchange_format(), data_format="xlsx"
+        )
+
+
+def test_from_duplicates(minimal_ds):
+    df = minimal_ds.pr.to_interchange_format()
+    df_dup = pd.concat([df, df.iloc[[2]]], ignore_index=True)
+    df_dup.attrs = df.attrs
+
+    with pytest.raises(ValueError, match="Duplicate rows"):
+        pm2io.from_interchange_format(df_dup)
+
+
+def test_from_missing_dimension_value(minimal_ds):
+    df = minimal_ds.pr.to_interchange_format()
+    area, entity = df.loc[0, "area (ISO3)"], df.loc[0, "entity"]
+    df.loc[0, "area (ISO3)"] = np.nan
+
+    actual = pm2io.from_interchange_format(df)
+
+    # the row without area can't be placed and is dropped
+    expected = minimal_ds.copy(deep=True)
+    expected[entity].pr.loc[{"area": area}] = np.nan * expected[entity].pint.units
+    utils.assert_ds_aligned_equal(actual, expected, equal_nan=True)
@@ -1,10 +1,13 @@
 #!/usr/bin/env python
 """Tests for _merge.py"""
 
+import numpy as np
 import pandas as pd
 import pytest
 import xarray as xr
 
+import primap2
+
 from .utils import assert_aligned_equal, assert_ds_aligned_equal
 
 
@@ -198,3 +201,98 @@ def test_merge_message_time_daily(opulent_ds):
         match=r"found discrepancies larger than tolerance \(1\.00%\) for time=2000-01-02",
     ):
         da_start.pr.merge(da_merge)
+
+
+def test_merge_partial_overlap(opulent_ds):
+    da = opulent_ds["CO2"]
+    da_start = da.pr.loc[{"area": ["ARG", "COL"], "time": slice("2000", "2010")}].copy()
+    da_start.pr.loc[{"area": "ARG", "time": "2005"}] = np.nan * da_start.pint.units
+    da_merge = da.pr.loc[{"area": ["MEX", "ARG"], "time": slice("2005", "2020")}]
+    # units are converted before comparing
+    da_merge = da_merge.pint.to("Mt CO2 / year") * 1.001
+
+    da_result = da_start.pr.merge(da_merge)
+
+    xr.testing.assert_identical(
+        da_result, da_start.combine_first(da_merge.pint.to("Gg CO2 / year"))
+    )
+    assert da_result.name == da_start.name
+    assert da_result.attrs == da_start.attrs
+
+
+def test_merge_does_not_modify_inputs(opulent_ds):
+    da_start = opulent_ds["CO2"].pr.loc[{"area": ["ARG", "COL"]}].copy()
+    da_start.pr.loc[{"area": "ARG"}] = np.nan * da_start.pint.units
+    da_merge = opulent_ds["CO2"].pr.loc[{"area": ["ARG", "MEX"]}]
+    start_copy = da_start.copy(deep=True)
+    merge_copy = da_merge.copy(deep=True)
+
+    da_start.pr.merge(da_merge)
+
+    xr.testing.assert_identical(da_start, start_copy)
+    xr.testing.assert_identical(da_merge, merge_copy)
+
+
+def test_merge_ds_fail_tolerance_all_variables(opulent_ds):
+    ds_start = opulent_ds[["CO2", "CH4", "SF6"]]
+    ds_merge = ds_start.copy()
+    ds_merge["CO2"] = ds_merge["CO2"] * 1.09
+    ds_merge["SF6"] = ds_merge["SF6"] * 1.09
+
+    with pytest.raises(xr.MergeError) as excinfo:
+        ds_start.pr.merge(ds_merge, tolerance=0.01)
+    # discrepancies are reported for all variables
+    message = str(excinfo.value)
+    assert message.count("pr.merge error: found discrepancies larger than tolerance") == 2
+    assert "(CO2)" in message
+    assert "(SF6)" in message
+    assert "(CH4)" not in message
+
+    ds_result = ds_start.pr.merge(ds_merge, tolerance=0.01, error_on_discrepancy=False)
+    assert_ds_aligned_equal(ds_result, ds_start)
+
+
+@pytest.mark.parametrize("n_workers", [None, 2])
+def test_merge_many(opulent_ds, n_workers):
+    areas = ["COL", "ARG", "MEX", "BOL"]
+    datasets = []
+    for i, area in enumerate(areas):
+        ds = opulent_ds.pr.loc[{"area": [area, areas[(i + 1) % len(areas)]]}].copy()
+        # small deviations in the overlapping data
+        ds["CO2"] = ds["CO2"] * (1 + i * 0.001)
+        ds.attrs["comment"] = f"part {i}"
+        datasets.append(ds)
+    datasets[1] = datasets[1].drop_vars("CH4")
+
+    result = primap2.merge_many(datasets, n_workers=n_workers)
+
+    expected = datasets[0]
+    for ds in datasets[1:]:
+        expected = expected.pr.merge(ds)
+    xr.testing.assert_identical(result[list(expected.data_vars)], expected)
+
+
+def test_merge_many_fail_tolerance(opulent_ds):
+    datasets = [
+        opulent_ds.pr.loc[{"area": ["COL", "ARG"]}],
+        opulent_ds.pr.loc[{"area": ["ARG", "MEX"]}],
+        opulent_ds.pr.loc[{"area": ["MEX", "BOL"]}].copy(),
+    ]
+    datasets[1]["CO2"] = datasets[1]["CO2"] * 1.09
+    datasets[2]["CH4"] = datasets[2]["CH4"] * 1.09
+
+    with pytest.raises(xr.MergeError) as excinfo:
+        primap2.merge_many(datasets)
+    message = str(excinfo.value)
+    assert "area (ISO3)=ARG" in message
+    assert "(CO2)" in message
+    assert "area (ISO3)=MEX" in message
+    assert "(CH4)" in message
+
+    result = primap2.merge_many(datasets, error_on_discrepancy=False)
+    expected = (
+        datasets[0]
+        .pr.merge(datasets[1], error_on_discrepancy=False)
+        .pr.merge(datasets[2], error_on_discrepancy=False)
+    )
+    xr.testing.assert_identical(result[list(expected.data_vars)], expected)